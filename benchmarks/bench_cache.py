@@ -0,0 +1,64 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_parallel_counting import write_synthetic_corpus
+from benchmarks.synthetic import synthetic_stop_words
+from src.cache import CorpusCache
+from src.ngram import create_n_grams
+from src.text_processing import text_processing, StopWordSet
+
+##################################################################
+# Cold and warm run times of the n-gram counting with the on-disk cache (CorpusCache)
+# Run with: python -m benchmarks.bench_cache
+###################################################################
+
+STOP_WORDS: StopWordSet = StopWordSet(synthetic_stop_words())
+
+def synthetic_stop_words_in(corpus: dict) -> StopWordSet:
+    """Stop words of a synthetic corpus: the synthetic stop words found in its texts."""
+    return StopWordSet(word for text in corpus.values() for word in text.split() if word in STOP_WORDS)
+
+def run(num_tokens: int, num_files: int) -> None:
+    """
+    Time the count without cache, then with an empty cache (cold), a full cache (warm) and a cache where one file
+    has changed, and check that the frequencies are the same.
+    """
+    corpus_dir: str = tempfile.mkdtemp()
+    cache_dir: str = tempfile.mkdtemp()
+    try:
+        write_synthetic_corpus(corpus_dir, num_tokens, num_files)
+
+        start: float = time.perf_counter()
+        expected = create_n_grams(text_processing(corpus_dir), STOP_WORDS).table
+        no_cache: float = time.perf_counter() - start
+        expected_frequencies: dict = {tuple(expected.row_tokens(r)): expected.frequencies[r] for r in range(len(expected))}
+
+        print(f"{num_tokens} tokens in {num_files} files, {len(expected)} n-grams")
+        print(f"{'run':>14} {'time (s)':>10} {'misses':>8} {'identical':>10}")
+        print(f"{'no cache':>14} {no_cache:>10.3f} {'-':>8} {'-':>10}")
+
+        for name in ("cold", "warm", "1 file changed"):
+            if name == "1 file changed":
+                with open(os.path.join(corpus_dir, "doc_0000.txt"), "a", encoding="utf-8") as file:
+                    file.write(" w1 w2 w3")
+                expected = create_n_grams(text_processing(corpus_dir), STOP_WORDS).table
+                expected_frequencies = {tuple(expected.row_tokens(r)): expected.frequencies[r] for r in range(len(expected))}
+            cache = CorpusCache(cache_dir, synthetic_stop_words_in)
+            start = time.perf_counter()
+            table = cache.count_n_grams(corpus_dir)
+            elapsed: float = time.perf_counter() - start
+            identical: bool = {tuple(table.row_tokens(r)): table.frequencies[r] for r in range(len(table))} == expected_frequencies
+            print(f"{name:>14} {elapsed:>10.3f} {cache.misses:>8} {str(identical):>10}")
+    finally:
+        shutil.rmtree(corpus_dir)
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold and warm run times of the n-gram counting with CorpusCache.")
+    parser.add_argument("--tokens", type=int, default=1_000_000, help="Size of the synthetic corpus in tokens.")
+    parser.add_argument("--files", type=int, default=200, help="Number of files of the synthetic corpus.")
+    args = parser.parse_args()
+    run(args.tokens, args.files)
@@ -0,0 +1,41 @@
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_tokens, synthetic_stop_words
+from src.ngram import create_n_grams
+from src.utils import calculate_and_store_glue, local_maxs
+
+##################################################################
+# Scaling benchmark of the glue computation (calculate_and_store_glue) and of LocalMaxs (local_maxs)
+# Run with: python -m benchmarks.bench_glue_scaling
+###################################################################
+
+DEFAULT_SIZES: list[int] = [10_000, 30_000, 100_000, 300_000, 1_000_000]
+
+def run(sizes: list[int], glue_function: str = "dice") -> None:
+    """
+    Time calculate_and_store_glue and local_maxs on synthetic corpora of increasing size and print the time per token.
+    If the stages are linear, the time per token stays roughly constant when the corpus grows.
+    """
+    stop_words: list[str] = synthetic_stop_words()
+    print(f"{'tokens':>10} {'n-grams':>10} {'glue (s)':>10} {'us/token':>10} {'us/n-gram':>10} {'localmaxs (s)':>14}")
+    for size in sizes:
+        tokens: list[str] = synthetic_tokens(size)
+        ngram_dict = create_n_grams(tokens, stop_words)
+
+        start: float = time.perf_counter()
+        calculate_and_store_glue(ngram_dict, glue_function, stop_words)
+        elapsed: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        local_maxs(ngram_dict)
+        elapsed_local_maxs: float = time.perf_counter() - start
+
+        print(f"{size:>10} {len(ngram_dict):>10} {elapsed:>10.3f} {elapsed / size * 1e6:>10.2f} {elapsed / len(ngram_dict) * 1e6:>10.2f} {elapsed_local_maxs:>14.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmark of calculate_and_store_glue and local_maxs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Corpus sizes in tokens.")
+    parser.add_argument("--glue", default="dice", choices=["scp", "dice", "mi"], help="Glue function.")
+    args = parser.parse_args()
+    run(args.sizes, args.glue)
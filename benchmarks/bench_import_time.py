@@ -0,0 +1,60 @@
+import argparse
+import subprocess
+import sys
+
+##################################################################
+# Start-up time of the pipeline: time to import its modules in a new interpreter (python -X importtime)
+# Run with: python -m benchmarks.bench_import_time
+###################################################################
+
+DEFAULT_MODULES: list[str] = ["main", "src.ngram", "src.keywords", "src.stopwords", "src.utils"]
+# Modules that must only be imported when they are used (plots, dialog boxes, keyword stages)
+LAZY_MODULES: list[str] = ["nltk", "matplotlib", "tkinter", "scipy"]
+
+# Function to measure the import of a module in a new interpreter
+def import_time(module: str) -> tuple[float, dict[str, float]]:
+    """
+    Import a module in a new Python process with -X importtime.
+    Returns: tuple[float, dict[str, float]]: The cumulative import time of the module in ms, and the cumulative
+        time in ms of every top-level package imported with it.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             capture_output=True, text=True, check=True)
+    packages: dict[str, float] = {}
+    total: float = 0.0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] = max(packages.get(name.split(".")[0], 0.0), int(cumulative) / 1000)
+        if name == module:
+            total = int(cumulative) / 1000
+    return total, packages
+
+def run(modules: list[str], repeat: int, max_ms: float = None) -> bool:
+    """
+    Print the best import time of each module over repeat runs and the lazy modules it imports.
+    Returns: bool: False if a lazy module is imported or an import takes more than max_ms.
+    """
+    ok: bool = True
+    print(f"{'module':>16} {'import (ms)':>12}  lazy modules imported")
+    for module in modules:
+        best: float = float("inf")
+        packages: dict[str, float] = {}
+        for _ in range(repeat):
+            total, packages = import_time(module)
+            best = min(best, total)
+        imported: list[str] = [name for name in LAZY_MODULES if name in packages]
+        print(f"{module:>16} {best:>12.1f}  {', '.join(imported) or '-'}")
+        if imported or (max_ms is not None and best > max_ms):
+            ok = False
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time of the modules of the pipeline.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs (the best one is kept).")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if an import takes longer (in ms).")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.modules, args.repeat, args.max_ms) else 1)
@@ -0,0 +1,58 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.sketches import NeighborSketch
+from src.stopwords import count_neighbors, get_stop_words, sketch_neighbors
+from src.text_processing import read_text_files
+
+##################################################################
+# Accuracy of the neighbor counts estimated with HyperLogLog sketches against the exact counts
+# Run with: python -m benchmarks.bench_neighbor_sketch
+###################################################################
+
+DEFAULT_PRECISIONS: list[int] = [6, 8, 10, 12]
+
+def run(corpus_path: str, precisions: list[int], shards: int) -> None:
+    """
+    Count the neighbors of the words of a corpus exactly, then estimate them with sketches of each precision,
+    built on shards of the documents and merged, and print the relative error of the estimates, the memory of the
+    sketches and whether get_stop_words finds the same stop words in the approximate mode.
+    """
+    corpus: dict[str, str] = read_text_files(corpus_path)
+    texts: list[str] = list(corpus.values())
+    start: float = time.perf_counter()
+    words, exact_counts = count_neighbors(texts)
+    exact_time: float = time.perf_counter() - start
+    exact: dict[str, int] = dict(zip(words, exact_counts.tolist()))
+    exact_stop_words: set[str] = set(get_stop_words(corpus))
+    distinct_pairs: int = int(exact_counts.sum())
+
+    print(f"{len(texts)} documents, {len(words)} words, {distinct_pairs} distinct (word, neighbor) pairs, "
+          f"exact count {exact_time:.3f}s")
+    print(f"{'precision':>9} {'bytes':>12} {'time (s)':>9} {'mean err':>9} {'max err':>8} {'err top 100':>11} "
+          f"{'same stop words':>15}")
+    top_words: list[str] = sorted(exact, key=lambda word: (-exact[word], word))[:100]
+    for precision in precisions:
+        start = time.perf_counter()
+        sketch: NeighborSketch = NeighborSketch(precision)
+        for shard in range(shards):
+            sketch.merge(sketch_neighbors(texts[shard::shards], precision))
+        estimates: dict[str, int] = sketch.counts()
+        elapsed: float = time.perf_counter() - start
+        errors: np.ndarray = np.array(
+            [abs(estimates[word] - count) / count for word, count in exact.items() if count > 0]
+        )
+        top_error: float = float(np.mean([abs(estimates[word] - exact[word]) / exact[word] for word in top_words]))
+        same: bool = set(get_stop_words(corpus, approximate=True, precision=precision)) == exact_stop_words
+        print(f"{precision:>9} {sketch.nbytes():>12} {elapsed:>9.3f} {errors.mean():>9.2%} {errors.max():>8.2%} "
+              f"{top_error:>11.2%} {str(same):>15}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy of the neighbor counts estimated with HyperLogLog sketches.")
+    parser.add_argument("--corpus", default="tests/corpus_test", help="Folder of the text files.")
+    parser.add_argument("--precisions", type=int, nargs="+", default=DEFAULT_PRECISIONS, help="Precisions of the sketches.")
+    parser.add_argument("--shards", type=int, default=4, help="Number of shards sketched separately and merged.")
+    args = parser.parse_args()
+    run(args.corpus, args.precisions, args.shards)
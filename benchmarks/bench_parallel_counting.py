@@ -0,0 +1,62 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_tokens, synthetic_stop_words
+from src.ngram import create_n_grams
+from src.sharding import count_n_grams_parallel
+from src.text_processing import text_processing, StopWordSet
+
+##################################################################
+# Speedup of the parallel n-gram counting (count_n_grams_parallel) by number of worker processes
+# Run with: python -m benchmarks.bench_parallel_counting
+###################################################################
+
+DEFAULT_WORKERS: list[int] = [1, 2, 4, 8]
+
+# Function to write a synthetic corpus of several files
+def write_synthetic_corpus(directory: str, num_tokens: int, num_files: int) -> None:
+    """Write num_tokens synthetic tokens split in num_files files, 20 tokens per line."""
+    tokens: list[str] = synthetic_tokens(num_tokens)
+    per_file: int = -(-num_tokens // num_files)
+    for i in range(num_files):
+        part: list[str] = tokens[i * per_file:(i + 1) * per_file]
+        lines: list[str] = [" ".join(part[j:j + 20]) for j in range(0, len(part), 20)]
+        with open(os.path.join(directory, f"doc_{i:04d}.txt"), "w", encoding="utf-8") as file:
+            file.write("\n".join(lines))
+
+def run(num_tokens: int, num_files: int, workers: list[int]) -> None:
+    """
+    Time the serial count (text_processing + create_n_grams) and count_n_grams_parallel for each number of workers,
+    check that the frequencies are identical and print the speedup.
+    """
+    stop_words: StopWordSet = StopWordSet(synthetic_stop_words())
+    directory: str = tempfile.mkdtemp()
+    try:
+        write_synthetic_corpus(directory, num_tokens, num_files)
+
+        start: float = time.perf_counter()
+        serial = create_n_grams(text_processing(directory), stop_words).table
+        serial_time: float = time.perf_counter() - start
+        print(f"{num_tokens} tokens in {num_files} files, {len(serial)} n-grams, {os.cpu_count()} cores")
+        print(f"{'workers':>8} {'time (s)':>10} {'speedup':>8} {'identical':>10}")
+        print(f"{'serial':>8} {serial_time:>10.3f} {1.0:>8.2f} {'-':>10}")
+
+        for num_workers in workers:
+            start = time.perf_counter()
+            table = count_n_grams_parallel(directory, stop_words, num_workers)
+            elapsed: float = time.perf_counter() - start
+            identical: bool = table.words == serial.words and table.ids == serial.ids and table.frequencies == serial.frequencies
+            print(f"{num_workers:>8} {elapsed:>10.3f} {serial_time / elapsed:>8.2f} {str(identical):>10}")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speedup of count_n_grams_parallel by number of workers.")
+    parser.add_argument("--tokens", type=int, default=2_000_000, help="Size of the synthetic corpus in tokens.")
+    parser.add_argument("--files", type=int, default=64, help="Number of files of the synthetic corpus.")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS, help="Numbers of worker processes.")
+    args = parser.parse_args()
+    run(args.tokens, args.files, args.workers)
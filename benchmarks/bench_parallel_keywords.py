@@ -0,0 +1,58 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_parallel_counting import write_synthetic_corpus
+from benchmarks.synthetic import synthetic_stop_words
+from src.corpus_index import CorpusIndex
+from src.implicit_scoring import ProximityScorer, score_implicit_keywords
+from src.keywords import get_explicit_keywords, semantic_proximity
+from src.text_processing import StopWordSet
+
+##################################################################
+# Speedup of the scoring of the implicit keywords (step 3 of calculate_implicit_keywords) by number of processes
+# Run with: python -m benchmarks.bench_parallel_keywords
+###################################################################
+
+DEFAULT_WORKERS: list[int] = [1, 2, 4, 8]
+
+def run(num_tokens: int, num_files: int, workers: list[int]) -> None:
+    """
+    Build the proximity scores of a synthetic corpus once, then time score_implicit_keywords for each number of
+    workers (including the time to publish the scores to the workers) and check that the results are identical.
+    """
+    stop_words: StopWordSet = StopWordSet(synthetic_stop_words())
+    directory: str = tempfile.mkdtemp()
+    try:
+        write_synthetic_corpus(directory, num_tokens, num_files)
+        # Frequent word pairs play the role of the relevant expressions
+        relevant_expressions: list[str] = [f"w{i} w{i + 1}" for i in range(50, 150)]
+        explicit_keywords: dict = get_explicit_keywords(directory, relevant_expressions, 10, stop_words)
+        index: CorpusIndex = CorpusIndex.from_corpus(directory, relevant_expressions, lowercase=True)
+        all_terms: list[str] = sorted(index.unigrams.union(relevant_expressions))
+        targets: set = {term for keywords in explicit_keywords.values() for term in keywords}
+        scorer = ProximityScorer.from_index(index, all_terms, semantic_proximity(index, all_terms, targets), stop_words)
+
+        print(f"{num_tokens} tokens in {num_files} documents, {len(all_terms)} terms, {os.cpu_count()} cores")
+        print(f"{'workers':>8} {'time (s)':>10} {'speedup':>8} {'identical':>10}")
+        serial = None
+        serial_time: float = 0.0
+        for num_workers in workers:
+            start: float = time.perf_counter()
+            result: dict = score_implicit_keywords(scorer, explicit_keywords, 10, num_workers)
+            elapsed: float = time.perf_counter() - start
+            if serial is None:
+                serial, serial_time = result, elapsed
+            print(f"{num_workers:>8} {elapsed:>10.3f} {serial_time / elapsed:>8.2f} {str(result == serial):>10}")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speedup of the scoring of the implicit keywords by number of processes.")
+    parser.add_argument("--tokens", type=int, default=500_000, help="Size of the synthetic corpus in tokens.")
+    parser.add_argument("--files", type=int, default=2000, help="Number of documents of the synthetic corpus.")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS, help="Numbers of worker processes.")
+    args = parser.parse_args()
+    run(args.tokens, args.files, args.workers)
@@ -0,0 +1,49 @@
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_tokens, synthetic_stop_words
+from src.ngram import create_n_grams, create_n_grams_prefiltered
+from src.text_processing import StopWordSet
+from src.utils import calculate_and_store_glue, local_maxs
+
+##################################################################
+# Memory of the n-gram counting with and without the count-min sketch prefilter (create_n_grams_prefiltered)
+# Run with: python -m benchmarks.bench_prefilter
+###################################################################
+
+DEFAULT_SIZES: list[int] = [30_000, 100_000, 300_000]
+
+def extract(build_n_grams, tokens: list[str], stop_words: StopWordSet) -> tuple[int, list[str], float, int]:
+    """Count the n-grams and find the relevant expressions; return the rows, the expressions, the time and the peak memory."""
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    ngram_dict = build_n_grams(tokens, stop_words)
+    calculate_and_store_glue(ngram_dict, "dice", stop_words)
+    _, relevant_expressions = local_maxs(ngram_dict)
+    elapsed: float = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(ngram_dict), relevant_expressions, elapsed, peak
+
+def run(sizes: list[int]) -> None:
+    """
+    Extract the relevant expressions of synthetic corpora of increasing size with every n-gram and with the
+    prefiltered n-grams, and print the number of rows, the time, the peak memory (tracemalloc, the tokens excluded)
+    and whether the relevant expressions are identical.
+    """
+    stop_words: StopWordSet = StopWordSet(synthetic_stop_words())
+    print(f"{'tokens':>10} {'rows':>10} {'kept rows':>10} {'time (s)':>9} {'prefilter (s)':>13} {'peak (MB)':>10} "
+          f"{'prefilter (MB)':>14} {'ratio':>6} {'identical':>10}")
+    for size in sizes:
+        tokens: list[str] = synthetic_tokens(size)
+        rows, expected, full_time, full_peak = extract(create_n_grams, tokens, stop_words)
+        kept, found, prefilter_time, prefilter_peak = extract(create_n_grams_prefiltered, tokens, stop_words)
+        print(f"{size:>10} {rows:>10} {kept:>10} {full_time:>9.2f} {prefilter_time:>13.2f} {full_peak / 1e6:>10.1f} "
+              f"{prefilter_peak / 1e6:>14.1f} {full_peak / prefilter_peak:>6.1f} {str(found == expected):>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory of the n-gram counting with and without the count-min prefilter.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Sizes of the synthetic corpora in tokens.")
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_tokens, synthetic_stop_words
+from src.ngram import create_n_grams
+from src.ngram_table import PruningReport
+from src.text_processing import StopWordSet
+from src.utils import calculate_and_store_glue, local_maxs
+
+##################################################################
+# Time saved by the frequency pruning of calculate_and_store_glue (extractor(path, min_frequency=...))
+# Run with: python -m benchmarks.bench_pruning
+###################################################################
+
+DEFAULT_SIZES: list[int] = [30_000, 100_000, 300_000, 1_000_000]
+
+def run(sizes: list[int], min_frequency: int, glue_function: str = "dice") -> None:
+    """
+    Time calculate_and_store_glue and local_maxs on synthetic corpora without and with pruning, and print the
+    number of n-grams pruned at each stage, the time saved and whether the relevant expressions are identical.
+    """
+    stop_words: StopWordSet = StopWordSet(synthetic_stop_words())
+    print(f"{'tokens':>10} {'n-grams':>10} {'candidates':>10} {'max(n+1)':>9} {'no glue':>10} {'full (s)':>9} "
+          f"{'pruned (s)':>10} {'saved (s)':>9} {'identical':>10}")
+    for size in sizes:
+        tokens: list[str] = synthetic_tokens(size)
+        ngram_dict = create_n_grams(tokens, stop_words)
+        start: float = time.perf_counter()
+        calculate_and_store_glue(ngram_dict, glue_function, stop_words)
+        _, expected = local_maxs(ngram_dict)
+        full_time: float = time.perf_counter() - start
+
+        ngram_dict = create_n_grams(tokens, stop_words)
+        start = time.perf_counter()
+        calculate_and_store_glue(ngram_dict, glue_function, stop_words, min_frequency)
+        _, found = local_maxs(ngram_dict)
+        pruned_time: float = time.perf_counter() - start
+        report: PruningReport = ngram_dict.table.pruning_report
+        print(f"{size:>10} {report.num_rows:>10} {report.num_candidates:>10} {report.num_linked - report.num_candidates:>9} "
+              f"{report.pruned_glue:>10} {full_time:>9.3f} {pruned_time:>10.3f} {full_time - pruned_time:>9.3f} "
+              f"{str(found == expected):>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time saved by the frequency pruning of the glue computation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Sizes of the synthetic corpora in tokens.")
+    parser.add_argument("--min-frequency", type=int, default=3, help="Minimum frequency of the LocalMaxs candidates.")
+    parser.add_argument("--glue", default="dice", choices=["dice", "scp", "mi"], help="Glue function.")
+    args = parser.parse_args()
+    run(args.sizes, args.min_frequency, args.glue)
@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from src.text_processing import read_text_files, add_spaces, tokenize_text, tokenize
+
+##################################################################
+# Throughput of the tokenizers: add_spaces + tokenize_text (six regex passes) against tokenize (one pass)
+# Run with: python -m benchmarks.bench_tokenizer
+###################################################################
+
+def throughput(function, texts: list[str], repeat: int) -> float:
+    """Return the throughput of a tokenizer in MB/s (UTF-8 bytes), best of repeat runs."""
+    size: int = sum(len(text.encode("utf-8")) for text in texts)
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        for text in texts:
+            function(text)
+        best = min(best, time.perf_counter() - start)
+    return size / best / 1e6
+
+def run(corpus_path: str, repeat: int) -> None:
+    """Print the throughput of both tokenizers on a corpus and check that they give the same tokens."""
+    texts: list[str] = list(read_text_files(corpus_path).values())
+    assert all(tokenize(text) == tokenize_text(add_spaces(text)) for text in texts), "The tokenizers differ."
+    chained: float = throughput(lambda text: tokenize_text(add_spaces(text)), texts, repeat)
+    single: float = throughput(tokenize, texts, repeat)
+    print(f"{'tokenizer':>28} {'MB/s':>8}")
+    print(f"{'add_spaces + tokenize_text':>28} {chained:>8.2f}")
+    print(f"{'tokenize':>28} {single:>8.2f}")
+    print(f"speedup: {single / chained:.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of add_spaces + tokenize_text against tokenize.")
+    parser.add_argument("--corpus", default="tests/corpus_test", help="Path to the corpus.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs (the best one is kept).")
+    args = parser.parse_args()
+    run(args.corpus, args.repeat)
@@ -0,0 +1,29 @@
+import random
+
+##################################################################
+# Synthetic corpora used by the benchmarks
+###################################################################
+
+# Function to generate a list of tokens following a Zipf distribution
+def synthetic_tokens(num_tokens: int, vocabulary_size: int = 5000, seed: int = 0) -> list[str]:
+    """
+    Generate a synthetic list of tokens whose frequencies follow a Zipf law, like a natural language corpus.
+    Parameters:
+        num_tokens (int): Number of tokens to generate.
+        vocabulary_size (int): Number of distinct words.
+        seed (int): Seed of the random generator, so that every run uses the same corpus.
+    Returns: list[str]: The generated tokens, the most frequent word being "w0".
+    """
+    rng = random.Random(seed)
+    words: list[str] = [f"w{rank}" for rank in range(vocabulary_size)]
+    weights: list[float] = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    return rng.choices(words, weights=weights, k=num_tokens)
+
+# Function to return the stop words of a synthetic corpus
+def synthetic_stop_words(num_stop_words: int = 50) -> list[str]:
+    """
+    The most frequent words of the synthetic corpus play the role of the stop words.
+    Parameters: num_stop_words (int): Number of stop words.
+    Returns: list[str]: The stop words.
+    """
+    return [f"w{rank}" for rank in range(num_stop_words)]
@@ -1,11 +1,17 @@
-from src.text_processing import text_processing,read_text_files, add_spaces, tokenize_text
+from src.text_processing import text_processing,read_text_files, add_spaces, tokenize_text, StopWordSet, iter_text_blocks, iter_token_chunks
 from src.ngram import *
 from src.stopwords import get_stop_words, get_nltk_stopwords_in_corpus
-from src.utils import calculate_and_store_glue,extract_random_relevant_expressions, ask_is_RE
+from src.utils import calculate_and_store_glue, local_maxs, extract_random_relevant_expressions, ask_is_RE
 from src.evaluation_metrics import precision,recall,f1_score
 from src.keywords import get_explicit_keywords, calculate_implicit_keywords
-
-def extractor(path:str) -> dict[str:n_gram]:
+from src.cache import CorpusCache
+from src.corpus import Corpus
+from src.ngram_table import PruningReport
+from src.profiling import Profiler, NULL_PROFILER
+import argparse
+
+def extractor(path:str | Corpus, streaming:bool = False, workers:int = 1, cache_dir:str = None, prefilter:bool = False,
+              min_frequency:int = None, profiler:Profiler = NULL_PROFILER) -> dict[str:n_gram]:
     """ 
     Extracts n-grams and identifies relevant expressions from a text corpus.
     This function performs the following steps:
@@ -15,33 +21,91 @@ def extractor(path:str) -> dict[str:n_gram]:
         4. Calculates and stores "glue" values for each n-gram using the Dice coefficient.
         5. Applies the localMax algorithm to each n-gram to identify relevant expressions.
     Args:
-        path (str): Path to the text corpus or file.
+        path (str | Corpus): Path to the text corpus or file, or a Corpus already loaded (its tokens and stop words are used).
+        streaming (bool): Read the corpus one block at a time instead of loading it in memory (same result).
+        workers (int): Number of processes counting the n-grams; more than 1 counts shards of files in parallel (same result).
+        cache_dir (str): Directory caching the tokens and n-gram counts of each file: only the new or changed files are processed (same result).
+        prefilter (bool): Count the n-grams in several passes, estimating their frequencies with a count-min sketch first, and only create the ones that
+            LocalMaxs needs (same relevant expressions, a fraction of the n-grams in memory). Needs the tokens in memory (no streaming, workers or cache).
+        min_frequency (int): Skip the glue and the max glues of the n-grams less frequent than this, which cannot be relevant expressions
+            (3 is the frequency > 2 rule of localMax: same relevant expressions). What was pruned is in ngram_dict.table.pruning_report.
+        profiler (Profiler): Records the time, memory and item counts of each stage (tokenization, stop words, create_n_grams,
+            calculate_and_store_glue, localMax); the default records nothing.
     Returns:
         dict[str, n_gram]: A dictionary mapping each n-gram string to its corresponding n_gram object, with relevance and statistical metrics computed.
     """
-    # Preprocessing
-    tokens:list[str] = text_processing(path)
-    #print(tokens)
-
-    # Stopwords
-    #######################################################################################
-    # Still using the python library due to the need of imporvement in our algorithm
-    #######################################################################################
-    stop_words:list[str] = get_nltk_stopwords_in_corpus(read_text_files(path))
-    #print(stop_words)
-
-    # Building n-grams
-    ngram_dict:dict[str:n_gram] = create_n_grams(tokens,stop_words)
-    #print(ngram_dict)
+    if prefilter and (streaming or workers > 1 or cache_dir is not None):
+        raise ValueError("prefilter counts the tokens in memory: it cannot be combined with streaming, workers or cache_dir.")
+    build_n_grams = create_n_grams_prefiltered if prefilter else create_n_grams
+
+    if isinstance(path, Corpus):
+        # The corpus was read, tokenized and its stop words found once, for every stage
+        with profiler.stage("stop words") as stage:
+            stop_words:StopWordSet = path.stop_words
+            stage.count(stop_words=len(stop_words))
+        with profiler.stage("create_n_grams") as stage:
+            tokens:list[str] = path.tokens()
+            ngram_dict:dict[str:n_gram] = build_n_grams(tokens, stop_words)
+            stage.count(tokens=len(tokens), n_grams=len(ngram_dict))
+    elif cache_dir is not None:
+        # The counts of the unchanged files and their stop words come from the cache
+        with profiler.stage("create_n_grams") as stage:
+            ngram_dict:dict[str:n_gram] = NGramDict(CorpusCache(cache_dir, get_nltk_stopwords_in_corpus).count_n_grams(path))
+            stop_words:StopWordSet = ngram_dict.table.stop_words
+            stage.count(n_grams=len(ngram_dict))
+    elif workers > 1:
+        # The stop words are streamed, then the shards of the corpus are counted by the worker processes
+        with profiler.stage("stop words") as stage:
+            stop_words:StopWordSet = get_nltk_stopwords_in_corpus(block for _, block in iter_text_blocks(path))
+            stage.count(stop_words=len(stop_words))
+        with profiler.stage("create_n_grams") as stage:
+            ngram_dict:dict[str:n_gram] = create_n_grams_parallel(path, stop_words, workers)
+            stage.count(n_grams=len(ngram_dict))
+    elif streaming:
+        # Two passes over the corpus, one block in memory at a time: the stop words, then the n-grams
+        with profiler.stage("stop words") as stage:
+            stop_words:StopWordSet = get_nltk_stopwords_in_corpus(block for _, block in iter_text_blocks(path))
+            stage.count(stop_words=len(stop_words))
+        with profiler.stage("create_n_grams") as stage:
+            ngram_dict:dict[str:n_gram] = create_n_grams_streaming(iter_token_chunks(path), stop_words)
+            stage.count(n_grams=len(ngram_dict))
+    else:
+        # Preprocessing: each file is read and tokenized once
+        with profiler.stage("tokenization") as stage:
+            corpus:Corpus = Corpus.from_path(path, get_nltk_stopwords_in_corpus)
+            tokens:list[str] = corpus.tokens()
+            stage.count(documents=len(corpus.texts), tokens=len(tokens))
+        #print(tokens)
+
+        # Stopwords
+        #######################################################################################
+        # Still using the python library due to the need of imporvement in our algorithm
+        #######################################################################################
+        with profiler.stage("stop words") as stage:
+            stop_words:StopWordSet = corpus.stop_words
+            stage.count(stop_words=len(stop_words))
+        #print(stop_words)
+
+        # Building n-grams
+        with profiler.stage("create_n_grams") as stage:
+            ngram_dict:dict[str:n_gram] = build_n_grams(tokens,stop_words)
+            stage.count(tokens=len(tokens), n_grams=len(ngram_dict))
+        #print(ngram_dict)
 
     # Glue values updated in each n-gram
-    ngram_dict:dict[str:n_gram] = calculate_and_store_glue(ngram_dict, "dice", stop_words)
+    with profiler.stage("calculate_and_store_glue") as stage:
+        ngram_dict:dict[str:n_gram] = calculate_and_store_glue(ngram_dict, "dice", stop_words, min_frequency)
+        stage.count(n_grams=len(ngram_dict))
+        report:PruningReport = ngram_dict.table.pruning_report
+        if report is not None:
+            stage.count(candidates=report.num_candidates, pruned_by_frequency=report.pruned_by_frequency, pruned_glue=report.pruned_glue)
     #print(ngram_dict)
 
     # Calculate Relevant Expressions
-    for n_gram in ngram_dict.values():
-        n_gram.localMax()
-    
+    with profiler.stage("localMax") as stage:
+        _, relevant_expressions = local_maxs(ngram_dict)
+        stage.count(n_grams=len(ngram_dict), relevant_expressions=len(relevant_expressions))
+
     return ngram_dict
 
 
@@ -88,27 +152,60 @@ def evaluation(relevant_expressions:list[str]) -> None:
 
 
 
-def main() -> None:    
+def main(profiler:Profiler = NULL_PROFILER, min_frequency:int = None) -> None:
+    """
+    Extract the relevant expressions of the test corpus, evaluate them, then extract its explicit and implicit keywords.
+    Parameters:
+        profiler (Profiler): Records the time, memory and item counts of each stage; the default records nothing.
+        min_frequency (int): Skip the glue of the n-grams less frequent than this (see extractor) and print what was
+            pruned; no pruning by default.
+    """
 
     corpus_path:str = "./tests/corpus_test" 
+    # The corpus is read and tokenized once, and its stop words found once, for both parts
+    with profiler.stage("tokenization") as stage:
+        corpus:Corpus = Corpus.from_path(corpus_path, get_nltk_stopwords_in_corpus)
+        stage.count(documents=len(corpus.texts), tokens=sum(len(tokens) for tokens in corpus.doc_tokens.values()))
 
     ## Part1: extracting Relevant Expressions
 
-    total_list:dict[str:n_gram] = extractor(corpus_path)
+    total_list:dict[str:n_gram] = extractor(corpus, min_frequency=min_frequency, profiler=profiler)
+    if min_frequency is not None:
+        print(total_list.table.pruning_report)
     relevant_expressions:list[str] = extract_random_relevant_expressions(total_list)
     evaluation(relevant_expressions)
 
 
     ## Part2: extracting Keywords
 
-    # Calculate stop words
-    stop_words:list[str] = get_nltk_stopwords_in_corpus(read_text_files(corpus_path))
+    # Stop words of the corpus, already computed by the extractor
+    stop_words:StopWordSet = corpus.stop_words
     # Compute explicit keywords
-    explicit_keywords: dict[str, list[str]] = get_explicit_keywords(corpus_path, relevant_expressions, 10, stop_words)
+    with profiler.stage("explicit keywords"):
+        explicit_keywords: dict[str, list[str]] = get_explicit_keywords(corpus, relevant_expressions, 10, stop_words, profiler)
     print("The explicit keywords of this corpus are:", explicit_keywords)
     #Compute implicit keywords
-    implicit_keywords: dict[str, list[str]] = calculate_implicit_keywords(corpus_path, explicit_keywords, relevant_expressions, 10, stop_words)
+    with profiler.stage("implicit keywords"):
+        implicit_keywords: dict[str, list[str]] = calculate_implicit_keywords(corpus, explicit_keywords, relevant_expressions, 10, stop_words,
+                                                                              profiler=profiler)
     print("The implicit keywords of this corpus are:", implicit_keywords)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Extract the relevant expressions and the keywords of the test corpus.")
+    parser.add_argument("--min-frequency", type=int, default=None,
+                        help="Skip the glue of the n-grams less frequent than this (3 keeps the same relevant expressions).")
+    parser.add_argument("--profile", action="store_true", help="Print the time, memory and item counts of each stage.")
+    parser.add_argument("--profile-json", default=None, help="Also write the report of the stages in this JSON file.")
+    parser.add_argument("--cprofile", action="store_true", help="Profile each stage with cProfile (in the report).")
+    parser.add_argument("--tracemalloc", action="store_true", help="Trace the Python allocations of each stage (in the report).")
+    args = parser.parse_args()
+    profiling:bool = args.profile or args.profile_json is not None or args.cprofile or args.tracemalloc
+    profiler:Profiler = Profiler(cprofile=args.cprofile, tracemalloc=args.tracemalloc) if profiling else NULL_PROFILER
+    main(profiler, args.min_frequency)
+    if profiling:
+        print(profiler.format_table())
+        for stats in profiler.stages:
+            if stats.cprofile is not None:
+                print(f"\ncProfile of {stats.name}:\n{stats.cprofile}")
+        if args.profile_json is not None:
+            profiler.save_json(args.profile_json)
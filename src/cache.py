@@ -0,0 +1,157 @@
+import hashlib
+import os
+from typing import Callable
+import numpy as np
+from src.ngram_table import NGramTable, NGramCounts, MAX_N_GRAM_SIZE, count_n_gram_keys
+from src.text_processing import StopWordSet, as_stop_word_set, list_text_files, tokenize
+
+##################################################################
+# On-disk cache of the tokens and n-gram counts of the files of a corpus
+###################################################################
+
+# Version of the tokenizer and of the format of the cache: changing it invalidates every cached file
+CACHE_VERSION: str = f"tokenize-1/ngrams-{MAX_N_GRAM_SIZE}/format-2"
+
+class FileRecord:
+    """
+    What is cached for one file: its vocabulary, its tokens (as ids of that vocabulary), the counts of the n-grams
+    starting before its last MAX_N_GRAM_SIZE - 1 tokens (without any stop word filtering, so that they do not depend
+    on the rest of the corpus) and the stop words found in the file. The n-grams starting in the last tokens can
+    continue in the next files: CorpusCache.count_n_grams counts them from the cached tokens.
+    """
+
+    def __init__(self, words: list[str], token_ids: np.ndarray, counts: NGramCounts, stop_words: list[str]) -> None:
+        self.words: list[str] = words
+        self.token_ids: np.ndarray = token_ids
+        self.counts: NGramCounts = counts
+        self.stop_words: list[str] = stop_words
+
+    @classmethod
+    def from_text(cls, text: str, stop_words: list[str] = ()) -> "FileRecord":
+        """Tokenize a text and count its n-grams."""
+        table = NGramTable()
+        ids: list[int] = table.encode(tokenize(text))
+        num_starts: int = max(0, len(ids) - (MAX_N_GRAM_SIZE - 1))
+        counts = NGramCounts.from_keys(table.words, count_n_gram_keys(ids, table.is_stop, MAX_N_GRAM_SIZE, num_starts))
+        return cls(table.words, np.array(ids, dtype=np.uint32), counts, sorted(stop_words))
+
+    def tokens(self, start: int = 0, end: int = None) -> list[str]:
+        """Return the tokens of the file between two positions."""
+        return [self.words[word_id] for word_id in self.token_ids[start:end].tolist()]
+
+    def save(self, path: str) -> None:
+        """Write the record in a NumPy .npz file (no pickle); the file is replaced atomically."""
+        temporary_path: str = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(
+                file,
+                words=_join(self.words),
+                token_ids=self.token_ids,
+                ids=self.counts.ids,
+                lengths=self.counts.lengths,
+                frequencies=self.counts.frequencies,
+                stop_words=_join(self.stop_words),
+            )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FileRecord":
+        """Read a record written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            words: list[str] = _split(data["words"])
+            counts = NGramCounts(words, data["ids"], data["lengths"], data["frequencies"])
+            return cls(words, data["token_ids"], counts, _split(data["stop_words"]))
+
+# Functions to store a list of tokens in a NumPy array: the tokens never contain whitespace
+def _join(words: list[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(words).encode("utf-8"), dtype=np.uint8)
+
+def _split(data: np.ndarray) -> list[str]:
+    return data.tobytes().decode("utf-8").split("\n") if len(data) else []
+
+class CorpusCache:
+    """
+    Directory of FileRecords keyed by a hash of the content of the file, of CACHE_VERSION and of the stop-word
+    function and its version: a file is only tokenized and counted again when its content changes (renaming or
+    moving a file keeps its record).
+    """
+
+    def __init__(self, directory: str, stop_word_function: Callable[[dict], StopWordSet] = None) -> None:
+        """
+        Parameters:
+            directory (str): The cache directory (created if needed).
+            stop_word_function (Callable): The function finding the stop words of a corpus {name: text}, applied
+                to each file (for example get_nltk_stopwords_in_corpus). The stop words of the corpus are the union
+                of the stop words of its files, so this must be a function for which that holds. Its optional
+                version attribute (for example a hash of its stop-word list) is part of the keys.
+        """
+        self.directory: str = directory
+        self.stop_word_function: Callable[[dict], StopWordSet] = stop_word_function
+        self.hits: int = 0
+        self.misses: int = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, content: bytes) -> str:
+        """Return the key of the content of a file."""
+        version: str = CACHE_VERSION
+        if self.stop_word_function is not None:
+            version += f"/{self.stop_word_function.__module__}.{self.stop_word_function.__name__}"
+            version += f"/{getattr(self.stop_word_function, 'version', '')}"
+        digest = hashlib.sha256(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def get(self, file_path: str) -> FileRecord:
+        """Return the record of a file, from the cache if its content has not changed."""
+        with open(file_path, "rb") as file:
+            content: bytes = file.read()
+        path: str = os.path.join(self.directory, self.key(content) + ".npz")
+        if os.path.exists(path):
+            self.hits += 1
+            return FileRecord.load(path)
+        self.misses += 1
+        # Same text as read_text_files (universal newlines)
+        text: str = content.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        stop_words = self.stop_word_function({os.path.basename(file_path): text}) if self.stop_word_function else ()
+        record = FileRecord.from_text(text, stop_words)
+        record.save(path)
+        return record
+
+    def count_n_grams(self, corpus_path: str, stop_words: StopWordSet = None,
+                      max_size: int = MAX_N_GRAM_SIZE) -> NGramTable:
+        """
+        Count the n-grams of the files of a corpus (sorted by name, as text_processing reads them) from their records.
+        The n-grams starting before the last max_size - 1 tokens of each file come from the cache, only the n-grams
+        starting in these last tokens (which can cross the boundaries between files) are counted again, from the
+        cached tokens. The counts of the files and of their last tokens are merged in reading order, so the n-grams,
+        their frequencies and their order are the same as create_n_grams(text_processing(...)).
+        Parameters:
+            corpus_path (str): Path to the folder containing the text files.
+            stop_words (StopWordSet): The stop words (the union of the stop words of the records if None).
+            max_size (int): The size of the longest n-grams.
+        Returns: NGramTable: The n-grams of the corpus.
+        """
+        records: list[FileRecord] = [self.get(os.path.join(corpus_path, filename)) for filename in list_text_files(corpus_path)]
+        if stop_words is None:
+            stop_words = StopWordSet(word for record in records for word in record.stop_words)
+        stop_words = as_stop_word_set(stop_words)
+
+        # N-grams starting in the last max_size-1 tokens of each file, followed by the next max_size-1 tokens of the corpus
+        # (maybe in several files), counted after the n-grams of the file and before the ones of the next file
+        overlap: int = max_size - 1
+        counts: list[NGramCounts] = [NGramCounts.from_table(NGramTable(max_size))]
+        for position, record in enumerate(records):
+            counts.append(record.counts)
+            tail: list[str] = record.tokens(max(0, len(record.token_ids) - overlap))
+            following_tokens: list[str] = []
+            for following in records[position + 1:]:
+                if len(following_tokens) >= overlap:
+                    break
+                following_tokens += following.tokens(0, overlap - len(following_tokens))
+            segment = NGramTable(max_size)
+            ids: list[int] = segment.encode(tail + following_tokens)
+            counts.append(NGramCounts.from_keys(segment.words, count_n_gram_keys(ids, segment.is_stop, max_size, len(tail)), max_size))
+
+        counts = [count.without_stop_words(stop_words) for count in counts]
+        return NGramCounts.merge_all(counts).to_table(stop_words)
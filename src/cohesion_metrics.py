@@ -1,5 +1,6 @@
 ## Function to compute SCP cohesion score for an n-gram
 from math import log2
+import numpy as np
 
 
 def scp_glue(ngram, all_n_grams, total_count: int) -> float:
@@ -16,12 +17,7 @@ def scp_glue(ngram, all_n_grams, total_count: int) -> float:
     freq_left = all_n_grams[left].get_frequency() if left in all_n_grams else 1
     freq_right = all_n_grams[right].get_frequency() if right in all_n_grams else 1
 
-    prob_full = freq_full / total_count
-    prob_left = freq_left / total_count
-    prob_right = freq_right / total_count
-
-    scp = (prob_full ** 2) / (prob_left * prob_right) if prob_left * prob_right > 0 else 0.0
-    return scp
+    return scp_from_frequencies(freq_full, freq_left, freq_right, total_count)
 
 ## Function to compute Dice coefficient for an n-gram
 def dice_glue(ngram, all_n_grams) -> float:
@@ -38,9 +34,7 @@ def dice_glue(ngram, all_n_grams) -> float:
     freq_left = all_n_grams[left].get_frequency() if left in all_n_grams else 1
     freq_right = all_n_grams[right].get_frequency() if right in all_n_grams else 1
 
-    denominator = freq_left + freq_right
-    dice = (2 * freq_full) / denominator if denominator > 0 else 0.0
-    return dice
+    return dice_from_frequencies(freq_full, freq_left, freq_right)
 
 ## Function to compute Mutual Information for an n-gram
 def mi_glue(ngram, all_n_grams, total_count: int) -> float:
@@ -57,6 +51,23 @@ def mi_glue(ngram, all_n_grams, total_count: int) -> float:
     freq_left = all_n_grams[left].get_frequency() if left in all_n_grams else 1
     freq_right = all_n_grams[right].get_frequency() if right in all_n_grams else 1
 
+    return mi_from_frequencies(freq_full, freq_left, freq_right, total_count)
+
+## Same metrics computed from the frequencies of the n-gram and of its left and right (n-1)-grams
+def scp_from_frequencies(freq_full: int, freq_left: int, freq_right: int, total_count: int) -> float:
+    prob_full = freq_full / total_count
+    prob_left = freq_left / total_count
+    prob_right = freq_right / total_count
+
+    scp = (prob_full ** 2) / (prob_left * prob_right) if prob_left * prob_right > 0 else 0.0
+    return scp
+
+def dice_from_frequencies(freq_full: int, freq_left: int, freq_right: int) -> float:
+    denominator = freq_left + freq_right
+    dice = (2 * freq_full) / denominator if denominator > 0 else 0.0
+    return dice
+
+def mi_from_frequencies(freq_full: int, freq_left: int, freq_right: int, total_count: int) -> float:
     prob_full = freq_full / total_count
     prob_left = freq_left / total_count
     prob_right = freq_right / total_count
@@ -66,4 +77,46 @@ def mi_glue(ngram, all_n_grams, total_count: int) -> float:
         mi = log2(prob_full / denominator)
         return mi
     else:
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+## Batch engine: the three metrics for whole arrays of n-grams at once
+def batch_glues(freq_full: np.ndarray, freq_left: np.ndarray, freq_right: np.ndarray, total_count: int) -> dict[str, np.ndarray]:
+    """
+    Compute SCP, Dice and MI for arrays of n-grams in one shot with NumPy.
+    Parameters:
+        freq_full (np.ndarray): Frequencies of the n-grams.
+        freq_left (np.ndarray): Frequencies of their left (n-1)-grams (1 when the (n-1)-gram is unknown).
+        freq_right (np.ndarray): Frequencies of their right (n-1)-grams (1 when the (n-1)-gram is unknown).
+        total_count (int): Total count used to turn the frequencies into probabilities.
+    Returns: dict[str, np.ndarray]: The values of "scp", "dice" and "mi", with the same results as the functions above.
+    """
+    return {
+        "scp": batch_glue("scp", freq_full, freq_left, freq_right, total_count),
+        "dice": batch_glue("dice", freq_full, freq_left, freq_right, total_count),
+        "mi": batch_glue("mi", freq_full, freq_left, freq_right, total_count),
+    }
+
+def batch_glue(glue_function: str, freq_full: np.ndarray, freq_left: np.ndarray, freq_right: np.ndarray, total_count: int) -> np.ndarray:
+    """
+    Compute the glue chosen by its name ("scp", "dice" or "mi") for arrays of n-grams with NumPy.
+    An unknown glue function gives 0.0 for every n-gram.
+    """
+    freq_full = np.asarray(freq_full, dtype=np.float64)
+    freq_left = np.asarray(freq_left, dtype=np.float64)
+    freq_right = np.asarray(freq_right, dtype=np.float64)
+    glue = np.zeros(freq_full.shape, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if glue_function == "scp":
+            prob_full = freq_full / total_count
+            denominator = (freq_left / total_count) * (freq_right / total_count)
+            np.divide(prob_full ** 2, denominator, out=glue, where=denominator > 0)
+        elif glue_function == "dice":
+            denominator = freq_left + freq_right
+            np.divide(2 * freq_full, denominator, out=glue, where=denominator > 0)
+        elif glue_function == "mi":
+            prob_full = freq_full / total_count
+            denominator = (freq_left / total_count) * (freq_right / total_count)
+            valid = (denominator > 0) & (prob_full > 0)
+            np.log2(prob_full / denominator, out=glue, where=valid)
+    return glue
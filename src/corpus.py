@@ -0,0 +1,90 @@
+import os
+from typing import Callable
+from src.corpus_index import CorpusIndex
+from src.text_processing import StopWordSet, as_stop_word_set, list_text_files, tokenize
+
+##################################################################
+# Corpus loaded once and shared by every stage of the pipeline
+###################################################################
+
+class Corpus:
+    """
+    The documents of a corpus, read from disk once and tokenized once, shared by the extraction of the relevant
+    expressions and the explicit and implicit keyword stages instead of each stage reading the files again.
+
+    The tokens of the lowercased texts and the stop words are computed the first time they are needed and kept.
+    The documents are in the order of their names, the order in which text_processing reads the files.
+    """
+
+    def __init__(self, texts: dict[str, str], stop_word_function: Callable[[dict], StopWordSet] = None) -> None:
+        """
+        Parameters:
+            texts (dict[str, str]): The content of each document.
+            stop_word_function (Callable): The function finding the stop words of the texts
+                (for example get_nltk_stopwords_in_corpus); no stop words if None.
+        """
+        self.texts: dict[str, str] = {name: texts[name] for name in sorted(texts)}
+        self.stop_word_function: Callable[[dict], StopWordSet] = stop_word_function
+        self.doc_tokens: dict[str, list[str]] = {name: tokenize(text) for name, text in self.texts.items()}
+        self._lowercase_doc_tokens: dict[str, list[str]] = None
+        self._stop_words: StopWordSet = None
+
+    @classmethod
+    def from_path(cls, corpus_path: str, stop_word_function: Callable[[dict], StopWordSet] = None) -> "Corpus":
+        """
+        Read the text files of a corpus directory (one read of each file).
+        Parameters:
+            corpus_path (str): Path to the folder containing the text files.
+            stop_word_function (Callable): The function finding the stop words of the texts.
+        """
+        texts: dict[str, str] = {}
+        for filename in list_text_files(corpus_path):
+            with open(os.path.join(corpus_path, filename), "r", encoding="utf-8") as file:
+                texts[filename] = file.read()
+        return cls(texts, stop_word_function)
+
+    def documents(self) -> list[str]:
+        """Return the names of the documents."""
+        return list(self.texts)
+
+    def tokens(self) -> list[str]:
+        """Return the tokens of all the documents in reading order, the same as text_processing."""
+        return [token for tokens in self.doc_tokens.values() for token in tokens]
+
+    @property
+    def lowercase_doc_tokens(self) -> dict[str, list[str]]:
+        """The tokens of each lowercased text (tokenized on the first use)."""
+        if self._lowercase_doc_tokens is None:
+            self._lowercase_doc_tokens = {name: tokenize(text.lower()) for name, text in self.texts.items()}
+        return self._lowercase_doc_tokens
+
+    @property
+    def stop_words(self) -> StopWordSet:
+        """The stop words of the corpus (computed on the first use)."""
+        if self._stop_words is None:
+            found = self.stop_word_function(self.texts) if self.stop_word_function is not None else None
+            self._stop_words = as_stop_word_set(found)
+        return self._stop_words
+
+    def index(self, expressions: list[str] = (), lowercase: bool = False) -> CorpusIndex:
+        """
+        Return an index of the tokens of the corpus, as CorpusIndex.from_corpus would build it from the files.
+        Parameters:
+            expressions (list[str]): The multi-word expressions to index.
+            lowercase (bool): Whether the texts and the expressions are lowercased.
+        """
+        if lowercase:
+            return CorpusIndex(self.lowercase_doc_tokens, [expression.lower() for expression in expressions])
+        return CorpusIndex(self.doc_tokens, expressions)
+
+    def __repr__(self) -> str:
+        return f"Corpus({len(self.texts)} documents)"
+
+# Function to index a corpus given as a Corpus or as the path of its directory
+def index_corpus(corpus: str | Corpus, expressions: list[str] = (), lowercase: bool = False) -> CorpusIndex:
+    """
+    Return the index of a corpus: from the tokens of a Corpus already loaded, or read from the files of a directory.
+    """
+    if isinstance(corpus, Corpus):
+        return corpus.index(expressions, lowercase)
+    return CorpusIndex.from_corpus(corpus, expressions, lowercase)
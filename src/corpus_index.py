@@ -0,0 +1,119 @@
+from src.phrase_matcher import PhraseMatcher
+from src.text_processing import tokenize, list_text_files, iter_text_blocks, BLOCK_SIZE
+
+##################################################################
+# Inverted positional index of a corpus
+###################################################################
+
+class CorpusIndex:
+    """
+    Inverted index of a corpus, built once and used by the keyword extraction.
+
+    For every unigram and every relevant expression, the index stores the documents where it occurs and the
+    token positions of its occurrences in each document. The expressions are matched as whole-token phrases,
+    so "art" is never found inside "party". The term frequency (TF), document frequency (DF) and co-occurrence
+    of terms are answered from these postings without scanning the texts again.
+    """
+
+    def __init__(self, doc_tokens: dict[str, list[str]], expressions: list[str] = ()) -> None:
+        """
+        Parameters:
+            doc_tokens (dict[str, list[str]]): The tokens of each document.
+            expressions (list[str]): The multi-word expressions to index (tokens separated by a space).
+        """
+        self.doc_tokens: dict[str, list[str]] = doc_tokens
+        self.postings: dict[str, dict[str, list[int]]] = {}
+        self.unigrams: set[str] = set()
+        self.expressions: set[str] = set()
+
+        # Unigrams
+        for doc, tokens in doc_tokens.items():
+            for position, token in enumerate(tokens):
+                self.postings.setdefault(token, {}).setdefault(doc, []).append(position)
+        self.unigrams.update(self.postings)
+
+        # Expressions: all their occurrences are found in one pass over each document
+        self.add_expressions(expressions)
+
+    @classmethod
+    def from_texts(cls, texts: dict[str, str], expressions: list[str] = (), lowercase: bool = False) -> "CorpusIndex":
+        """
+        Build the index of raw texts, tokenized like the rest of the pipeline (tokenize).
+        Parameters:
+            texts (dict[str, str]): The content of each document.
+            expressions (list[str]): The multi-word expressions to index.
+            lowercase (bool): Whether the texts and the expressions are lowercased before indexing.
+        """
+        if lowercase:
+            texts = {doc: text.lower() for doc, text in texts.items()}
+            expressions = [expression.lower() for expression in expressions]
+        doc_tokens: dict[str, list[str]] = {doc: tokenize(text) for doc, text in texts.items()}
+        return cls(doc_tokens, expressions)
+
+    @classmethod
+    def from_corpus(cls, corpus_path: str, expressions: list[str] = (), lowercase: bool = False,
+                    block_size: int = BLOCK_SIZE) -> "CorpusIndex":
+        """
+        Build the index of the files of a corpus directory, read one block at a time (iter_text_blocks):
+        only the tokens of the documents are kept in memory, never their raw texts.
+        Parameters:
+            corpus_path (str): Path to the folder containing text files.
+            expressions (list[str]): The multi-word expressions to index.
+            lowercase (bool): Whether the texts and the expressions are lowercased before indexing.
+            block_size (int): Number of characters read at once.
+        """
+        if lowercase:
+            expressions = [expression.lower() for expression in expressions]
+        doc_tokens: dict[str, list[str]] = {doc: [] for doc in list_text_files(corpus_path)}
+        for doc, block in iter_text_blocks(corpus_path, block_size):
+            if lowercase:
+                block = block.lower()
+            doc_tokens[doc].extend(tokenize(block))
+        return cls(doc_tokens, expressions)
+
+    def add_expressions(self, expressions: list[str]) -> None:
+        """
+        Index the occurrences of many multi-word expressions at once: a PhraseMatcher of the expressions reads
+        each document once, instead of one search per expression.
+        """
+        new_expressions: list[str] = [expression for expression in dict.fromkeys(expressions) if expression not in self.postings]
+        for expression in new_expressions:
+            self.postings[expression] = {}
+            self.expressions.add(expression)
+        matcher = PhraseMatcher([expression for expression in new_expressions if len(expression.split()) > 1])
+        if not len(matcher):
+            return
+        postings: list[dict[str, list[int]]] = [self.postings[expression] for expression in matcher.expressions]
+        for doc, tokens in self.doc_tokens.items():
+            for position, expression_id in matcher.find_all(tokens):
+                postings[expression_id].setdefault(doc, []).append(position)
+
+    # Queries
+    def documents(self) -> list[str]:
+        """Return the names of the documents of the corpus."""
+        return list(self.doc_tokens)
+
+    def num_tokens(self, doc: str) -> int:
+        """Return the number of tokens of a document."""
+        return len(self.doc_tokens[doc])
+
+    def positions(self, term: str, doc: str) -> list[int]:
+        """Return the positions of the occurrences of a term in a document (position of its first token)."""
+        return self.postings.get(term, {}).get(doc, [])
+
+    def tf(self, term: str, doc: str) -> int:
+        """Return the number of occurrences of a term in a document."""
+        return len(self.positions(term, doc))
+
+    def df(self, term: str) -> int:
+        """Return the number of documents containing a term."""
+        return len(self.postings.get(term, {}))
+
+    def co_occurrence(self, term_a: str, term_b: str) -> list[str]:
+        """Return the documents containing both terms, in the order of the corpus."""
+        docs_a = self.postings.get(term_a, {})
+        docs_b = self.postings.get(term_b, {})
+        if len(docs_b) < len(docs_a):
+            docs_a, docs_b = docs_b, docs_a
+        common = {doc for doc in docs_a if doc in docs_b}
+        return [doc for doc in self.doc_tokens if doc in common]
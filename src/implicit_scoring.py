@@ -0,0 +1,203 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.corpus_index import CorpusIndex
+from src.ranking import top_k_indices
+from src.text_processing import StopWordSet, as_stop_word_set
+
+##################################################################
+# Scoring of the implicit keywords of the documents, serially or with a pool of processes
+###################################################################
+
+# Arrays of a ProximityScorer, written once in a directory and memory-mapped by the worker processes
+ARRAYS: list[str] = [
+    "term_data",            # The terms, UTF-8, separated by "\n" (a term never contains a newline)
+    "excluded",             # Terms that are never implicit keywords: stop words and terms of 2 characters or less
+    "lower_groups",         # Number of the lowercased term of each term
+    "term_ranks",           # Rank of each term in the sorted terms, to break the ties
+    "proximity_indptr",     # Semantic proximity of the pairs of terms, CSR term x term (symmetric)
+    "proximity_indices",
+    "proximity_data",
+    "presence_indptr",      # Terms occurring in each document, CSR document x term
+    "presence_indices",
+]
+
+class ProximityScorer:
+    """
+    The read-only data of step 3 of calculate_implicit_keywords, as flat NumPy arrays: the terms, the semantic
+    proximity of the pairs of terms (the dictionary of semantic_proximity as a sparse matrix of term ids) and the
+    terms occurring in each document. The scorer is published once with save() and opened by every worker with
+    load(), so the worker processes share the pages of the files instead of receiving a pickled copy.
+    """
+
+    def __init__(self, terms: list[str], documents: list[str], arrays: dict[str, np.ndarray]) -> None:
+        self.terms: list[str] = terms
+        self.documents: list[str] = documents
+        self.doc_ids: dict[str, int] = {doc: i for i, doc in enumerate(documents)}
+        self.term_ids: dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.arrays: dict[str, np.ndarray] = arrays
+        # Number of the lowercased term of each lowercase string
+        self.lower_group_ids: dict[str, int] = {}
+        for term, group in zip(terms, arrays["lower_groups"].tolist()):
+            self.lower_group_ids.setdefault(term.lower(), group)
+
+    @classmethod
+    def from_index(cls, index: CorpusIndex, all_terms: list[str], sem_prox: dict[tuple[str, str], float],
+                   stop_words: StopWordSet) -> "ProximityScorer":
+        """
+        Build the scorer of a (lowercased) index.
+        Parameters:
+            index (CorpusIndex): The lowercased index of the corpus.
+            all_terms (list[str]): The candidate terms, in the order they are scored.
+            sem_prox (dict[tuple[str, str], float]): The semantic proximity of the pairs, keyed by sorted pair.
+            stop_words (StopWordSet): Stopwords that cannot be implicit keywords.
+        """
+        stop_words = as_stop_word_set(stop_words)
+        term_ids: dict[str, int] = {term: i for i, term in enumerate(all_terms)}
+        num_terms: int = len(all_terms)
+        documents: list[str] = index.documents()
+        doc_ids: dict[str, int] = {doc: i for i, doc in enumerate(documents)}
+
+        lowers: list[str] = [term.lower() for term in all_terms]
+        groups: dict[str, int] = {}
+        lower_groups: np.ndarray = np.array([groups.setdefault(lower, len(groups)) for lower in lowers], dtype=np.int32)
+        excluded: np.ndarray = np.array([lower in stop_words or len(lower) <= 2 for lower in lowers], dtype=bool)
+        term_ranks: np.ndarray = np.empty(num_terms, dtype=np.int32)
+        term_ranks[sorted(range(num_terms), key=all_terms.__getitem__)] = np.arange(num_terms, dtype=np.int32)
+
+        # Both directions of every pair, sorted by row then column
+        rows: list[int] = []
+        cols: list[int] = []
+        values: list[float] = []
+        for (term_a, term_b), value in sem_prox.items():
+            a, b = term_ids[term_a], term_ids[term_b]
+            rows += [a, b]
+            cols += [b, a]
+            values += [value, value]
+        proximity_indptr, proximity_indices, proximity_data = _csr(rows, cols, values, num_terms)
+
+        # Terms occurring in each document (the index is lowercased)
+        rows, cols = [], []
+        for t, lower in enumerate(lowers):
+            for doc in index.postings.get(lower, {}):
+                rows.append(doc_ids[doc])
+                cols.append(t)
+        presence_indptr, presence_indices, _ = _csr(rows, cols, [], len(documents))
+
+        arrays: dict[str, np.ndarray] = {
+            "term_data": np.frombuffer("\n".join(all_terms).encode("utf-8"), dtype=np.uint8),
+            "excluded": excluded,
+            "lower_groups": lower_groups,
+            "term_ranks": term_ranks,
+            "proximity_indptr": proximity_indptr,
+            "proximity_indices": proximity_indices,
+            "proximity_data": proximity_data,
+            "presence_indptr": presence_indptr,
+            "presence_indices": presence_indices,
+        }
+        return cls(list(all_terms), documents, arrays)
+
+    def save(self, directory: str) -> None:
+        """Write the arrays in .npy files of a directory, and the names of the documents in documents.txt."""
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), self.arrays[name])
+        with open(os.path.join(directory, "documents.txt"), "w", encoding="utf-8") as file:
+            file.write("\n".join(self.documents))
+
+    @classmethod
+    def load(cls, directory: str) -> "ProximityScorer":
+        """Open a scorer written by save(), with its arrays memory-mapped (read-only)."""
+        arrays: dict[str, np.ndarray] = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in ARRAYS
+        }
+        term_data: bytes = arrays["term_data"].tobytes()
+        terms: list[str] = term_data.decode("utf-8").split("\n") if len(arrays["lower_groups"]) else []
+        with open(os.path.join(directory, "documents.txt"), encoding="utf-8") as file:
+            content: str = file.read()
+        documents: list[str] = content.split("\n") if len(arrays["presence_indptr"]) > 1 else []
+        return cls(terms, documents, arrays)
+
+    def implicit_keywords(self, fname: str, explicit: list[str], num_implicit: int) -> list[str]:
+        """
+        Return the implicit keywords of a document: the terms that are not explicit keywords, not stop words,
+        longer than 2 characters and absent from the document, with the best sum of their proximity to the explicit
+        keywords weighted by the inverse position of the keyword. Ties are broken by term.
+        The sums are accumulated in the order of the explicit keywords, as the dictionary version did.
+        """
+        arrays = self.arrays
+        num_terms: int = len(self.terms)
+        candidates: np.ndarray = ~np.asarray(arrays["excluded"])
+        explicit_groups: list[int] = [self.lower_group_ids[e.lower()] for e in explicit if e.lower() in self.lower_group_ids]
+        if explicit_groups:
+            candidates &= ~np.isin(arrays["lower_groups"], explicit_groups)
+        row: int = self.doc_ids.get(fname, -1)
+        if row >= 0:
+            indptr = arrays["presence_indptr"]
+            candidates[arrays["presence_indices"][indptr[row]:indptr[row + 1]]] = False
+
+        scores: np.ndarray = np.zeros(num_terms)
+        indptr = arrays["proximity_indptr"]
+        for i, exp in enumerate(explicit, 1):
+            t: int = self.term_ids.get(exp, -1)
+            if t < 0:
+                continue
+            start, end = indptr[t], indptr[t + 1]
+            scores[arrays["proximity_indices"][start:end]] += arrays["proximity_data"][start:end] / i
+
+        # Only the best num_implicit candidates are sorted (see top_k_indices)
+        candidate_ids: np.ndarray = np.flatnonzero(candidates)
+        best: np.ndarray = top_k_indices(scores[candidate_ids], arrays["term_ranks"][candidate_ids], num_implicit)
+        return [self.terms[t] for t in candidate_ids[best].tolist()]
+
+# Function to build a CSR matrix from its entries, keeping every entry
+def _csr(rows: list[int], cols: list[int], values: list[float], num_rows: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows_array: np.ndarray = np.array(rows, dtype=np.int64)
+    cols_array: np.ndarray = np.array(cols, dtype=np.int32)
+    order: np.ndarray = np.lexsort((cols_array, rows_array))
+    indptr: np.ndarray = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows_array, minlength=num_rows), out=indptr[1:])
+    data: np.ndarray = np.array(values, dtype=np.float64)[order] if values else np.zeros(0)
+    return indptr, cols_array[order], data
+
+# Scorer of a worker process, opened once by the initializer of the pool
+_worker_scorer: ProximityScorer = None
+
+def _open_scorer(directory: str) -> None:
+    global _worker_scorer
+    _worker_scorer = ProximityScorer.load(directory)
+
+def _score_chunk(chunk: list[tuple[str, list[str]]], num_implicit: int) -> list[list[str]]:
+    return [_worker_scorer.implicit_keywords(fname, explicit, num_implicit) for fname, explicit in chunk]
+
+# Function to score the implicit keywords of every document, serially or in parallel
+def score_implicit_keywords(scorer: ProximityScorer, explicit_keywords: dict[str, list[str]], num_implicit: int,
+                            workers: int = 1, chunk_size: int = None) -> dict[str, list[str]]:
+    """
+    Return the implicit keywords of every document. With more than one worker, the scorer is written once in a
+    temporary directory that every worker maps, and the documents are sent to the pool in chunks; the result is
+    the same as the serial one.
+    Parameters:
+        scorer (ProximityScorer): The data shared by all the documents.
+        explicit_keywords (dict[str, list[str]]): The explicit keywords of each document.
+        num_implicit (int): Number of implicit keywords per document.
+        workers (int): Number of worker processes (1: no pool).
+        chunk_size (int): Number of documents sent to a worker at once (by default, 4 chunks per worker).
+    Returns: dict[str, list[str]]: The implicit keywords of each document.
+    """
+    items: list[tuple[str, list[str]]] = list(explicit_keywords.items())
+    if workers <= 1 or len(items) <= 1:
+        return {fname: scorer.implicit_keywords(fname, explicit, num_implicit) for fname, explicit in items}
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(items) // (4 * workers)))
+    chunks: list[list[tuple[str, list[str]]]] = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    directory: str = tempfile.mkdtemp()
+    try:
+        scorer.save(directory)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_scorer, initargs=(directory,)) as executor:
+            selected: list[list[list[str]]] = list(executor.map(_score_chunk, chunks, [num_implicit] * len(chunks)))
+    finally:
+        shutil.rmtree(directory)
+    return {fname: keywords for chunk, result in zip(chunks, selected) for (fname, _), keywords in zip(chunk, result)}
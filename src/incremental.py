@@ -0,0 +1,265 @@
+from bisect import bisect_left, insort
+from typing import Iterable
+import numpy as np
+from src.cohesion_metrics import batch_glue
+from src.ngram_table import (NGramTable, NGramCounts, MAX_N_GRAM_SIZE, NO_ID, ID_BITS, unpack_key,
+                             count_n_gram_keys, count_boundary_n_gram_keys)
+from src.text_processing import StopWordSet, as_stop_word_set, tokenize
+
+##################################################################
+# Incremental extraction of the relevant expressions of a growing corpus
+###################################################################
+
+class IncrementalExtractor:
+    """
+    Keep the n-grams, glues and relevant expressions of a corpus up to date when documents are added or removed.
+
+    The corpus is the concatenation of its documents in the order of their names, like text_processing reads the
+    files of a folder, so the results are the same as create_n_grams -> calculate_and_store_glue -> local_maxs on
+    the whole corpus with the same stop words. Only the frequencies of the n-grams of the changed documents (and of
+    the n-grams crossing their boundaries) are updated. With the Dice glue, the glue is then only computed again
+    for the n-grams whose frequency or the frequency of one of their (n-1)-grams changed, and LocalMaxs only for
+    these n-grams and their (n-1)/(n+1)-grams. SCP and MI depend on the total number of n-grams, so with them
+    the glues of the whole table are computed again (without counting the corpus again).
+
+    An n-gram whose frequency drops to 0 keeps its row in the table, marked as dead (frequency 0); the dead rows
+    are dropped when the whole table is computed again.
+    """
+
+    def __init__(self, stop_words: StopWordSet, glue_function: str = "dice", p: float = 2,
+                 max_size: int = MAX_N_GRAM_SIZE) -> None:
+        """
+        Parameters:
+            stop_words (StopWordSet): The stop words, fixed for the life of the extractor.
+            glue_function (str): The glue function to use ("scp", "dice", "mi").
+            p (float): The exponent of the power mean of LocalMaxs.
+            max_size (int): The size of the longest n-grams.
+        """
+        self.stop_words: StopWordSet = as_stop_word_set(stop_words)
+        self.glue_function: str = glue_function
+        self.p: float = p
+        self.max_size: int = max_size
+        self.table: NGramTable = NGramTable(stop_words=self.stop_words)
+        # Token ids of each document, names in reading order, and the n-grams crossing the boundary before each document
+        self.documents: dict[str, list[int]] = {}
+        self.names: list[str] = []
+        self.boundary_counts: dict[str, dict[int, int]] = {}
+        # Rows of the n-grams having a row as left or right (n-1)-gram, built when first needed
+        self._parents: dict[int, list[int]] = None
+        # Number of n-grams whose glue was computed again by the last update
+        self.updated_rows: int = 0
+
+    # Documents
+    def add_documents(self, documents: dict[str, str]) -> None:
+        """
+        Add documents to the corpus (a document with the name of an existing one replaces it).
+        Parameters: documents (dict[str, str]): The name and text of each document.
+        """
+        delta: dict[int, int] = {}
+        if any(name in self.documents for name in documents):
+            self._remove(set(documents) & set(self.documents), delta)
+        table = self.table
+        for name, text in documents.items():
+            ids: list[int] = table.encode(tokenize(text))
+            self.documents[name] = ids
+            insort(self.names, name)
+            _add_counts(delta, count_n_gram_keys(ids, table.is_stop, self.max_size), 1)
+        # The new documents and the documents whose preceding tokens changed
+        for name in documents:
+            position: int = bisect_left(self.names, name)
+            self._update_boundaries(position, position + 1, delta)
+        self._apply(delta)
+
+    def remove_documents(self, names: Iterable[str]) -> None:
+        """
+        Remove documents from the corpus.
+        Parameters: names (Iterable[str]): The names of the documents (unknown names are ignored).
+        """
+        delta: dict[int, int] = {}
+        self._remove({name for name in names if name in self.documents}, delta)
+        self._apply(delta)
+
+    def _remove(self, names: set[str], delta: dict[int, int]) -> None:
+        """Remove documents and subtract their counts from delta."""
+        for name in names:
+            ids: list[int] = self.documents.pop(name)
+            self.names.pop(bisect_left(self.names, name))
+            _add_counts(delta, count_n_gram_keys(ids, self.table.is_stop, self.max_size), -1)
+            _add_counts(delta, self.boundary_counts.pop(name, {}), -1)
+        # The documents that followed a removed document
+        for name in names:
+            position: int = bisect_left(self.names, name)
+            self._update_boundaries(position, position, delta)
+
+    def _update_boundaries(self, position: int, first_following: int, delta: dict[int, int]) -> None:
+        """
+        Count again the n-grams crossing the boundary before the document at position, and before the following
+        documents that are close enough to see the change (less than max_size-1 tokens after first_following).
+        """
+        overlap: int = self.max_size - 1
+        num_tokens: int = 0
+        j: int = position
+        while j < len(self.names) and (j < first_following or num_tokens < overlap):
+            name: str = self.names[j]
+            _add_counts(delta, self.boundary_counts.get(name, {}), -1)
+            self.boundary_counts[name] = self._count_boundary(j)
+            _add_counts(delta, self.boundary_counts[name], 1)
+            if j >= first_following:
+                num_tokens += len(self.documents[name])
+            j += 1
+
+    def _count_boundary(self, position: int) -> dict[int, int]:
+        """Count the n-grams starting in the documents before position and ending in the document at position."""
+        overlap: int = self.max_size - 1
+        head: list[int] = self.documents[self.names[position]][:overlap]
+        carry: list[int] = []
+        k: int = position - 1
+        while k >= 0 and len(carry) < overlap:
+            carry = self.documents[self.names[k]][-overlap:] + carry
+            k -= 1
+        carry = carry[-overlap:]
+        if not carry or not head:
+            return {}
+        return count_boundary_n_gram_keys(carry + head, len(carry), self.table.is_stop, self.max_size)
+
+    # Results
+    def relevant_expressions(self) -> list[str]:
+        """Return the relevant expressions of the corpus."""
+        table = self.table
+        return [table.row_key(row) for row in range(len(table)) if table.relevant[row] and table.frequencies[row] > 0]
+
+    def frequency(self, expression: str) -> int:
+        """Return the frequency of an n-gram (0 if it does not occur in the corpus)."""
+        row: int = self.table.find_tokens(expression.split())
+        return 0 if row == NO_ID else self.table.frequencies[row]
+
+    # Updates
+    def _apply(self, delta: dict[int, int]) -> None:
+        """Apply the changes of frequencies, then compute the glues and LocalMaxs again where needed."""
+        table = self.table
+        changed: list[int] = []
+        new_keys: list[int] = []
+        for key, change in delta.items():
+            if change == 0:
+                continue
+            row = table.index.get(key)
+            if row is None:
+                ids = unpack_key(key)
+                row = table.append(ids, len(ids), 0, key)
+                new_keys.append(key)
+            table.frequencies[row] += change
+            changed.append(row)
+
+        if self.glue_function != "dice" or 4 * len(changed) > len(table) or len(table.left_rows) == 0:
+            self._recompute_all()
+            self.updated_rows = len(table)
+        else:
+            self._link_new_rows(new_keys)
+            self.updated_rows = self._recompute_local(changed)
+
+    def _recompute_all(self) -> None:
+        """Drop the dead rows, then compute the glues and LocalMaxs of the whole table."""
+        table = self.table
+        if any(frequency == 0 for frequency in table.frequencies):
+            counts = NGramCounts.from_table(table)
+            alive: np.ndarray = counts.frequencies > 0
+            counts = NGramCounts(counts.words, counts.ids[alive], counts.lengths[alive], counts.frequencies[alive])
+            table = counts.to_table(self.stop_words)
+            self.table = table
+        table.calculate_and_store_glue(self.glue_function, self.stop_words)
+        table.local_maxs(self.p)
+        self._parents = None
+
+    def _link_new_rows(self, new_keys: list[int]) -> None:
+        """Find the (n-1)-grams of the new rows, as link_children and calculate_and_store_glue do for the table."""
+        table = self.table
+        parents = self.parents()
+        is_stop = table.is_stop
+        for key in new_keys:
+            row: int = table.index[key]
+            length: int = table.lengths[row]
+            ids: tuple[int, ...] = table.row_ids(row)
+            left: int = table.index.get(key >> ID_BITS, NO_ID)
+            right: int = table.index.get(key & ((1 << (ID_BITS * (length - 1))) - 1), NO_ID)
+            has_children: bool = table.sizes[row] > 2 and length > 2
+            valid_left: bool = has_children and left != NO_ID and not is_stop[ids[0]] and not is_stop[ids[-2]]
+            valid_right: bool = has_children and right != NO_ID and not is_stop[ids[1]] and not is_stop[ids[-1]]
+            table.left_rows.append(left)
+            table.right_rows.append(right)
+            table.left_children.append(left if valid_left else NO_ID)
+            table.right_children.append(right if valid_right else NO_ID)
+            for child in {left, right}:
+                if child != NO_ID:
+                    parents.setdefault(child, []).append(row)
+        table._parents = None
+
+    def parents(self) -> dict[int, list[int]]:
+        """Return the rows of the n-grams having each row as left or right (n-1)-gram (valid for LocalMaxs or not)."""
+        if self._parents is None:
+            table = self.table
+            self._parents = {}
+            for row in range(len(table.left_rows)):
+                for child in {table.left_rows[row], table.right_rows[row]}:
+                    if child != NO_ID:
+                        self._parents.setdefault(child, []).append(row)
+        return self._parents
+
+    def _recompute_local(self, changed: list[int]) -> int:
+        """
+        Compute again the glue of the changed n-grams and of the n-grams having one of them as (n-1)-gram, then
+        the max glues and relevance of these n-grams and of their (n-1)/(n+1)-grams. Returns the number of glues computed.
+        """
+        table = self.table
+        parents = self.parents()
+        frequencies = table.frequencies
+
+        # Glues
+        glue_rows: set[int] = set(changed)
+        for row in changed:
+            glue_rows.update(parents.get(row, ()))
+        rows = np.fromiter(glue_rows, dtype=np.int64, count=len(glue_rows))
+        left = np.array([table.left_rows[row] for row in rows], dtype=np.int64)
+        right = np.array([table.right_rows[row] for row in rows], dtype=np.int64)
+        freq = np.array([frequencies[row] for row in rows], dtype=np.int64)
+        freq_left = np.array([frequencies[row] if row != NO_ID else 1 for row in left], dtype=np.int64)
+        freq_right = np.array([frequencies[row] if row != NO_ID else 1 for row in right], dtype=np.int64)
+        glue_values = batch_glue(self.glue_function, freq, freq_left, freq_right, len(table))
+        for row, glue in zip(rows.tolist(), glue_values.tolist()):
+            table.glues[row] = glue if frequencies[row] > 0 else 0.0
+
+        # Max glues of the (n-1)-grams and (n+1)-grams, only over the n-grams still in the corpus
+        max_rows: set[int] = set(glue_rows)
+        for row in glue_rows:
+            max_rows.update(child for child in (table.left_children[row], table.right_children[row]) if child != NO_ID)
+            max_rows.update(self._valid_parents(row))
+        max_rows_list: list[int] = sorted(max_rows)
+        for row in max_rows_list:
+            children = [table.glues[child] for child in (table.left_children[row], table.right_children[row])
+                        if child != NO_ID and frequencies[child] > 0]
+            plus_1 = [table.glues[parent] for parent in self._valid_parents(row) if frequencies[parent] > 0]
+            table.max_glues_minus_1[row] = max(children) if children else 0.0
+            table.max_glues_plus_1[row] = max(plus_1) if plus_1 else 0.0
+
+        # LocalMaxs, with the same formula as NGramTable.local_maxs
+        p: float = self.p
+        glues = np.array([table.glues[row] for row in max_rows_list], dtype=np.float64)
+        max_minus_1 = np.array([table.max_glues_minus_1[row] for row in max_rows_list], dtype=np.float64)
+        max_plus_1 = np.array([table.max_glues_plus_1[row] for row in max_rows_list], dtype=np.float64)
+        freq = np.array([frequencies[row] for row in max_rows_list], dtype=np.int64)
+        with np.errstate(invalid="ignore"):
+            formula = ((max_minus_1 ** p + max_plus_1 ** p) / 2) ** (1 / p)
+        relevant = (glues >= formula) & (freq > 2)
+        for row, flag in zip(max_rows_list, relevant.tolist()):
+            table.relevant[row] = 1 if flag else 0
+        return len(glue_rows)
+
+    def _valid_parents(self, row: int) -> list[int]:
+        """Return the rows of the (n+1)-grams that have row as an (n-1)-gram valid for LocalMaxs."""
+        table = self.table
+        return [parent for parent in self.parents().get(row, ())
+                if table.left_children[parent] == row or table.right_children[parent] == row]
+
+# Function to add counts multiplied by a sign to a dictionary of changes
+def _add_counts(delta: dict[int, int], counts: dict[int, int], sign: int) -> None:
+    for key, count in counts.items():
+        delta[key] = delta.get(key, 0) + sign * count
@@ -1,86 +1,47 @@
-from src.text_processing import read_text_files,tokenize_text
+from src.text_processing import StopWordSet, as_stop_word_set
+from src.corpus import Corpus, index_corpus
+from src.corpus_index import CorpusIndex
+from src.implicit_scoring import ProximityScorer, score_implicit_keywords
+from src.profiling import Profiler, NULL_PROFILER
 import math
+import numpy as np
 
-def get_explicit_keywords(corpus_path: str,relevant_expressions: list[str],total_keywords: int,stop_words: list[str]) -> dict[str, list[str]]:
+def get_explicit_keywords(corpus_path: str | Corpus,relevant_expressions: list[str],total_keywords: int,stop_words: StopWordSet,
+                          profiler: Profiler = NULL_PROFILER) -> dict[str, list[str]]:
   """
   For each document in the corpus:
-      1) Tokenizes the text.
-      2) Calculates TF-IDF scores for unigrams and relevant expressions (REs).
-      3) Selects top-K keywords (half from unigrams, half from REs).
+      1) Tokenizes the text and indexes its unigrams and relevant expressions (REs) in a CorpusIndex.
+      2) Calculates TF-IDF scores for unigrams and relevant expressions (REs), for all the documents at once
+         in a sparse document x term matrix (TfidfMatrix).
+      3) Selects top-K keywords (half from unigrams, half from REs), ties broken by term.
 
   Args:
-      corpus_path (str): Path to the corpus directory.
+      corpus_path (str | Corpus): Path to the corpus directory, or the Corpus already loaded.
       relevant_expressions (List[str]): Predefined list of relevant expressions (REs).
       total_keywords (int): Total number of keywords to extract per document.
-      stop_words (List[str]): List of stopwords to ignore.
+      stop_words (StopWordSet): Stopwords to ignore.
+      profiler (Profiler): Receives the numbers of documents and terms in its current stage.
 
   Returns:
       Dict[str, List[str]]: Mapping of {filename: [keyword1, ..., keywordN]}.
   """
 
-  # 1) Load all documents
-  text_files: dict[str, str] = read_text_files(corpus_path)
-  num_docs: int = len(text_files)
+  # 1) Load and index all documents (the files are read one block at a time, unless the corpus is already loaded)
+  index: CorpusIndex = index_corpus(corpus_path, relevant_expressions)
   num_res: int = total_keywords // 2
   num_unigrams: int = total_keywords - num_res
 
-  df_unigrams: dict[str, int] = {}
-  df_res: dict[str, int] = {}
-  doc_tokens: dict[str, list[str]] = {}
-  doc_re_matches: dict[str, list[str]] = {}
+  # 2) TF-IDF of every term of every document; the REs are matched as whole tokens
+  # (scipy is only imported by the keyword stages, not when src.keywords is imported)
+  from src.tfidf import TfidfMatrix
+  tfidf: TfidfMatrix = TfidfMatrix.from_index(index, relevant_expressions, stop_words)
+  profiler.count(documents=len(tfidf.documents), terms=len(tfidf.terms))
 
-  # 2) Calculate Document Frequencies
-  for fname, text in text_files.items():
-      tokens: list[str] = tokenize_text(text)
-      doc_tokens[fname] = tokens
+  # 3) Select top keywords
+  return tfidf.keywords(num_unigrams, num_res)
 
-      unique_unigrams: set[str] = set(w for w in tokens if w.lower() not in stop_words)
-      for w in unique_unigrams:
-          df_unigrams[w] = df_unigrams.get(w, 0) + 1
-
-      matched:list[str] = [expr for expr in relevant_expressions if expr in text]
-      doc_re_matches[fname] = matched
-      for expr in set(matched):
-          df_res[expr] = df_res.get(expr, 0) + 1
-
-  results: dict[str, list[str]] = {}
-
-  for fname, tokens in doc_tokens.items():
-      total_terms:int = len(tokens)
-
-      # Term frequency (excluding stopwords)
-      counts: dict[str, int] = {}
-      for w in tokens:
-          if w.lower() in stop_words:
-              continue
-          counts[w] = counts.get(w, 0) + 1
-
-      # 3.1) TF-IDF for unigrams
-      tfidf_unigrams: dict[str, float] = {}
-      for w, cnt in counts.items():
-          tf = cnt / total_terms
-          idf = math.log(num_docs / df_unigrams[w]) if df_unigrams[w] > 0 else 0.0
-          tfidf_unigrams[w] = tf * idf
-
-      # 3.2) TF-IDF for relevant expressions
-      tfidf_res: dict[str, float] = {}
-      doc_text = text_files[fname]
-      for expr in doc_re_matches[fname]:
-          cnt:int = doc_text.count(expr)
-          tf:float = cnt / total_terms
-          idf:float = math.log(num_docs / df_res[expr]) if df_res[expr] > 0 else 0.0
-          tfidf_res[expr] = tf * idf
-
-      # 3.3) Select top keywords
-      top_unigrams: list[tuple[str, float]] = sorted(tfidf_unigrams.items(), key=lambda x: -x[1])[:num_unigrams]
-      top_res: list[tuple[str, float]] = sorted(tfidf_res.items(), key=lambda x: -x[1])[:num_res]
-
-      keywords: list[str] = [term for term, _ in (top_res + top_unigrams)]
-      results[fname] = keywords
-
-  return results
-
-def calculate_implicit_keywords(corpus_path: str,explicit_keywords: dict[str, list[str]],relevant_expressions: list[str],num_implicit: int,stop_words: set[str]) -> dict[str, list[str]]:
+def calculate_implicit_keywords(corpus_path: str | Corpus,explicit_keywords: dict[str, list[str]],relevant_expressions: list[str],num_implicit: int,stop_words: StopWordSet, workers: int = 1,
+                                profiler: Profiler = NULL_PROFILER) -> dict[str, list[str]]:
   """
   Calculate implicit keywords for a set of documents based on their semantic proximity
   to a given list of explicit keywords.
@@ -90,136 +51,135 @@ def calculate_implicit_keywords(corpus_path: str,explicit_keywords: dict[str, li
   and intra-document proximity measures. It returns the top N implicit keywords for each document.
 
   Parameters:
-      corpus_path (str): Path to the corpus containing text documents.
+      corpus_path (str | Corpus): Path to the corpus containing text documents, or the Corpus already loaded.
       explicit_keywords (Dict[str, List[str]]): A dictionary mapping document names to lists of explicit keywords.
       relevant_expressions (List[str]): List of relevant multi-word expressions to consider.
       num_implicit (int): Number of top implicit keywords to return per document.
+      stop_words (StopWordSet): Stopwords that cannot be implicit keywords.
+      workers (int): Number of processes scoring the documents (same result); the proximity scores are shared
+          with them through memory-mapped files.
+      profiler (Profiler): Receives the numbers of documents, terms and (term, explicit keyword) pairs in its current stage.
 
   Returns:
       Dict[str, List[str]]: A dictionary mapping each document to a list of top implicit keywords.
   """
 
-  # Read and tokenize all documents in the corpus
-  text_files: dict[str, str] = read_text_files(corpus_path)
-  doc_tokens: dict[str, list[str]] = {fname: tokenize_text(text.lower()) for fname, text in text_files.items()}
-  num_docs:int = len(text_files)
+  stop_words = as_stop_word_set(stop_words)
+
+  # Read, tokenize and index all documents in the corpus (lowercased)
+  index: CorpusIndex = index_corpus(corpus_path, relevant_expressions, lowercase=True)
 
   # Gather all unique unigrams and multi-word expressions
-  all_unigrams: set[str] = set()
-  for tokens in doc_tokens.values():
-      all_unigrams.update(tokens)
+  all_unigrams: set[str] = index.unigrams
   all_terms: list[str] = list(all_unigrams.union(set(relevant_expressions)))
 
-  # Step 1: Compute P(A, .) for each term (mean relative frequency across all documents)
-  p_a_dot: dict[str, float] = {}
-  for term in all_terms:
-      total_prob:float = 0.0
-      for fname, tokens in doc_tokens.items():
-          text:str = text_files[fname].lower()
-          total_words:int = len(tokens)
-          # Use count in tokens if unigram, otherwise count in text
-          if term in all_unigrams:
-              freq:int = tokens.count(term)
-          else:
-              freq:int = text.count(term.lower())
-          total_prob += freq / total_words if total_words > 0 else 0
-      p_a_dot[term] = total_prob / num_docs
-
-  # Step 2: Compute semantic proximity between all term pairs
+  # Steps 1 and 2: semantic proximity between the terms and the explicit keywords.
+  # Step 3 only reads the pairs (candidate, explicit keyword), so only those pairs are computed.
+  explicit_terms: set[str] = set()
+  for explicit in explicit_keywords.values():
+      explicit_terms.update(explicit)
+  sem_prox: dict[tuple[str, str], float] = semantic_proximity(index, all_terms, explicit_terms)
+  profiler.count(documents=len(index.doc_tokens), terms=len(all_terms), pairs=len(sem_prox))
+
+  # Step 3: For each document, select top implicit keywords based on semantic proximity to explicit ones.
+  # The candidates are the terms that are not explicit, not stopwords, not too short and absent from the document,
+  # scored by their proximity to the explicit keywords (weighted by inverse position); the documents are independent.
+  scorer: ProximityScorer = ProximityScorer.from_index(index, all_terms, sem_prox, stop_words)
+  return score_implicit_keywords(scorer, explicit_keywords, num_implicit, workers)
+
+# Function to compute the distances between the occurrences of two terms
+def min_max_distance(positions_a: list[int], positions_b: list[int]) -> tuple[int, int]:
+  """
+  Compute the minimum and maximum distance |a - b| between two sorted lists of positions.
+  The minimum is found by merging the two lists, the maximum only depends on their ends.
+  """
+  min_dist = abs(positions_a[0] - positions_b[0])
+  i, j = 0, 0
+  while i < len(positions_a) and j < len(positions_b) and min_dist > 0:
+      dist = positions_a[i] - positions_b[j]
+      min_dist = min(min_dist, abs(dist))
+      if dist < 0:
+          i += 1
+      else:
+          j += 1
+  max_dist = max(abs(positions_a[-1] - positions_b[0]), abs(positions_b[-1] - positions_a[0]))
+  return min_dist, max_dist
+
+# Function to compute the semantic proximity of the terms to a set of target terms
+def semantic_proximity(index: CorpusIndex, all_terms: list[str], targets: set[str]) -> dict[tuple[str, str], float]:
+  """
+  Compute the semantic proximity between each target term and every other term that co-occurs with it.
+
+  The relative frequencies of the terms are stored in a sparse term x document matrix P. The inter-document
+  correlation of all the pairs (target, term) is obtained with one sparse product P[targets] @ P.T, and the
+  intra-document proximity is only computed for the pairs that co-occur in at least one document, by merging
+  their sorted positions. The pairs that never co-occur have a proximity of 0 and are not stored.
+
+  Parameters:
+      index (CorpusIndex): The (lowercased) index of the corpus.
+      all_terms (list[str]): All the terms (unigrams and relevant expressions).
+      targets (set[str]): The terms whose pairs are needed (the explicit keywords).
+
+  Returns:
+      dict[tuple[str, str], float]: The proximity of each pair, keyed by the sorted pair of terms.
+  """
+  from scipy import sparse
+  docs: list[str] = index.documents()
+  num_docs: int = len(docs)
+  doc_ids: dict[str, int] = {doc: i for i, doc in enumerate(docs)}
+  doc_lengths: np.ndarray = np.array([index.num_tokens(doc) for doc in docs], dtype=np.float64)
+
+  # Sparse term x document matrix of the relative frequencies P(A, d)
+  rows: list[int] = []
+  cols: list[int] = []
+  counts: list[int] = []
+  for t, term in enumerate(all_terms):
+      for doc, positions in index.postings.get(term.lower(), {}).items():
+          rows.append(t)
+          cols.append(doc_ids[doc])
+          counts.append(len(positions))
+  cols_array = np.array(cols, dtype=np.int64)
+  data = np.array(counts, dtype=np.float64) / doc_lengths[cols_array] if counts else np.zeros(0)
+  freqs = sparse.csr_matrix((data, (np.array(rows, dtype=np.int64), cols_array)), shape=(len(all_terms), num_docs))
+
+  # P(A, .): mean relative frequency of each term, and standard deviation of its relative frequencies
+  mean = np.asarray(freqs.sum(axis=1)).ravel() / num_docs
+  nnz = np.diff(freqs.indptr)
+  centered = freqs.copy()
+  centered.data = (freqs.data - np.repeat(mean, nnz)) ** 2
+  std = np.sqrt((np.asarray(centered.sum(axis=1)).ravel() + (num_docs - nnz) * mean ** 2) / num_docs)
+
+  # Covariance of each (target, term) pair: sum_d P(A,d) P(B,d) - D * P(A,.) * P(B,.)
+  target_rows: list[int] = [t for t, term in enumerate(all_terms) if term in targets]
+  products = (freqs[target_rows] @ freqs.T).tocsr()
+
   sem_prox: dict[tuple[str, str], float] = {}
-  for i, term_a in enumerate(all_terms):
-      for term_b in all_terms[i+1:]:
+  for r, term_a_id in enumerate(target_rows):
+      term_a: str = all_terms[term_a_id]
+      postings_a = index.postings.get(term_a.lower(), {})
+      for k in range(products.indptr[r], products.indptr[r + 1]):
+          term_b_id = products.indices[k]
+          if term_b_id == term_a_id:
+              continue
+          term_b: str = all_terms[term_b_id]
           pair: tuple[str, str] = tuple(sorted((term_a, term_b)))
-          co_docs: list[str] = []
-
-          # Identify documents containing both term_a and term_b
-          for fname in text_files:
-              tokens: list[str] = doc_tokens[fname]
-              text:str = text_files[fname].lower()
-              in_a:bool = term_a in tokens if term_a in all_unigrams else term_a.lower() in text
-              in_b:bool = term_b in tokens if term_b in all_unigrams else term_b.lower() in text
-              if in_a and in_b:
-                  co_docs.append(fname)
-
-          if not co_docs:
-              sem_prox[pair] = 0.0
+          if pair in sem_prox:
               continue
 
-          # Compute inter-document correlation
-          cov = var_a = var_b = 0.0
-          for fname in text_files:
-              tokens: list[str] = doc_tokens[fname]
-              text:str = text_files[fname].lower()
-              total_words:int = len(tokens)
-              p_a:float = tokens.count(term_a) / total_words if term_a in all_unigrams else text.count(term_a.lower()) / total_words
-              p_b:float = tokens.count(term_b) / total_words if term_b in all_unigrams else text.count(term_b.lower()) / total_words
-              cov += (p_a - p_a_dot[term_a]) * (p_b - p_a_dot[term_b])
-              var_a += (p_a - p_a_dot[term_a]) ** 2
-              var_b += (p_b - p_a_dot[term_b]) ** 2
-
-          var_a = math.sqrt(var_a / num_docs)
-          var_b = math.sqrt(var_b / num_docs)
-          corr:float = cov / (var_a * var_b) if var_a > 0 and var_b > 0 else 0.0
-
-          # Compute intra-document proximity (based on token distance)
-          ip_sum:float = 0.0
-          for fname in co_docs:
-              tokens:list[str] = doc_tokens[fname]
-              positions_a, positions_b = [], []
-              for i in range(len(tokens)):
-                  # Locate positions of term_a
-                  if term_a in all_unigrams and tokens[i] == term_a:
-                      positions_a.append(i)
-                  elif term_a not in all_unigrams and ' '.join(tokens[i:i+len(term_a.split())]) == term_a.lower():
-                      positions_a.append(i)
-                  # Locate positions of term_b
-                  if term_b in all_unigrams and tokens[i] == term_b:
-                      positions_b.append(i)
-                  elif term_b not in all_unigrams and ' '.join(tokens[i:i+len(term_b.split())]) == term_b.lower():
-                      positions_b.append(i)
-
-              # Compute normalized minimum distance between terms
-              if positions_a and positions_b:
-                  min_dist:float = min(abs(a - b) for a in positions_a for b in positions_b)
-                  max_dist:float = max(abs(a - b) for a in positions_a for b in positions_b)
-                  if max_dist > 0:
-                      ip_sum += 1 - (min_dist / max_dist)
-          ip:float = ip_sum / len(co_docs)
-          sem_prox[pair] = corr * math.sqrt(ip) if ip > 0 else 0.0
-
-  # Step 3: For each document, select top implicit keywords based on semantic proximity to explicit ones
-  results: dict[str, list[str]] = {}
-  for fname, explicit in explicit_keywords.items():
-      explicit_lower: list[str] = [e.lower() for e in explicit]
-      tokens:list[str] = doc_tokens[fname]
-      text:str = text_files[fname].lower()
-
-      # Filter out terms that are explicit, stopwords, or too short
-      candidates: list[str] = []
-      for term in all_terms:
-          term_lower:str = term.lower()
-          if (
-              term_lower in explicit_lower or
-              term_lower in stop_words or
-              len(term_lower) <= 2
-          ):
-              continue
-          if term in all_unigrams and term_lower not in tokens:
-              candidates.append(term)
-          elif term not in all_unigrams and term_lower not in text:
-              candidates.append(term)
-
-      # Score candidates by their proximity to explicit keywords (weighted by inverse position)
-      scores: dict[str, float] = {}
-      for cand in candidates:
-          score:float = 0.0
-          for i, exp in enumerate(explicit, 1):
-              key: tuple[str, str] = tuple(sorted((cand, exp)))
-              score += sem_prox.get(key, 0.0) / i
-          scores[cand] = score
-
-      # Select top-N implicit keywords
-      top_implicit: list[tuple[str, float]] = sorted(scores.items(), key=lambda x: -x[1])[:num_implicit]
-      results[fname] = [term for term, _ in top_implicit]
-
-  return results
\ No newline at end of file
+          # Inter-document correlation
+          cov: float = products.data[k] - num_docs * mean[term_a_id] * mean[term_b_id]
+          std_a, std_b = std[term_a_id], std[term_b_id]
+          corr: float = cov / (std_a * std_b) if std_a > 0 and std_b > 0 else 0.0
+
+          # Intra-document proximity, in the documents where both terms occur
+          postings_b = index.postings.get(term_b.lower(), {})
+          co_docs: list[str] = [doc for doc in postings_a if doc in postings_b]
+          ip_sum: float = 0.0
+          for doc in co_docs:
+              min_dist, max_dist = min_max_distance(postings_a[doc], postings_b[doc])
+              if max_dist > 0:
+                  ip_sum += 1 - (min_dist / max_dist)
+          ip: float = ip_sum / len(co_docs)
+          sem_prox[pair] = float(corr * math.sqrt(ip)) if ip > 0 else 0.0
+
+  return sem_prox
@@ -1,18 +1,20 @@
 from math import log2
+import numpy as np
+from collections.abc import Iterable, Mapping, ItemsView, ValuesView
 from src.cohesion_metrics import scp_glue, dice_glue, mi_glue
+from src.ngram_table import NGramTable, NO_ID, count_frequent_n_grams
+from src.text_processing import StopWordSet, as_stop_word_set
+from src.sharding import count_n_grams_parallel
 ##################################################################
 # N-gram class
 ###################################################################
 class n_gram:
-  size:int = 0
-  frequency:int = 0
-  tokens:list[str] = []
-  glue:float = 0.0
-  glue_n_grams_minus_1:dict = {}
-  glue_n_grams_plus_1:dict = {}
-  max_glue_n_grams_minus_1:float = 0.0
-  max_glue_n_grams_plus_1:float = 0.0
-  relevant_expression:bool = False
+  """
+  An n-gram and its statistics. The n-grams created with the constructor are small records (one slot per attribute);
+  the n-grams of create_n_grams are NGramView objects, views over one row of an NGramTable with the same methods.
+  """
+  __slots__ = ("size", "frequency", "tokens", "glue", "glue_n_grams_minus_1", "glue_n_grams_plus_1",
+               "max_glue_n_grams_minus_1", "max_glue_n_grams_plus_1", "relevant_expression")
 
   #Constructor
   def __init__(self,size:int, frequency:int, tokens:list[str]) -> None:
@@ -20,12 +22,16 @@ class n_gram:
     self.frequency = frequency
     self.tokens = tokens
     self.glue = 0.0
-    self.glue_n_grams_minus_1 = {}
-    self.glue_n_grams_plus_1 = {}
+    # The dictionaries of the glues of the neighbours are created when the first glue is added
+    self.glue_n_grams_minus_1 = None
+    self.glue_n_grams_plus_1 = None
     self.max_glue_n_grams_minus_1 = 0.0
     self.max_glue_n_grams_plus_1 = 0.0
     self.relevant_expression = False
 
+  def __repr__(self) -> str:
+    return f"n_gram({self.get_size()}, {self.get_frequency()}, {self.get_tokens()})"
+
   #Getters and Setters
   def get_size(self) -> int:
     return self.size
@@ -48,18 +54,22 @@ class n_gram:
      self.glue = value
 
   def get_glue_n_grams_minus_1(self) -> dict:
+    if self.glue_n_grams_minus_1 is None:
+      self.glue_n_grams_minus_1 = {}
     return self.glue_n_grams_minus_1
   def set_glue_n_grams_minus_1(self, glue_n_grams_minus_1:dict) -> None:
     self.glue_n_grams_minus_1 = glue_n_grams_minus_1
   def add_glue_n_grams_minus_1(self, key:str, value:float) -> None:
-    self.glue_n_grams_minus_1[key] = value
+    self.get_glue_n_grams_minus_1()[key] = value
 
   def get_glue_n_grams_plus_1(self) -> dict:
+    if self.glue_n_grams_plus_1 is None:
+      self.glue_n_grams_plus_1 = {}
     return self.glue_n_grams_plus_1
   def set_glue_n_grams_plus_1(self, glue_n_grams_plus_1:dict) -> None:  
     self.glue_n_grams_plus_1 = glue_n_grams_plus_1
   def add_glue_n_grams_plus_1(self, key:str, value:float) -> None:
-    self.glue_n_grams_plus_1[key] = value
+    self.get_glue_n_grams_plus_1()[key] = value
 
   def get_max_glue_n_grams_minus_1(self) -> float:
     return self.max_glue_n_grams_minus_1
@@ -101,11 +111,131 @@ class n_gram:
       self.set_relevant_expression(self.get_glue() >= formula and self.get_frequency() > 2)
     
 
+class NGramView(n_gram):
+  """
+  An n-gram of an NGramTable: a view over one row of the table, it only holds the table and its row, every
+  attribute is read from and written to the columns of the table.
+  """
+  __slots__ = ("_table", "_row")
+
+  def __init__(self, table:NGramTable, row:int) -> None:
+    self._table = table
+    self._row = row
+
+  #Getters and Setters
+  def get_size(self) -> int:
+    return self._table.sizes[self._row]
+  def set_size(self,size:int) -> None:
+    self._table.sizes[self._row] = size
+
+  def get_frequency(self) -> int:
+    return self._table.frequencies[self._row]
+  def set_frequency(self, frequency:int) -> None:
+    self._table.frequencies[self._row] = frequency
+
+  def get_tokens(self) -> list[str]:
+    return self._table.row_tokens(self._row)
+  def set_tokens(self, tokens:list[str]) -> None:
+    self._table.set_row_ids(self._row, tuple(self._table.encode(tokens)))
+
+  def get_glue(self) -> float:
+     return self._table.glues[self._row]
+  def set_glue(self,value:float) -> None:
+     self._table.glues[self._row] = value
+
+  # The glues of the neighbours are derived from the table, unless they were set by hand
+  def get_glue_n_grams_minus_1(self) -> dict:
+    table = self._table
+    if self._row in table.glue_overrides_minus_1:
+      return table.glue_overrides_minus_1[self._row]
+    if self._row >= len(table.left_children):
+      return {}
+    children = (table.left_children[self._row], table.right_children[self._row])
+    return {table.row_key(child): table.glues[child] for child in children if child != NO_ID}
+  def set_glue_n_grams_minus_1(self, glue_n_grams_minus_1:dict) -> None:
+    self._table.glue_overrides_minus_1[self._row] = glue_n_grams_minus_1
+  def add_glue_n_grams_minus_1(self, key:str, value:float) -> None:
+    self._table.glue_overrides_minus_1.setdefault(self._row, {})[key] = value
+
+  def get_glue_n_grams_plus_1(self) -> dict:
+    table = self._table
+    if self._row in table.glue_overrides_plus_1:
+      return table.glue_overrides_plus_1[self._row]
+    return {table.row_key(parent): table.glues[parent] for parent in table.parents(self._row)}
+  def set_glue_n_grams_plus_1(self, glue_n_grams_plus_1:dict) -> None:  
+    self._table.glue_overrides_plus_1[self._row] = glue_n_grams_plus_1
+  def add_glue_n_grams_plus_1(self, key:str, value:float) -> None:
+    self._table.glue_overrides_plus_1.setdefault(self._row, {})[key] = value
+
+  def get_max_glue_n_grams_minus_1(self) -> float:
+    return self._table.max_glues_minus_1[self._row]
+  def set_max_glue_n_grams_minus_1(self, value: float) -> None:
+    self._table.max_glues_minus_1[self._row] = value
+
+  def get_max_glue_n_grams_plus_1(self) -> float:
+    return self._table.max_glues_plus_1[self._row]
+  def set_max_glue_n_grams_plus_1(self, value: float) -> None:
+    self._table.max_glues_plus_1[self._row] = value
+  
+  def is_relevant_expression(self) -> bool:
+    return bool(self._table.relevant[self._row])
+  def set_relevant_expression(self, value: bool) -> None:
+    self._table.relevant[self._row] = value
+
+##################################################################
+# Dictionary of the n-grams of a table
+###################################################################
+class NGramDict(Mapping):
+  """
+  Read-only dictionary {n-gram string: n_gram} over an NGramTable.
+  The strings of the keys and the n_gram views are only built when they are asked for.
+  """
+
+  def __init__(self, table:NGramTable) -> None:
+    self.table = table
+
+  def __len__(self) -> int:
+    return len(self.table)
+
+  def __iter__(self):
+    for row in range(len(self.table)):
+      yield self.table.row_key(row)
+
+  def __getitem__(self, key:str) -> n_gram:
+    row = self.table.find_tokens(key.split(" ")) if isinstance(key, str) else NO_ID
+    if row == NO_ID:
+      raise KeyError(key)
+    return NGramView(self.table, row)
+
+  def __contains__(self, key) -> bool:
+    return isinstance(key, str) and self.table.find_tokens(key.split(" ")) != NO_ID
+
+  def values(self) -> ValuesView:
+    return _NGramValues(self)
+
+  def items(self) -> ItemsView:
+    return _NGramItems(self)
+
+  def __repr__(self) -> str:
+    return f"NGramDict({len(self)} n-grams)"
+
+class _NGramValues(ValuesView):
+  def __iter__(self):
+    table = self._mapping.table
+    for row in range(len(table)):
+      yield NGramView(table, row)
+
+class _NGramItems(ItemsView):
+  def __iter__(self):
+    table = self._mapping.table
+    for row in range(len(table)):
+      yield table.row_key(row), NGramView(table, row)
+
 ##################################################################
 # Function to create n-grams from a list of tokens
 ###################################################################
 
-def create_n_grams(tokens:list[str], stop_words:list[str]) -> dict[str,n_gram]:
+def create_n_grams(tokens:list[str], stop_words:StopWordSet) -> NGramDict:
   """
   Generate n-grams from a list of tokens, excluding stop words at the beginning or end of n-grams.
 
@@ -113,49 +243,105 @@ def create_n_grams(tokens:list[str], stop_words:list[str]) -> dict[str,n_gram]:
   It checks that no n-gram starts or ends with a stop word. If a stop word is encountered,
   the n-gram is either skipped or truncated. The function returns a dictionary where the keys
   are the n-grams (as strings) and the values are the corresponding n-gram objects.
+  The n-grams are stored in an NGramTable, the returned dictionary is a view over that table.
+
+  Parameters:
+  tokens (list[str]): A list of tokens (words) from the text.
+  stop_words (StopWordSet): The stop words that should not be present at the start or end of n-grams.
+
+  Returns:
+  NGramDict: A dictionary where the keys are n-grams (as strings) and the values are the corresponding n-gram objects.
+  """
+  table:NGramTable = NGramTable(stop_words=as_stop_word_set(stop_words)) # table to store all n-grams
+  ids:list[int] = table.encode(tokens) # the tokens are replaced by their ids, the stop words are flagged once per word of the vocabulary
+
+  # Count all the n-grams (sizes 2 to 8) in a single pass over the ids.
+  # The strings of the n-grams are only built when the dictionary is read.
+  table.count_n_grams(ids)
+
+  return NGramDict(table)
+
+# Function to create only the n-grams used by LocalMaxs, in several passes
+def create_n_grams_prefiltered(tokens:list[str], stop_words:StopWordSet, min_frequency:int = 3) -> NGramDict:
+  """
+  Multi-pass version of create_n_grams for large corpora, where most n-grams occur once or twice and can never be
+  relevant expressions (n_gram.localMax requires a frequency > 2). A first pass estimates the frequency of every
+  n-gram with a count-min sketch, the n-grams whose estimate reaches min_frequency are counted exactly, and only the
+  ones whose count reaches it are created, with the n-grams needed for the glues around them (see count_frequent_n_grams).
+  The relevant expressions found with the "dice" glue are the same as with create_n_grams; the glues that depend
+  on the number of n-grams ("scp", "mi") raise a ValueError in calculate_and_store_glue.
 
   Parameters:
   tokens (list[str]): A list of tokens (words) from the text.
-  stop_words (list[str]): A list of stop words that should not be present at the start or end of n-grams.
+  stop_words (StopWordSet): The stop words that should not be present at the start or end of n-grams.
+  min_frequency (int): The minimum frequency of the candidate n-grams (3 or less keeps every relevant expression).
+
+  Returns:
+  NGramDict: A dictionary of the kept n-grams.
+  """
+  stop_words = as_stop_word_set(stop_words)
+  table:NGramTable = NGramTable(stop_words=stop_words)
+  ids:np.ndarray = np.fromiter(map(table.intern, tokens), dtype=np.int32, count=len(tokens)) # no list of ids next to the tokens
+  table = count_frequent_n_grams(table.words, ids, table.is_stop, min_frequency).to_table(stop_words)
+  table.prefilter_frequency = min_frequency
+  return NGramDict(table)
+
+# Function to create the n-grams of a stream of tokens
+def create_n_grams_streaming(token_chunks:Iterable[list[str]], stop_words:StopWordSet) -> NGramDict:
+  """
+  Streaming version of create_n_grams: the tokens are consumed one chunk at a time (for example from
+  iter_token_chunks), so the whole token list of the corpus is never built. The result is the same as
+  create_n_grams on the concatenation of the chunks.
+
+  Parameters:
+  token_chunks (Iterable[list[str]]): The tokens of the text in reading order, in chunks.
+  stop_words (StopWordSet): The stop words that should not be present at the start or end of n-grams.
+
+  Returns:
+  NGramDict: A dictionary where the keys are n-grams (as strings) and the values are the corresponding n-gram objects.
+  """
+  table:NGramTable = NGramTable(stop_words=as_stop_word_set(stop_words))
+  table.count_n_gram_chunks(token_chunks)
+  return NGramDict(table)
+
+# Function to create the n-grams of a corpus with several processes
+def create_n_grams_parallel(corpus_path:str, stop_words:StopWordSet, workers:int) -> NGramDict:
+  """
+  Parallel version of create_n_grams for the files of a corpus: the files are split in shards counted by
+  a pool of worker processes, and the counts of the shards are merged (see src.sharding).
+  The n-grams and their frequencies are the same as create_n_grams(text_processing(corpus_path), stop_words).
+
+  Parameters:
+  corpus_path (str): Path to the folder containing the text files.
+  stop_words (StopWordSet): The stop words that should not be present at the start or end of n-grams.
+  workers (int): Number of worker processes.
 
   Returns:
-  dict[str, n_gram]: A dictionary where the keys are n-grams (as strings) and the values are the corresponding n-gram objects.
-  """
-  n_grams:dict[str,n_gram] = {} # dictionary to store all n-grams
-  l_list:int = len(tokens) # length of the list of tokens
-
-  # cycle through all the tokens 
-  for index in range(l_list+1):
-    # foreach token we can have until 8 n-grams
-    for size in range(2,9):
-      if index+size > l_list:
-        break
-      
-      # Check if the first or last tokens in the n-gram are a stop_word because this is forbiden
-      if(tokens[index] in stop_words):
-        break
-      if(tokens[index+size-1] in stop_words):
-        continue
-      
-      # Transform our list of tokens in our key of type string for the dictionary
-      key:str = " ".join(tokens[index:index+size])
-      
-      # If the n-gram already exist we only add 1 to their frequency
-      if key in n_grams:
-        n_grams[key].set_frequency(n_grams[key].get_frequency()+1)
-      else: # if not we create  this new n-gram and store it in the dict
-        n_grams[key] = n_gram(size,1,tokens[index:index+size])
-
-  return n_grams
+  NGramDict: A dictionary where the keys are n-grams (as strings) and the values are the corresponding n-gram objects.
+  """
+  return NGramDict(count_n_grams_parallel(corpus_path, as_stop_word_set(stop_words), workers))
+
+# Function to build an index of the n-grams keyed by their tuple of tokens.
+def build_n_gram_index(all_n_grams: dict[str,n_gram]) -> dict[tuple[str,...],n_gram]:
+  """
+  Build a hash index over the n-grams so that an n-gram can be found from its tokens in O(1).
+  Parameters:
+      all_n_grams (dict): A dictionary containing all n-grams.
+  Returns: dict[tuple[str, ...], n_gram]: A dictionary mapping the tuple of tokens of each n-gram to the n-gram object.
+  """
+  return {tuple(ngram.get_tokens()): ngram for ngram in all_n_grams.values()}
 
 # Function to return the n-gram given a list of tokens.
-def get_element(tokens: list[str], all_n_grams: dict[str,n_gram])-> n_gram:
+def get_element(tokens: list[str], all_n_grams: dict[str,n_gram], index: dict[tuple[str,...],n_gram] = None)-> n_gram:
     """
     Get the ngram object corresponding to the tokens in my dictionary of n-grams.
     Parameters:
         tokens (list): A list of tokens.
         all_n_grams (dict): A dictionary containing all n-grams
+        index (dict): Optional index built with build_n_gram_index, used for a O(1) lookup instead of a linear scan.
     Returns: n_gram (n_gram): The n-gram object corresponding to the tokens."""
+    if index is not None:
+        return index.get(tuple(tokens))
     for key, ngram in all_n_grams.items():
         if ngram.get_tokens() == tokens:
             return ngram
@@ -0,0 +1,884 @@
+import time
+from array import array
+from typing import Iterable, Iterator
+import numpy as np
+from src.cohesion_metrics import batch_glue
+from src.sketches import CountMinSketch
+from src.text_processing import StopWordSet, as_stop_word_set
+
+##################################################################
+# Columnar n-gram table
+###################################################################
+
+# The longest n-gram created by create_n_grams
+MAX_N_GRAM_SIZE:int = 8
+# Glue functions that do not depend on the number of n-grams of the table (see count_frequent_n_grams)
+PREFILTER_GLUE_FUNCTIONS: tuple[str, ...] = ("dice",)
+# Value stored in the unused cells of a row of ids and in the missing children
+NO_ID:int = -1
+# Number of bits used by one token id in the key of an n-gram
+ID_BITS:int = 32
+
+# Function to compute the key of an n-gram in the index of a table
+def pack_ids(ids) -> int:
+    """
+    Pack the ids of an n-gram in a single integer: key = ((id1+1) << ID_BITS*(n-1)) | ... | (idn+1).
+    This is a polynomial rolling hash of base 2**ID_BITS without modulo, so two different n-grams
+    (of any sizes) never have the same key, and the key of an n-gram is obtained from the key of its
+    prefix with one shift.
+    """
+    key = 0
+    for word_id in ids:
+        key = (key << ID_BITS) | (word_id + 1)
+    return key
+
+# Function to get the ids of an n-gram from its key
+def unpack_key(key: int) -> tuple[int, ...]:
+    """Return the ids of the n-gram of a key computed by pack_ids."""
+    mask: int = (1 << ID_BITS) - 1
+    ids: list[int] = []
+    while key:
+        ids.append((key & mask) - 1)
+        key >>= ID_BITS
+    return tuple(reversed(ids))
+
+# Function to count the n-grams of a list of ids by key only
+def count_n_gram_keys(ids: list[int], is_stop: bytearray, max_size: int = MAX_N_GRAM_SIZE,
+                      num_starts: int = None) -> dict[int, int]:
+    """
+    Count the n-grams of size 2 to max_size of a list of ids like NGramTable.count_n_grams, but only in a dictionary
+    key (see pack_ids) -> frequency, in the order of their first occurrence. This is faster when only the counts are
+    needed (see NGramCounts.from_keys), because no row of a table is created.
+    Only the n-grams starting in the first num_starts positions are counted (all of them if None); they can end
+    anywhere in ids.
+    """
+    counts: dict[int, int] = {}
+    get = counts.get
+    num_ids = len(ids)
+    for start in range(num_ids if num_starts is None else min(num_starts, num_ids)):
+        first = ids[start]
+        if is_stop[first]:
+            continue
+        key = first + 1
+        for end in range(start + 1, min(start + max_size, num_ids)):
+            last = ids[end]
+            key = (key << ID_BITS) | (last + 1)
+            if is_stop[last]:
+                continue
+            counts[key] = get(key, 0) + 1
+    return counts
+
+# Function to count by key only the n-grams crossing a boundary
+def count_boundary_n_gram_keys(ids: list[int], boundary: int, is_stop: bytearray,
+                               max_size: int = MAX_N_GRAM_SIZE) -> dict[int, int]:
+    """
+    Count like count_n_gram_keys the n-grams of a list of ids that start before the position boundary and end at
+    or after it (see NGramTable.count_boundary_n_grams).
+    """
+    counts: dict[int, int] = {}
+    get = counts.get
+    num_ids = len(ids)
+    for start in range(max(0, boundary - max_size + 1), boundary):
+        first = ids[start]
+        if is_stop[first]:
+            continue
+        key = first + 1
+        for end in range(start + 1, min(start + max_size, num_ids)):
+            last = ids[end]
+            key = (key << ID_BITS) | (last + 1)
+            if end < boundary or is_stop[last]:
+                continue
+            counts[key] = get(key, 0) + 1
+    return counts
+
+class PruningReport:
+    """
+    What NGramTable.calculate_and_store_glue skipped with a minimum frequency: the number of n-grams pruned at each
+    stage and the time of the stages (benchmarks.bench_pruning compares them with the time without pruning).
+    """
+
+    def __init__(self, min_frequency: int, num_rows: int, num_candidates: int, num_linked: int,
+                 seconds: dict[str, float]) -> None:
+        """
+        Parameters:
+            min_frequency (int): The minimum frequency of the LocalMaxs candidates.
+            num_rows (int): The number of n-grams of the table.
+            num_candidates (int): The number of n-grams of frequency >= min_frequency.
+            num_linked (int): The number of n-grams whose (n-1)-grams and glue were computed (the candidates and
+                the n-grams having a candidate as (n-1)-gram).
+            seconds (dict[str, float]): The time of each stage ("selection", "links", "glue", "max glues").
+        """
+        self.min_frequency: int = min_frequency
+        self.num_rows: int = num_rows
+        self.num_candidates: int = num_candidates
+        self.num_linked: int = num_linked
+        self.seconds: dict[str, float] = seconds
+
+    @property
+    def pruned_by_frequency(self) -> int:
+        """The n-grams that are neither LocalMaxs candidates nor have exact max glues."""
+        return self.num_rows - self.num_candidates
+
+    @property
+    def pruned_glue(self) -> int:
+        """The n-grams whose (n-1)-grams and glue were not computed."""
+        return self.num_rows - self.num_linked
+
+    def as_dict(self) -> dict:
+        return {
+            "min_frequency": self.min_frequency,
+            "n_grams": self.num_rows,
+            "candidates": self.num_candidates,
+            "pruned_by_frequency": self.pruned_by_frequency,
+            "kept_for_max_plus_1": self.num_linked - self.num_candidates,
+            "pruned_glue": self.pruned_glue,
+            "seconds": dict(self.seconds),
+        }
+
+    def __str__(self) -> str:
+        stages: str = ", ".join(f"{stage} {elapsed:.3f}s" for stage, elapsed in self.seconds.items())
+        return (
+            f"Pruning (frequency >= {self.min_frequency}): {self.num_rows} n-grams, {self.pruned_by_frequency} pruned "
+            f"from LocalMaxs, {self.num_linked - self.num_candidates} of them kept for the max(n+1) glues, "
+            f"{self.pruned_glue} without links nor glue; {stages}"
+        )
+
+class NGramTable:
+    """
+    Store all the n-grams of a corpus in parallel typed arrays instead of one Python object per n-gram.
+
+    Every token is mapped once to an integer id (vocabulary). An n-gram is a row of the table: its ids are stored
+    in a fixed-width block of `width` cells of the `ids` array (padded with NO_ID), and its size, frequency, glue,
+    max glues of the (n-1)/(n+1)-grams and relevance flag are stored at the same position in the other columns.
+    The n_gram objects of the table (NGramView) are lightweight views over one row of the table.
+    Whether a token is a stop word is computed once, when the token enters the vocabulary (is_stop).
+    """
+
+    def __init__(self, width: int = MAX_N_GRAM_SIZE, stop_words: StopWordSet = None) -> None:
+        self.width: int = width
+        # Vocabulary: token <-> id, and stop word flag of each id
+        self.words: list[str] = []
+        self.vocabulary: dict[str, int] = {}
+        self.stop_words: StopWordSet = as_stop_word_set(stop_words)
+        self.is_stop: bytearray = bytearray()
+        # Columns, one entry per n-gram (the ids column has width entries per n-gram)
+        self.ids: array = array("i")
+        self.lengths: array = array("b")
+        self.sizes: array = array("b")
+        self.frequencies: array = array("q")
+        self.glues: array = array("d")
+        self.max_glues_minus_1: array = array("d")
+        self.max_glues_plus_1: array = array("d")
+        self.relevant: bytearray = bytearray()
+        # Rows of the left and right (n-1)-grams of each n-gram (filled by link_children)
+        self.left_rows: array = array("i")
+        self.right_rows: array = array("i")
+        # Children of each n-gram used by LocalMaxs (filled by calculate_and_store_glue)
+        self.left_children: array = array("i")
+        self.right_children: array = array("i")
+        # Glues of the (n-1)/(n+1)-grams set by hand through the n_gram setters, by row
+        self.glue_overrides_minus_1: dict[int, dict] = {}
+        self.glue_overrides_plus_1: dict[int, dict] = {}
+        # Index: key of the n-gram (see pack_ids) -> row
+        self.index: dict[int, int] = {}
+        self._parents: dict[int, list[int]] = None
+        # Minimum frequency of the candidates when only the rows needed by LocalMaxs are counted
+        # (see count_frequent_n_grams), None when the table holds every n-gram
+        self.prefilter_frequency: int = None
+        # What calculate_and_store_glue pruned with a minimum frequency (None without pruning)
+        self.pruning_report: PruningReport = None
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    # Vocabulary
+    def intern(self, word: str) -> int:
+        """Return the id of a token, adding it to the vocabulary if needed."""
+        word_id = self.vocabulary.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self.vocabulary[word] = word_id
+            self.words.append(word)
+            self.is_stop.append(word in self.stop_words)
+        return word_id
+
+    def encode(self, tokens: list[str]) -> list[int]:
+        """Return the list of ids of a list of tokens, adding the new tokens to the vocabulary."""
+        return [self.intern(token) for token in tokens]
+
+    # Rows
+    def find(self, ids: tuple[int, ...]) -> int:
+        """Return the row of the n-gram with the given ids, or NO_ID if it is not in the table."""
+        return self.index.get(pack_ids(ids), NO_ID)
+
+    def find_tokens(self, tokens: list[str]) -> int:
+        """Return the row of the n-gram with the given tokens, or NO_ID if it is not in the table."""
+        ids: list[int] = []
+        for token in tokens:
+            word_id = self.vocabulary.get(token)
+            if word_id is None:
+                return NO_ID
+            ids.append(word_id)
+        return self.find(tuple(ids))
+
+    def add(self, ids: tuple[int, ...], frequency: int = 1) -> int:
+        """
+        Add an occurrence of an n-gram to the table.
+        Parameters:
+            ids (tuple[int, ...]): The ids of the tokens of the n-gram.
+            frequency (int): Number of occurrences to add.
+        Returns: int: The row of the n-gram.
+        """
+        key = pack_ids(ids)
+        row = self.index.get(key)
+        if row is not None:
+            self.frequencies[row] += frequency
+            return row
+        return self.append(ids, len(ids), frequency, key)
+
+    def append(self, ids: tuple[int, ...], size: int, frequency: int, key: int = None) -> int:
+        """Append a new row to the table and return it. The key of the n-gram is computed if not given."""
+        if len(ids) > self.width:
+            raise ValueError(f"An n-gram of {len(ids)} tokens does not fit in a table of width {self.width}.")
+        row = len(self.frequencies)
+        self.ids.extend(ids)
+        self.ids.extend([NO_ID] * (self.width - len(ids)))
+        self.lengths.append(len(ids))
+        self.sizes.append(size)
+        self.frequencies.append(frequency)
+        self.glues.append(0.0)
+        self.max_glues_minus_1.append(0.0)
+        self.max_glues_plus_1.append(0.0)
+        self.relevant.append(0)
+        self.index[pack_ids(ids) if key is None else key] = row
+        return row
+
+    def set_row_ids(self, row: int, ids: tuple[int, ...]) -> None:
+        """Replace the ids of a row, keeping the index up to date."""
+        if len(ids) > self.width:
+            raise ValueError(f"An n-gram of {len(ids)} tokens does not fit in a table of width {self.width}.")
+        old_key = pack_ids(self.row_ids(row))
+        if self.index.get(old_key) == row:
+            del self.index[old_key]
+        start = row * self.width
+        self.ids[start:start + self.width] = array("i", list(ids) + [NO_ID] * (self.width - len(ids)))
+        self.lengths[row] = len(ids)
+        self.index[pack_ids(ids)] = row
+
+    def row_ids(self, row: int) -> tuple[int, ...]:
+        """Return the ids of the tokens of a row."""
+        start = row * self.width
+        return tuple(self.ids[start:start + self.lengths[row]])
+
+    def row_tokens(self, row: int) -> list[str]:
+        """Return the tokens of a row."""
+        words = self.words
+        return [words[word_id] for word_id in self.row_ids(row)]
+
+    def row_key(self, row: int) -> str:
+        """Return the string of a row, as used for the keys of the n-gram dictionary."""
+        return " ".join(self.row_tokens(row))
+
+    # Counting
+    def count_n_grams(self, ids: list[int], max_size: int = MAX_N_GRAM_SIZE, num_starts: int = None) -> None:
+        """
+        Count in one pass all the n-grams of size 2 to max_size of a list of token ids.
+        An n-gram cannot start or end with a stop word. The key of the n-grams starting at a position is
+        extended one token at a time, so no list of tokens or string is built to count an n-gram: the ids
+        are only copied in the table the first time the n-gram is seen.
+        Parameters:
+            ids (list[int]): The ids of the tokens in reading order.
+            max_size (int): The size of the longest n-grams.
+            num_starts (int): Only count the n-grams starting in the first num_starts positions (all if None).
+        """
+        is_stop = self.is_stop
+        index = self.index
+        frequencies = self.frequencies
+        num_ids = len(ids)
+        for start in range(num_ids if num_starts is None else num_starts):
+            first = ids[start]
+            if is_stop[first]:
+                continue
+            key = first + 1
+            for end in range(start + 1, min(start + max_size, num_ids)):
+                last = ids[end]
+                key = (key << ID_BITS) | (last + 1)
+                if is_stop[last]:
+                    continue
+                row = index.get(key)
+                if row is None:
+                    self.append(tuple(ids[start:end + 1]), end + 1 - start, 1, key)
+                else:
+                    frequencies[row] += 1
+
+    def count_n_gram_chunks(self, chunks: Iterable[list[str]], max_size: int = MAX_N_GRAM_SIZE,
+                            lookahead: list[str] = ()) -> None:
+        """
+        Count the n-grams of a stream of token chunks, as count_n_grams(encode(all the tokens)) would.
+        The last max_size-1 ids of a chunk are carried to the next one, so the n-grams crossing the boundary
+        of two chunks are counted once, and only one chunk of tokens is in memory at a time.
+        Parameters:
+            chunks (Iterable[list[str]]): The tokens in reading order, one chunk at a time.
+            max_size (int): The size of the longest n-grams.
+            lookahead (list[str]): The tokens that follow the stream (for a shard of a corpus): they complete
+                the n-grams starting at the end of the stream, but no n-gram starting in them is counted.
+        """
+        overlap: int = max_size - 1
+        carry: list[int] = []
+        for tokens in chunks:
+            ids: list[int] = carry + self.encode(tokens)
+            # The n-grams starting before the overlap have all their tokens in ids
+            num_starts: int = len(ids) - overlap
+            if num_starts > 0:
+                self.count_n_grams(ids, max_size, num_starts)
+                carry = ids[num_starts:]
+            else:
+                carry = ids
+        self.count_n_grams(carry + self.encode(lookahead[:overlap]), max_size, len(carry))
+
+    def count_boundary_n_grams(self, ids: list[int], boundary: int, max_size: int = MAX_N_GRAM_SIZE) -> None:
+        """
+        Count the n-grams of a list of ids that start before the position boundary and end at or after it,
+        for example the n-grams crossing the boundary between two documents counted separately.
+        Parameters:
+            ids (list[int]): The ids of the end of the first part followed by the start of the second part.
+            boundary (int): The position of the first id of the second part.
+            max_size (int): The size of the longest n-grams.
+        """
+        is_stop = self.is_stop
+        index = self.index
+        frequencies = self.frequencies
+        num_ids = len(ids)
+        for start in range(max(0, boundary - max_size + 1), boundary):
+            first = ids[start]
+            if is_stop[first]:
+                continue
+            key = first + 1
+            for end in range(start + 1, min(start + max_size, num_ids)):
+                last = ids[end]
+                key = (key << ID_BITS) | (last + 1)
+                if end < boundary or is_stop[last]:
+                    continue
+                row = index.get(key)
+                if row is None:
+                    self.append(tuple(ids[start:end + 1]), end + 1 - start, 1, key)
+                else:
+                    frequencies[row] += 1
+
+    def link_children(self, rows: np.ndarray = None) -> None:
+        """
+        Find the rows of the left and right (n-1)-grams of every n-gram (NO_ID when they are not in the table).
+        The keys of the (n-1)-grams are obtained from the key of the n-gram by dropping its last or first id.
+        Parameters: rows (np.ndarray): Only link these rows, the others keep NO_ID (all the rows if None).
+        """
+        num_rows: int = len(self)
+        left_rows: array = array("i", [NO_ID]) * num_rows
+        right_rows: array = array("i", [NO_ID]) * num_rows
+        masks: list[int] = [(1 << (ID_BITS * size)) - 1 for size in range(self.width)]
+        index = self.index
+        lengths = self.lengths
+        items = index.items() if rows is None else ((pack_ids(self.row_ids(row)), row) for row in rows.tolist())
+        for key, row in items:
+            length = lengths[row]
+            if length < 2:
+                continue
+            left_rows[row] = index.get(key >> ID_BITS, NO_ID)
+            right_rows[row] = index.get(key & masks[length - 1], NO_ID)
+        self.left_rows = left_rows
+        self.right_rows = right_rows
+
+    def parents(self, row: int) -> list[int]:
+        """Return the rows of the (n+1)-grams that have the given row as a valid (n-1)-gram."""
+        if self._parents is None:
+            self._parents = {}
+            for parent in range(len(self.left_children)):
+                for child in {self.left_children[parent], self.right_children[parent]}:
+                    if child != NO_ID:
+                        self._parents.setdefault(child, []).append(parent)
+        return self._parents.get(row, [])
+
+    # LocalMaxs
+    def calculate_and_store_glue(self, glue_function: str, stop_words: StopWordSet, min_frequency: int = None) -> None:
+        """
+        Compute the glue of every n-gram of the table and the max glue of its (n-1)-grams and (n+1)-grams.
+        Only the max values are stored, the neighbour glues are derived from the children columns when asked.
+
+        With a min_frequency, the n-grams less frequent than it are pruned: they are not LocalMaxs candidates, and
+        their glue is only computed when they have a candidate as (n-1)-gram (it is part of the max(n+1) of the
+        candidate). The glue and the max glues of the candidates are the same as without pruning, the other n-grams
+        keep a glue of 0.0 or incomplete max glues. What was pruned is reported in self.pruning_report.
+        Parameters:
+            glue_function (str): The glue function to use ("scp", "dice", "mi").
+            stop_words (StopWordSet): Stop words that the (n-1)-grams cannot start or end with.
+            min_frequency (int): The minimum frequency of the LocalMaxs candidates (no pruning if None; 3 is the
+                frequency > 2 rule of LocalMaxs, so the relevant expressions do not change).
+        """
+        if self.prefilter_frequency is not None and glue_function not in PREFILTER_GLUE_FUNCTIONS:
+            raise ValueError(
+                f"The {glue_function} glue depends on the number of n-grams, which a prefiltered table does not hold; "
+                f"use one of {PREFILTER_GLUE_FUNCTIONS} or count every n-gram."
+            )
+        num_rows: int = len(self)
+        total_count: int = num_rows
+        stop_words = as_stop_word_set(stop_words)
+        is_stop: bytearray = self.is_stop if stop_words == self.stop_words else stop_words.flags(self.words)
+        seconds: dict[str, float] = {}
+        start: float = time.perf_counter()
+        linked: np.ndarray = None if min_frequency is None else self._pruned_rows(min_frequency)
+        seconds["selection"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.link_children(linked)
+        seconds["links"] = time.perf_counter() - start
+
+        # Glue of all the (linked) n-grams at once, from their frequency and the frequencies of their left and right (n-1)-grams
+        start = time.perf_counter()
+        frequencies = np.frombuffer(self.frequencies, dtype=np.int64)
+        left = np.frombuffer(self.left_rows, dtype=np.int32)
+        right = np.frombuffer(self.right_rows, dtype=np.int32)
+        lengths = np.frombuffer(self.lengths, dtype=np.int8)
+        glued = slice(None) if linked is None else linked
+        freq_left = np.where(left[glued] != NO_ID, frequencies[left[glued]], 1)
+        freq_right = np.where(right[glued] != NO_ID, frequencies[right[glued]], 1)
+        glue_values = np.zeros(num_rows)
+        glue_values[glued] = batch_glue(glue_function, frequencies[glued], freq_left, freq_right, total_count)
+        glue_values[lengths < 2] = 0.0
+        seconds["glue"] = time.perf_counter() - start
+        glues = array("d")
+        glues.frombytes(glue_values.tobytes())
+        self.glues = glues
+
+        # The (n-1)-grams used by LocalMaxs cannot start or end with a stop word
+        ids = np.frombuffer(self.ids, dtype=np.int32).reshape(num_rows, self.width)
+        stop = np.frombuffer(is_stop, dtype=np.uint8).astype(bool)
+        rows = np.arange(num_rows)
+        has_children = (np.frombuffer(self.sizes, dtype=np.int8) > 2) & (lengths > 2)
+        first, second = ids[:, 0], ids[:, min(1, self.width - 1)]
+        last = ids[rows, np.maximum(lengths - 1, 0)]
+        before_last = ids[rows, np.maximum(lengths - 2, 0)]
+        valid_left = has_children & (left != NO_ID) & ~stop[first] & ~stop[before_last]
+        valid_right = has_children & (right != NO_ID) & ~stop[second] & ~stop[last]
+        left_children: array = array("i")
+        left_children.frombytes(np.where(valid_left, left, NO_ID).astype(np.int32).tobytes())
+        right_children: array = array("i")
+        right_children.frombytes(np.where(valid_right, right, NO_ID).astype(np.int32).tobytes())
+
+        # Max glue of the (n-1)-grams and (n+1)-grams of each n-gram, 0.0 when there is none
+        # (the rows that are not linked have no children, so they add nothing to the max glues)
+        self.left_children = left_children
+        self.right_children = right_children
+        start = time.perf_counter()
+        self.calculate_max_glues()
+        seconds["max glues"] = time.perf_counter() - start
+        self._parents = None
+        self.pruning_report = None if linked is None else PruningReport(
+            min_frequency, num_rows, int(np.count_nonzero(frequencies >= min_frequency)), len(linked), seconds
+        )
+
+    def _pruned_rows(self, min_frequency: int) -> np.ndarray:
+        """
+        Return the rows kept by the pruning of calculate_and_store_glue: the n-grams of frequency >= min_frequency
+        and the n-grams having one of them as left or right (n-1)-gram. The (n-1)-grams are matched by the
+        row_hashes hash of their ids, computed only for the n-grams whose first (or second) id starts a candidate;
+        a collision only keeps an extra row.
+        """
+        num_rows: int = len(self)
+        ids = np.frombuffer(self.ids, dtype=np.int32).reshape(num_rows, self.width)
+        lengths = np.frombuffer(self.lengths, dtype=np.int8)
+        candidates = np.frombuffer(self.frequencies, dtype=np.int64) >= min_frequency
+        candidate_hashes = np.unique(row_hashes(ids[candidates]))
+        first_ids = np.unique(ids[candidates, 0])
+        parents = np.zeros(num_rows, dtype=bool)
+        # Left (n-1)-gram: the ids without the last one
+        rows = np.flatnonzero((lengths > 2) & ~candidates & np.isin(ids[:, 0], first_ids))
+        left_ids = ids[rows]
+        left_ids[np.arange(len(rows)), lengths[rows].astype(np.int64) - 1] = NO_ID
+        parents[rows[np.isin(row_hashes(left_ids), candidate_hashes)]] = True
+        # Right (n-1)-gram: the ids without the first one
+        rows = np.flatnonzero((lengths > 2) & ~candidates & np.isin(ids[:, min(1, self.width - 1)], first_ids))
+        right_ids = np.concatenate([ids[rows, 1:], np.full((len(rows), 1), NO_ID, dtype=np.int32)], axis=1)
+        parents[rows[np.isin(row_hashes(right_ids), candidate_hashes)]] = True
+        return np.flatnonzero(candidates | parents)
+
+    def calculate_max_glues(self) -> None:
+        """
+        Compute for every n-gram the max glue of its (n-1)-grams and of its (n+1)-grams (0.0 when there is none)
+        with grouped reductions over the child -> parent edges: a max over the two children of each row, and a
+        scatter-max of the glue of each parent into its children.
+        """
+        num_rows: int = len(self)
+        glues = np.frombuffer(self.glues, dtype=np.float64)
+        parents = np.concatenate([np.arange(num_rows), np.arange(num_rows)])
+        children = np.concatenate([np.frombuffer(self.left_children, dtype=np.int32), np.frombuffer(self.right_children, dtype=np.int32)])
+        valid = children != NO_ID
+        parents, children = parents[valid], children[valid]
+
+        max_minus_1 = np.full(num_rows, -np.inf)
+        np.maximum.at(max_minus_1, parents, glues[children])
+        max_plus_1 = np.full(num_rows, -np.inf)
+        np.maximum.at(max_plus_1, children, glues[parents])
+
+        max_minus_1[max_minus_1 == -np.inf] = 0.0
+        max_plus_1[max_plus_1 == -np.inf] = 0.0
+        self.max_glues_minus_1 = array("d")
+        self.max_glues_minus_1.frombytes(max_minus_1.tobytes())
+        self.max_glues_plus_1 = array("d")
+        self.max_glues_plus_1.frombytes(max_plus_1.tobytes())
+
+    def local_maxs(self, p: float = 2) -> tuple[np.ndarray, list[str]]:
+        """
+        Apply the LocalMaxs rule to every n-gram of the table at once: an n-gram is a relevant expression if
+        glue >= ((max(n-1)^p + max(n+1)^p) / 2)^(1/p) and frequency > 2, as in n_gram.localMax.
+        The relevance flags of the table are updated.
+        Parameters:
+            p (float): The exponent of the power mean.
+        Returns: tuple[np.ndarray, list[str]]: The boolean mask of the relevant rows and the relevant expressions.
+        """
+        glues = np.frombuffer(self.glues, dtype=np.float64)
+        max_minus_1 = np.frombuffer(self.max_glues_minus_1, dtype=np.float64)
+        max_plus_1 = np.frombuffer(self.max_glues_plus_1, dtype=np.float64)
+        frequencies = np.frombuffer(self.frequencies, dtype=np.int64)
+
+        with np.errstate(invalid="ignore"):
+            formula = ((max_minus_1 ** p + max_plus_1 ** p) / 2) ** (1 / p)
+        mask = (glues >= formula) & (frequencies > 2)
+        if self.pruning_report is not None:
+            # The pruned n-grams are not candidates
+            mask &= frequencies >= self.pruning_report.min_frequency
+
+        self.relevant = bytearray(mask.astype(np.uint8).tobytes())
+        return mask, [self.row_key(row) for row in np.flatnonzero(mask)]
+
+
+##################################################################
+# Compact n-gram counts, merged across processes
+###################################################################
+
+class NGramCounts:
+    """
+    The vocabulary, ids and frequencies of the n-grams of a table, without its index and other columns.
+    This is what a worker process sends back when the n-grams are counted in parallel: it is a few NumPy arrays,
+    cheap to pickle, and the counts of consecutive shards of a corpus are merged with merge().
+
+    The words and the rows are kept in the order of their first occurrence. Merging the counts of consecutive
+    shards in reading order therefore gives the same vocabulary ids and the same rows as counting the whole
+    corpus in one table.
+    """
+
+    def __init__(self, words: list[str], ids: np.ndarray, lengths: np.ndarray, frequencies: np.ndarray) -> None:
+        self.words: list[str] = words
+        # One row of width ids per n-gram (padded with NO_ID), its length and its frequency
+        self.ids: np.ndarray = ids
+        self.lengths: np.ndarray = lengths
+        self.frequencies: np.ndarray = frequencies
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    @property
+    def width(self) -> int:
+        return self.ids.shape[1]
+
+    @classmethod
+    def from_table(cls, table: NGramTable) -> "NGramCounts":
+        """Return the counts of a table."""
+        return cls(
+            list(table.words),
+            np.array(table.ids, dtype=np.int32).reshape(-1, table.width),
+            np.array(table.lengths, dtype=np.int8),
+            np.array(table.frequencies, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_keys(cls, words: list[str], counts: dict[int, int], width: int = MAX_N_GRAM_SIZE) -> "NGramCounts":
+        """
+        Return the counts of a dictionary key -> frequency (see count_n_gram_keys). The bytes of a key are its cells
+        id+1 right-aligned in big-endian, so the rows of ids are unpacked for all the keys at once.
+        """
+        size: int = width * ID_BITS // 8
+        data: bytes = b"".join(key.to_bytes(size, "big") for key in counts)
+        cells: np.ndarray = np.frombuffer(data, dtype=">u%d" % (ID_BITS // 8)).reshape(-1, width).astype(np.int64)
+        lengths: np.ndarray = np.count_nonzero(cells, axis=1)
+        columns: np.ndarray = np.arange(width)[None, :]
+        source: np.ndarray = np.minimum(columns + (width - lengths)[:, None], width - 1)
+        ids: np.ndarray = np.where(columns < lengths[:, None], np.take_along_axis(cells, source, axis=1) - 1, NO_ID)
+        frequencies: np.ndarray = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        return cls(words, ids.astype(np.int32), lengths.astype(np.int8), frequencies)
+
+    def merge(self, other: "NGramCounts") -> "NGramCounts":
+        """
+        Add the counts of the shard that follows this one in the corpus and return the merged counts.
+        The new words and n-grams of other are appended after the ones of this shard.
+        """
+        return NGramCounts.merge_all([self, other])
+
+    @classmethod
+    def merge_all(cls, counts: list["NGramCounts"]) -> "NGramCounts":
+        """
+        Merge the counts of consecutive shards of a corpus at once, keeping the order of the first occurrences.
+        The rows are matched by sorting a 64-bit hash of their ids, so no Python object is built per n-gram.
+        Rows with the same hash are compared, and in the (very unlikely) case of a collision between different
+        rows, the rows are matched by sorting their bytes instead.
+        """
+        if not counts:
+            raise ValueError("There are no counts to merge.")
+        width: int = counts[0].width
+        if any(count.width != width for count in counts):
+            raise ValueError("Cannot merge counts of different widths.")
+        words: list[str] = []
+        vocabulary: dict[str, int] = {}
+        ids_parts: list[np.ndarray] = []
+        for count in counts:
+            # Ids of the words of the shard in the merged vocabulary (the last cell maps NO_ID to itself)
+            remap: np.ndarray = np.empty(len(count.words) + 1, dtype=np.int32)
+            remap[-1] = NO_ID
+            for word_id, word in enumerate(count.words):
+                merged_id = vocabulary.get(word)
+                if merged_id is None:
+                    merged_id = len(words)
+                    vocabulary[word] = merged_id
+                    words.append(word)
+                remap[word_id] = merged_id
+            ids_parts.append(remap[count.ids])
+        ids: np.ndarray = np.concatenate(ids_parts)
+        lengths: np.ndarray = np.concatenate([count.lengths for count in counts])
+        all_frequencies: np.ndarray = np.concatenate([count.frequencies for count in counts])
+
+        first, inverse = _first_occurrences(ids)
+        # Number the distinct rows in the order of their first occurrence
+        order: np.ndarray = np.argsort(first, kind="stable")
+        rank: np.ndarray = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        frequencies: np.ndarray = np.zeros(len(order), dtype=np.int64)
+        np.add.at(frequencies, rank[inverse], all_frequencies)
+        kept: np.ndarray = first[order]
+        return cls(words, ids[kept], lengths[kept], frequencies)
+
+    def without_stop_words(self, stop_words: StopWordSet) -> "NGramCounts":
+        """Return the counts of the n-grams that neither start nor end with a stop word, in the same order."""
+        stop_words = as_stop_word_set(stop_words)
+        is_stop: np.ndarray = np.frombuffer(bytes(stop_words.flags(self.words)) or b"\0", dtype=np.uint8).astype(bool)
+        rows: np.ndarray = np.arange(len(self))
+        first: np.ndarray = self.ids[:, 0]
+        last: np.ndarray = self.ids[rows, self.lengths.astype(np.int64) - 1]
+        kept: np.ndarray = ~(is_stop[first] | is_stop[last])
+        return NGramCounts(self.words, self.ids[kept], self.lengths[kept], self.frequencies[kept])
+
+    def keys(self) -> list[int]:
+        """
+        Return the key of every row (see pack_ids). The cells id+1 of a row (0 for the padding) are written as
+        big-endian unsigned integers: the integer of these bytes is the key shifted by the padding cells.
+        """
+        num_rows, width = self.ids.shape
+        data: bytes = (self.ids.astype(np.int64) + 1).astype(">u%d" % (ID_BITS // 8)).tobytes()
+        shifts: list[int] = ((width - self.lengths.astype(np.int64)) * ID_BITS).tolist()
+        size: int = width * ID_BITS // 8
+        return [int.from_bytes(data[row * size:(row + 1) * size], "big") >> shifts[row] for row in range(num_rows)]
+
+    def to_table(self, stop_words: StopWordSet = None) -> NGramTable:
+        """Build an NGramTable holding these counts."""
+        table = NGramTable(self.width, stop_words)
+        for word in self.words:
+            table.intern(word)
+        num_rows: int = len(self)
+        table.ids = array("i", self.ids.astype(np.int32).tobytes())
+        table.lengths = array("b", self.lengths.astype(np.int8).tobytes())
+        table.sizes = array("b", table.lengths)
+        table.frequencies = array("q", self.frequencies.astype(np.int64).tobytes())
+        table.glues = array("d", bytes(8 * num_rows))
+        table.max_glues_minus_1 = array("d", bytes(8 * num_rows))
+        table.max_glues_plus_1 = array("d", bytes(8 * num_rows))
+        table.relevant = bytearray(num_rows)
+        table.index = {key: row for row, key in enumerate(self.keys())}
+        return table
+
+# Random odd multipliers of the cells of a row in its 64-bit hash
+_ROW_HASH_MULTIPLIERS: np.ndarray = np.random.default_rng(0x5EED).integers(1, 2 ** 63, MAX_N_GRAM_SIZE * 4, dtype=np.uint64) | np.uint64(1)
+
+# Function to hash the rows of a matrix of ids
+def row_hashes(ids: np.ndarray) -> np.ndarray:
+    """Return a 64-bit hash of each row of a matrix of ids (padded with NO_ID), computed for all the rows at once."""
+    cells: np.ndarray = (ids.astype(np.int64) + 1).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        return _mix_row_sums((cells * _ROW_HASH_MULTIPLIERS[:ids.shape[1]]).sum(axis=1, dtype=np.uint64))
+
+# Function to turn the weighted sums of the cells of rows into their hashes (see row_hashes)
+def _mix_row_sums(sums: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        hashes: np.ndarray = sums ^ (sums >> np.uint64(31))
+        hashes *= np.uint64(0x9E3779B97F4A7C15)
+    return hashes
+
+# Function to iterate over the hashes of the n-grams starting at every position, one size at a time
+def _iter_window_hashes(ids: np.ndarray, max_size: int) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yield (size, hashes) for the sizes 1 to max_size, hashes[i] being the row_hashes hash of the n-gram of that size
+    starting at position i. The sums of the cells are extended by one token per size, as the keys in count_n_grams.
+    """
+    cells: np.ndarray = (ids.astype(np.int64) + 1).astype(np.uint64)
+    sums: np.ndarray = np.zeros(len(ids) + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for size in range(1, min(max_size, len(ids)) + 1):
+            sums = sums[:-1] + cells[size - 1:] * _ROW_HASH_MULTIPLIERS[size - 1]
+            yield size, _mix_row_sums(sums)
+
+# Function to iterate over the hashes of the n-grams starting in consecutive chunks of positions
+def _iter_chunk_hashes(ids: np.ndarray, boundary: np.ndarray, max_size: int,
+                       chunk_size: int) -> Iterator[tuple[int, int, Iterator[tuple[int, np.ndarray, np.ndarray]]]]:
+    """
+    Yield (start, num_starts, sizes) for each chunk of chunk_size positions, sizes yielding (size, hashes, valid) for
+    the sizes 1 to max_size: the hashes of the n-grams starting in the chunk and in the max_size - 1 next positions
+    (the first num_starts are the ones of the chunk), and whether they neither start nor end with a stop word.
+    Only the ids of one chunk are hashed at a time.
+    """
+    for start in range(0, len(ids), chunk_size):
+        end: int = min(start + chunk_size + max_size - 1, len(ids))
+        window_boundary: np.ndarray = boundary[start:end]
+        sizes = (
+            (size, hashes, window_boundary[:len(hashes)] & window_boundary[size - 1:])
+            for size, hashes in _iter_window_hashes(ids[start:end], max_size)
+        )
+        yield start, min(chunk_size, len(ids) - start), sizes
+
+# Function to count only the n-grams that LocalMaxs needs, after estimating the counts with a count-min sketch
+def count_frequent_n_grams(words: list[str], ids: list[int], is_stop: bytearray, min_frequency: int = 3,
+                           max_size: int = MAX_N_GRAM_SIZE, depth: int = 4, chunk_size: int = 1 << 16,
+                           width: int = None) -> NGramCounts:
+    """
+    Count the n-grams of a list of ids like count_n_grams, keeping only the rows that the LocalMaxs of the
+    frequent n-grams uses, in four passes over the ids with no Python object per n-gram.
+
+    The first pass adds every n-gram to a count-min sketch. The second pass counts exactly the n-grams whose estimate
+    is at least min_frequency (the estimate is never below the true count, so no frequent n-gram is missed), and the
+    candidates are the ones whose exact count is at least min_frequency: an estimate inflated by collisions does not
+    make a candidate, so every sub-n-gram of a candidate is a candidate. In the third pass, the kept rows are the
+    candidates and the n-grams having a candidate as left or right (n-1)-gram (their glue is part of the max(n+1) of
+    the candidate), and the fourth pass adds the (n-1)-grams of the latter (their frequency is part of that glue). The kept rows have their exact
+    frequency and are in the order of count_n_grams, so with min_frequency <= 3 (the frequency > 2 rule of
+    LocalMaxs) and a glue that does not depend on the number of rows (dice), the relevant expressions are the same
+    as with the table of all the n-grams. The positions are hashed by chunks, so apart from the ids the memory is
+    the sketch (one byte per occurrence and row) and the kept occurrences.
+    Parameters:
+        words (list[str]): The vocabulary of the ids.
+        ids (list[int]): The ids of the tokens in reading order.
+        is_stop (bytearray): The stop word flag of each id.
+        min_frequency (int): The minimum frequency of the candidates.
+        max_size (int): The size of the longest n-grams.
+        depth (int): The number of rows of the count-min sketch.
+        chunk_size (int): The number of positions hashed at a time.
+        width (int): The number of counters of each row of the sketch (by default the number of occurrences).
+    Returns: NGramCounts: The counts of the kept n-grams.
+    """
+    ids_array: np.ndarray = np.asarray(ids, dtype=np.int32)
+    num_ids: int = len(ids_array)
+    # Whether the token at each position can start or end an n-gram
+    boundary: np.ndarray = ~np.frombuffer(bytes(is_stop) or b"\0", dtype=np.uint8).astype(bool)[ids_array]
+
+    # First pass: estimated count of every n-gram, in about one uint8 counter per occurrence and row
+    num_occurrences: int = sum(
+        int(np.count_nonzero(boundary[:num_ids - size + 1] & boundary[size - 1:])) for size in range(2, min(max_size, num_ids) + 1)
+    )
+    sketch = CountMinSketch(num_occurrences if width is None else width, depth, np.uint8)
+    for _, num_starts, sizes in _iter_chunk_hashes(ids_array, boundary, max_size, chunk_size):
+        for size, hashes, valid in sizes:
+            if size >= 2:
+                sketch.add_hashes(hashes[:num_starts][valid[:num_starts]])
+
+    # Second pass: exact count of the n-grams whose estimate reaches min_frequency, the candidates being the sorted
+    # hashes of the ones whose count does
+    empty: tuple[np.ndarray, np.ndarray] = (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64))
+    estimated: dict[int, list[tuple[np.ndarray, np.ndarray]]] = {size: [empty] for size in range(2, max_size + 1)}
+    for _, num_starts, sizes in _iter_chunk_hashes(ids_array, boundary, max_size, chunk_size):
+        for size, hashes, valid in sizes:
+            if size >= 2:
+                starting: np.ndarray = hashes[:num_starts][valid[:num_starts]]
+                estimated[size].append(np.unique(starting[sketch.estimate_hashes(starting) >= min_frequency], return_counts=True))
+    del sketch
+    confirmed: dict[int, np.ndarray] = {}
+    for size, parts in estimated.items():
+        unique, inverse = np.unique(np.concatenate([hashes for hashes, _ in parts]), return_inverse=True)
+        counts: np.ndarray = np.bincount(inverse.ravel(), weights=np.concatenate([counts for _, counts in parts]), minlength=len(unique))
+        confirmed[size] = unique[counts >= min_frequency]
+    del estimated
+
+    # Third pass: the candidates and their (n+1)-grams, and the hashes of the (n-1)-grams of the latter
+    kept_starts: dict[int, list[np.ndarray]] = {size: [] for size in range(2, max_size + 1)}
+    needed: dict[int, np.ndarray] = {}
+    for start, num_starts, sizes in _iter_chunk_hashes(ids_array, boundary, max_size, chunk_size):
+        previous_hashes: np.ndarray = None
+        previous_candidates: np.ndarray = None
+        for size, hashes, valid in sizes:
+            candidates: np.ndarray = np.zeros(len(hashes), dtype=bool)
+            if size >= 2:
+                candidates[valid] = _in_sorted(hashes[valid], confirmed[size])
+            kept: np.ndarray = candidates[:num_starts].copy()
+            if size >= 3:
+                count: int = len(kept)
+                parents: np.ndarray = (valid[:count] & ~kept & (previous_candidates[:count] | previous_candidates[1:count + 1]))
+                kept |= parents
+                children: np.ndarray = np.concatenate([previous_hashes[:count][parents], previous_hashes[1:count + 1][parents]])
+                needed[size - 1] = np.union1d(needed.get(size - 1, children[:0]), children)
+            if size >= 2:
+                kept_starts[size].append(start + np.flatnonzero(kept))
+            previous_hashes, previous_candidates = hashes, candidates
+
+    # Fourth pass: every occurrence of the needed (n-1)-grams
+    if needed:
+        for start, num_starts, sizes in _iter_chunk_hashes(ids_array, boundary, max_size - 1, chunk_size):
+            for size, hashes, valid in sizes:
+                if size in needed:
+                    found: np.ndarray = valid[:num_starts] & np.isin(hashes[:num_starts], needed[size])
+                    kept_starts[size].append(start + np.flatnonzero(found))
+
+    # Rows of the kept occurrences in the order of count_n_grams (by start, then by size), grouped by their ids
+    all_starts: list[np.ndarray] = [np.zeros(0, dtype=np.int64)]
+    all_sizes: list[np.ndarray] = [np.zeros(0, dtype=np.int64)]
+    for size, parts in kept_starts.items():
+        positions: np.ndarray = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+        all_starts.append(positions)
+        all_sizes.append(np.full(len(positions), size, dtype=np.int64))
+    starts: np.ndarray = np.concatenate(all_starts)
+    lengths: np.ndarray = np.concatenate(all_sizes)
+    order: np.ndarray = np.lexsort((lengths, starts))
+    starts, lengths = starts[order], lengths[order]
+    columns: np.ndarray = np.arange(max_size)[None, :]
+    cells: np.ndarray = np.minimum(starts[:, None] + columns, max(num_ids - 1, 0))
+    rows: np.ndarray = np.where(columns < lengths[:, None], ids_array[cells], NO_ID).astype(np.int32)
+    first, inverse = _first_occurrences(rows)
+    order = np.argsort(first, kind="stable")
+    rank: np.ndarray = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    frequencies: np.ndarray = np.bincount(rank[inverse], minlength=len(order)).astype(np.int64)
+    kept_rows: np.ndarray = first[order]
+    return NGramCounts(list(words), rows[kept_rows], lengths[kept_rows].astype(np.int8), frequencies)
+
+# Function to test whether values are in a sorted array
+def _in_sorted(values: np.ndarray, sorted_values: np.ndarray) -> np.ndarray:
+    positions: np.ndarray = np.minimum(np.searchsorted(sorted_values, values), max(len(sorted_values) - 1, 0))
+    return sorted_values[positions] == values if len(sorted_values) else np.zeros(len(values), dtype=bool)
+
+# Function to find the distinct rows of a matrix of ids
+def _first_occurrences(ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return, for each distinct row of ids, the position of its first occurrence, and for each row the number
+    of its distinct row (as np.unique(..., return_index=True, return_inverse=True) on the rows, in any order).
+    """
+    num_rows, width = ids.shape
+    if num_rows == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    hashes: np.ndarray = row_hashes(ids)
+    order: np.ndarray = np.argsort(hashes)
+    sorted_hashes: np.ndarray = hashes[order]
+    same: np.ndarray = sorted_hashes[1:] == sorted_hashes[:-1]
+    sorted_rows: np.ndarray = ids[order]
+    if not np.array_equal(sorted_rows[1:][same], sorted_rows[:-1][same]):
+        # Two different rows have the same hash: match the rows by their bytes
+        rows: np.ndarray = np.ascontiguousarray(ids).view(np.dtype((np.void, ids.dtype.itemsize * width))).ravel()
+        _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        return first, inverse.ravel()
+    starts: np.ndarray = np.flatnonzero(np.concatenate([[True], ~same]))
+    groups: np.ndarray = np.cumsum(np.concatenate([[True], ~same])) - 1
+    inverse: np.ndarray = np.empty(num_rows, dtype=np.int64)
+    inverse[order] = groups
+    first: np.ndarray = np.minimum.reduceat(order, starts)
+    return first, inverse
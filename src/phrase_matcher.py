@@ -0,0 +1,72 @@
+from collections import deque
+from typing import Iterator
+
+##################################################################
+# Token-level Aho-Corasick automaton matching many expressions in one pass
+###################################################################
+
+class PhraseMatcher:
+    """
+    Find every occurrence of a list of multi-word expressions in a list of tokens, in one pass over the tokens
+    whatever the number of expressions (Aho-Corasick automaton whose symbols are tokens instead of characters).
+
+    The automaton is a trie of the expressions: each state is a prefix of an expression, with its transitions
+    token -> state, its failure link (the state of its longest proper suffix that is a prefix of an expression)
+    and the expressions that end at that state, including the ones ending at the states of its failure links.
+    """
+
+    def __init__(self, expressions: list[str]) -> None:
+        """
+        Parameters: expressions (list[str]): The expressions (tokens separated by spaces); duplicates are ignored.
+        """
+        self.expressions: list[str] = list(dict.fromkeys(expressions))
+        self.lengths: list[int] = [len(expression.split()) for expression in self.expressions]
+        self.transitions: list[dict[str, int]] = [{}]
+        self.outputs: list[list[int]] = [[]]
+        for expression_id, expression in enumerate(self.expressions):
+            state: int = 0
+            for token in expression.split():
+                next_state = self.transitions[state].get(token)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][token] = next_state
+                    self.transitions.append({})
+                    self.outputs.append([])
+                state = next_state
+            if state:
+                self.outputs[state].append(expression_id)
+
+        # Failure links, in breadth-first order so that the link of a state is computed before its children
+        # (the states of one token fail to the root)
+        self.failures: list[int] = [0] * len(self.transitions)
+        queue: deque[int] = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.transitions[state].items():
+                failure: int = self.failures[state]
+                while failure and token not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                self.failures[child] = self.transitions[failure].get(token, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.failures[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.expressions)
+
+    def find_all(self, tokens: list[str]) -> Iterator[tuple[int, int]]:
+        """
+        Iterate over the occurrences of the expressions in a list of tokens.
+        Yields: tuple[int, int]: The position of the first token of the occurrence and the index of the expression
+            in self.expressions, in the order of the end of the occurrences.
+        """
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+        lengths = self.lengths
+        state: int = 0
+        for position, token in enumerate(tokens):
+            while state and token not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(token, 0)
+            for expression_id in outputs[state]:
+                yield position - lengths[expression_id] + 1, expression_id
@@ -0,0 +1,211 @@
+import io
+import json
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+##################################################################
+# Stage-level instrumentation of the extraction pipeline
+###################################################################
+
+# Function to read the peak resident set size of the process
+def peak_rss() -> int:
+    """Return the peak resident set size of the process in bytes (0 where it is not available)."""
+    if resource is None:
+        return 0
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class StageStats:
+    """
+    The measures of one stage of the pipeline: wall time, CPU time of the process, growth of the peak RSS during
+    the stage, counts of the items processed (tokens, n-grams, terms, pairs...), and, when the hooks are enabled,
+    the peak of the memory allocated by Python (tracemalloc) and the most expensive functions (cProfile).
+    """
+
+    def __init__(self, name: str, depth: int = 0) -> None:
+        self.name: str = name
+        self.depth: int = depth
+        self.wall_seconds: float = 0.0
+        self.cpu_seconds: float = 0.0
+        self.peak_rss_delta: int = 0
+        self.counts: dict[str, int] = {}
+        self.tracemalloc_peak: int = None
+        self.cprofile: str = None
+
+    def count(self, **counts: int) -> None:
+        """Add item counts to the stage, for example stage.count(tokens=len(tokens))."""
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def as_dict(self) -> dict:
+        stats: dict = {
+            "stage": self.name,
+            "depth": self.depth,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "peak_rss_delta_bytes": self.peak_rss_delta,
+            "counts": dict(self.counts),
+        }
+        if self.tracemalloc_peak is not None:
+            stats["tracemalloc_peak_bytes"] = self.tracemalloc_peak
+        if self.cprofile is not None:
+            stats["cprofile"] = self.cprofile
+        return stats
+
+class _Stage:
+    """Context manager measuring one stage of a Profiler."""
+
+    def __init__(self, profiler: "Profiler", stats: StageStats) -> None:
+        self.profiler: Profiler = profiler
+        self.stats: StageStats = stats
+        self._profile = None
+        self._tracing: bool = False
+
+    def __enter__(self) -> StageStats:
+        profiler = self.profiler
+        # The hooks measure the top-level stages only (cProfile cannot run inside another profile)
+        if not profiler._open:
+            if profiler.use_tracemalloc and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            if profiler.use_cprofile:
+                import cProfile
+                self._profile = cProfile.Profile()
+        profiler._open.append(self.stats)
+        self._rss: int = peak_rss()
+        self._cpu: float = time.process_time()
+        self._wall: float = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+        return self.stats
+
+    def __exit__(self, *exc_info) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        stats = self.stats
+        stats.wall_seconds += time.perf_counter() - self._wall
+        stats.cpu_seconds += time.process_time() - self._cpu
+        stats.peak_rss_delta += peak_rss() - self._rss
+        self.profiler._open.pop()
+        if self._tracing:
+            stats.tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if self._profile is not None:
+            import pstats
+            output = io.StringIO()
+            pstats.Stats(self._profile, stream=output).sort_stats("cumulative").print_stats(self.profiler.cprofile_lines)
+            stats.cprofile = output.getvalue()
+
+class Profiler:
+    """
+    Record the measures of the stages of a run:
+
+        profiler = Profiler()
+        with profiler.stage("create_n_grams") as stage:
+            ngram_dict = create_n_grams(tokens, stop_words)
+            stage.count(n_grams=len(ngram_dict))
+        print(profiler.format_table())
+
+    Stages can be nested (the inner ones are indented in the table). Code that does not own the stage adds its
+    counts to the innermost open stage with profiler.count(...). The functions of the pipeline take a profiler
+    that defaults to NULL_PROFILER, which records nothing and costs one method call per stage.
+    """
+
+    enabled: bool = True
+
+    def __init__(self, cprofile: bool = False, tracemalloc: bool = False, cprofile_lines: int = 15) -> None:
+        """
+        Parameters:
+            cprofile (bool): Profile each top-level stage with cProfile (the report keeps its most expensive functions).
+            tracemalloc (bool): Trace the Python allocations of each top-level stage and report their peak.
+            cprofile_lines (int): Number of functions kept from each cProfile report.
+        """
+        self.use_cprofile: bool = cprofile
+        self.use_tracemalloc: bool = tracemalloc
+        self.cprofile_lines: int = cprofile_lines
+        self.stages: list[StageStats] = []
+        self._open: list[StageStats] = []
+
+    def stage(self, name: str) -> _Stage:
+        """Return a context manager measuring a stage; it gives the StageStats of the stage."""
+        stats = StageStats(name, len(self._open))
+        self.stages.append(stats)
+        return _Stage(self, stats)
+
+    def count(self, **counts: int) -> None:
+        """Add item counts to the innermost open stage (ignored outside of a stage)."""
+        if self._open:
+            self._open[-1].count(**counts)
+
+    def report(self) -> dict:
+        """Return the measures of the stages, and the total of the top-level stages, as a JSON-serializable dict."""
+        top: list[StageStats] = [stats for stats in self.stages if stats.depth == 0]
+        return {
+            "stages": [stats.as_dict() for stats in self.stages],
+            "total": {
+                "wall_seconds": sum(stats.wall_seconds for stats in top),
+                "cpu_seconds": sum(stats.cpu_seconds for stats in top),
+                "peak_rss_bytes": peak_rss(),
+            },
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.report(), indent=indent)
+
+    def save_json(self, path: str) -> None:
+        """Write the report in a JSON file."""
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.to_json())
+
+    def format_table(self) -> str:
+        """Return the measures of the stages as a text table, one line per stage."""
+        lines: list[str] = [f"{'stage':<28} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS +MB':>12}  counts"]
+        for stats in self.stages:
+            counts: str = ", ".join(f"{name}={value}" for name, value in stats.counts.items())
+            if stats.tracemalloc_peak is not None:
+                counts = f"{counts}, " * bool(counts) + f"traced peak={stats.tracemalloc_peak / 1e6:.1f}MB"
+            name: str = "  " * stats.depth + stats.name
+            lines.append(f"{name:<28} {stats.wall_seconds:>9.3f} {stats.cpu_seconds:>9.3f} "
+                         f"{stats.peak_rss_delta / 1e6:>12.1f}  {counts}")
+        total: dict = self.report()["total"]
+        lines.append(f"{'total':<28} {total['wall_seconds']:>9.3f} {total['cpu_seconds']:>9.3f} "
+                     f"{'':>12}  peak RSS={total['peak_rss_bytes'] / 1e6:.1f}MB")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"Profiler({len(self.stages)} stages)"
+
+class _NullStage:
+    """The stage of NULL_PROFILER: measures nothing."""
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def count(self, **counts: int) -> None:
+        pass
+
+class NullProfiler(Profiler):
+    """A profiler that records nothing, the default of the pipeline functions."""
+
+    enabled: bool = False
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+    def count(self, **counts: int) -> None:
+        pass
+
+_NULL_STAGE: _NullStage = _NullStage()
+NULL_PROFILER: NullProfiler = NullProfiler()
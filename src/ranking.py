@@ -0,0 +1,34 @@
+import numpy as np
+
+##################################################################
+# Selection of the best scored terms without sorting all the scores
+###################################################################
+
+# Function to select the k entries with the highest scores
+def top_k_indices(scores: np.ndarray, ranks: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the positions of the k highest scores, from the highest to the lowest, equal scores ordered by rank.
+    The k entries are selected with np.argpartition (O(n)), then only they are sorted (O(k log k)) instead of the
+    n scores. The scores equal to the k-th one are tied at the cut-off: the ones of lowest rank are kept, so the
+    result is the first k entries of the sort by (-score, rank).
+    Parameters:
+        scores (np.ndarray): The score of each entry.
+        ranks (np.ndarray): The rank of each entry breaking the ties (for example the rank of its term in the sorted terms).
+        k (int): The number of entries to keep.
+    Returns: np.ndarray: The positions of the best k entries (all of them, ranked, if there are fewer).
+    """
+    scores = np.asarray(scores)
+    ranks = np.asarray(ranks)
+    if k <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above: np.ndarray = np.flatnonzero(scores > threshold)
+        ties: np.ndarray = np.flatnonzero(scores == threshold)
+        needed: int = k - len(above)
+        if needed < len(ties):
+            ties = ties[np.argpartition(ranks[ties], needed - 1)[:needed]]
+        selected: np.ndarray = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(scores))
+    return selected[np.lexsort((ranks[selected], -scores[selected]))]
@@ -0,0 +1,129 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from src.ngram_table import NGramTable, NGramCounts, MAX_N_GRAM_SIZE
+from src.text_processing import StopWordSet, as_stop_word_set, list_text_files, iter_token_chunks, BLOCK_SIZE
+
+##################################################################
+# Parallel n-gram counting: the corpus is split in shards of consecutive files
+###################################################################
+
+# Function to split the files of a corpus in shards of similar sizes
+def plan_shards(corpus_path: str, filenames: list[str], num_shards: int) -> list[list[str]]:
+    """
+    Split a list of files in at most num_shards groups of consecutive files with about the same number of bytes.
+    Parameters:
+        corpus_path (str): Path to the folder containing the files.
+        filenames (list[str]): The files in reading order.
+        num_shards (int): Maximum number of shards.
+    Returns: list[list[str]]: The files of each shard (no shard is empty).
+    """
+    sizes: list[int] = [os.path.getsize(os.path.join(corpus_path, filename)) for filename in filenames]
+    total: int = sum(sizes)
+    shards: list[list[str]] = []
+    current: list[str] = []
+    done: int = 0
+    for filename, size in zip(filenames, sizes):
+        current.append(filename)
+        done += size
+        # Close the shard once the files read so far fill the shards up to this one
+        if done * num_shards >= total * (len(shards) + 1) and len(shards) < num_shards - 1:
+            shards.append(current)
+            current = []
+    if current:
+        shards.append(current)
+    return shards
+
+# Function to read the first tokens of a list of files
+def read_lookahead(corpus_path: str, filenames: list[str], num_tokens: int, block_size: int = BLOCK_SIZE) -> list[str]:
+    """Return the first num_tokens tokens of the files (fewer at the end of the corpus), reading only what is needed."""
+    tokens: list[str] = []
+    if num_tokens <= 0:
+        return tokens
+    for chunk in iter_token_chunks(corpus_path, block_size, filenames=filenames):
+        tokens.extend(chunk)
+        if len(tokens) >= num_tokens:
+            break
+    return tokens[:num_tokens]
+
+# Function run by a worker process: count the n-grams of one shard
+def count_shard(corpus_path: str, filenames: list[str], next_filenames: list[str], stop_words: StopWordSet,
+                max_size: int = MAX_N_GRAM_SIZE, block_size: int = BLOCK_SIZE) -> NGramCounts:
+    """
+    Count the n-grams starting in a shard of the corpus. The first max_size-1 tokens of the following files
+    complete the n-grams that cross the end of the shard, so every n-gram of the corpus is counted by exactly
+    one shard.
+    Parameters:
+        corpus_path (str): Path to the folder containing the files.
+        filenames (list[str]): The files of the shard, in reading order.
+        next_filenames (list[str]): The files that follow the shard in the corpus.
+        stop_words (StopWordSet): The stop words that n-grams cannot start or end with.
+        max_size (int): The size of the longest n-grams.
+        block_size (int): Number of characters read at once.
+    Returns: NGramCounts: The counts of the shard.
+    """
+    table = NGramTable(stop_words=stop_words)
+    lookahead: list[str] = read_lookahead(corpus_path, next_filenames, max_size - 1, block_size)
+    table.count_n_gram_chunks(iter_token_chunks(corpus_path, block_size, filenames=filenames), max_size, lookahead)
+    return NGramCounts.from_table(table)
+
+# Function to merge the counts of consecutive shards
+def merge_counts(counts: list[NGramCounts], executor: Executor = None) -> NGramCounts:
+    """
+    Merge the counts of consecutive shards with a tree reduction: at each round, the shards are merged two by two
+    (in parallel if an executor is given), so there are log2(number of shards) rounds instead of one long chain.
+    The order of the shards is kept, so the result is the same as counting the shards one after the other.
+    """
+    if not counts:
+        raise ValueError("There are no counts to merge.")
+    while len(counts) > 1:
+        lefts: list[NGramCounts] = counts[0:len(counts) - 1:2]
+        rights: list[NGramCounts] = counts[1::2]
+        if executor is None:
+            merged: list[NGramCounts] = [left.merge(right) for left, right in zip(lefts, rights)]
+        else:
+            merged = list(executor.map(NGramCounts.merge, lefts, rights))
+        if len(counts) % 2 == 1:
+            merged.append(counts[-1])
+        counts = merged
+    return counts[0]
+
+# Function to count the n-grams of a corpus with several processes
+def count_n_grams_parallel(corpus_path: str, stop_words: StopWordSet, workers: int,
+                           max_size: int = MAX_N_GRAM_SIZE, block_size: int = BLOCK_SIZE) -> NGramTable:
+    """
+    Count the n-grams of the files of a corpus with a pool of worker processes, one shard of consecutive files each.
+    The table has the same vocabulary, rows and frequencies as the serial count (create_n_grams on text_processing).
+    Parameters:
+        corpus_path (str): Path to the folder containing the text files.
+        stop_words (StopWordSet): The stop words that n-grams cannot start or end with.
+        workers (int): Number of worker processes.
+        max_size (int): The size of the longest n-grams.
+        block_size (int): Number of characters read at once.
+    Returns: NGramTable: The n-grams of the corpus.
+    """
+    stop_words = as_stop_word_set(stop_words)
+    filenames: list[str] = list_text_files(corpus_path)
+    shards: list[list[str]] = plan_shards(corpus_path, filenames, max(1, workers))
+
+    if workers <= 1 or len(shards) <= 1:
+        table = NGramTable(stop_words=stop_words)
+        table.count_n_gram_chunks(iter_token_chunks(corpus_path, block_size, filenames=filenames), max_size)
+        return table
+
+    starts: list[int] = []
+    position: int = 0
+    for shard in shards:
+        position += len(shard)
+        starts.append(position)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        counts: list[NGramCounts] = list(executor.map(
+            count_shard,
+            [corpus_path] * len(shards),
+            shards,
+            [filenames[end:] for end in starts],
+            [stop_words] * len(shards),
+            [max_size] * len(shards),
+            [block_size] * len(shards),
+        ))
+        merged: NGramCounts = merge_counts(counts, executor)
+    return merged.to_table(stop_words)
@@ -0,0 +1,201 @@
+import hashlib
+import numpy as np
+
+##################################################################
+# Sketches estimating numbers of distinct values (HyperLogLog) and counts (count-min) in bounded memory
+###################################################################
+
+DEFAULT_PRECISION: int = 12
+
+# Function to hash strings to 64 bits, the same in every process
+def hash_strings(values: list[str]) -> np.ndarray:
+    """
+    Return a 64-bit hash of each string (BLAKE2b of its UTF-8 bytes). Unlike hash(), it does not change between
+    runs, so sketches built by different processes or on different shards can be merged.
+    """
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little") for value in values],
+        dtype=np.uint64,
+    )
+
+# Function to split hashes into a register and the rank of the first 1 bit of the remaining bits
+def _registers_and_ranks(hashes: np.ndarray, precision: int) -> tuple[np.ndarray, np.ndarray]:
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    remaining_bits: int = 64 - precision
+    registers: np.ndarray = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+    rest: np.ndarray = hashes & np.uint64((1 << remaining_bits) - 1)
+    # Bit length of the rest, exact with the two 32-bit halves (a float64 holds a 32-bit integer exactly)
+    high: np.ndarray = (rest >> np.uint64(32)).astype(np.float64)
+    low: np.ndarray = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    bit_length: np.ndarray = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+    return registers, (remaining_bits - bit_length + 1).astype(np.uint8)
+
+# Function to estimate the cardinality of each row of a matrix of registers
+def estimate_cardinalities(registers: np.ndarray) -> np.ndarray:
+    """
+    Return the HyperLogLog estimate of each row of registers (shape (rows, 2^precision)), with the linear counting
+    correction for the small cardinalities (the number of empty registers is then a better estimate).
+    """
+    registers = np.atleast_2d(registers)
+    m: int = registers.shape[1]
+    alpha: float = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw: np.ndarray = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    zeros: np.ndarray = (registers == 0).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        linear: np.ndarray = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+class HyperLogLog:
+    """
+    Estimate of the number of distinct values added, in 2^precision bytes whatever the number of values
+    (standard error about 1.04 / sqrt(2^precision): 1.6% with the default precision of 12).
+    Two sketches of the same precision are merged by keeping the maximum of each register.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision must be between 4 and 16, not {precision}")
+        self.precision: int = precision
+        self.registers: np.ndarray = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value: str) -> None:
+        """Add one string."""
+        self.add_hashes(hash_strings([value]))
+
+    def update(self, values: list[str]) -> None:
+        """Add strings."""
+        self.add_hashes(hash_strings(list(values)))
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Add values given by their 64-bit hashes (hash_strings)."""
+        registers, ranks = _registers_and_ranks(hashes, self.precision)
+        np.maximum.at(self.registers, registers, ranks)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Add the values of another sketch of the same precision."""
+        if other.precision != self.precision:
+            raise ValueError(f"cannot merge sketches of precision {self.precision} and {other.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> float:
+        """Return the estimated number of distinct values added."""
+        return float(estimate_cardinalities(self.registers)[0])
+
+class NeighborSketch:
+    """
+    The number of distinct neighbors of every word, estimated with one HyperLogLog per word, so the function
+    words do not grow with their millions of neighbors. Sketches of different shards are merged with merge().
+    The memory is 2^precision bytes per word of the vocabulary (4 KB with the default precision): it does not
+    depend on the number of distinct bigrams, but grows linearly with the vocabulary, and exceeds the exact
+    pairs unless the words have thousands of distinct neighbors on average.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision must be between 4 and 16, not {precision}")
+        self.precision: int = precision
+        self.word_ids: dict[str, int] = {}
+        self.registers: np.ndarray = np.zeros((0, 1 << precision), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def _ids(self, words: list[str]) -> np.ndarray:
+        """Return the ids of words, adding the new ones (and their empty registers)."""
+        ids: np.ndarray = np.array([self.word_ids.setdefault(word, len(self.word_ids)) for word in words], dtype=np.int64)
+        if len(self.word_ids) > len(self.registers):
+            capacity: int = max(len(self.word_ids), 2 * len(self.registers))
+            grown: np.ndarray = np.zeros((capacity, self.registers.shape[1]), dtype=np.uint8)
+            grown[:len(self.registers)] = self.registers
+            self.registers = grown
+        return ids
+
+    def add_pairs(self, words: list[str], firsts: np.ndarray, seconds: np.ndarray) -> None:
+        """
+        Add the directed pairs (word, neighbor) (words[firsts[i]], words[seconds[i]]).
+        Parameters:
+            words (list[str]): The words of the pairs.
+            firsts (np.ndarray): The index in words of the word of each pair.
+            seconds (np.ndarray): The index in words of the neighbor of each pair.
+        """
+        ids: np.ndarray = self._ids(words)
+        registers, ranks = _registers_and_ranks(hash_strings(words)[seconds], self.precision)
+        np.maximum.at(self.registers, (ids[firsts], registers), ranks)
+
+    def merge(self, other: "NeighborSketch") -> None:
+        """Add the pairs of another sketch of the same precision (for example built on another shard)."""
+        if other.precision != self.precision:
+            raise ValueError(f"cannot merge sketches of precision {self.precision} and {other.precision}")
+        ids: np.ndarray = self._ids(list(other.word_ids))
+        self.registers[ids] = np.maximum(self.registers[ids], other.registers[:len(other.word_ids)])
+
+    def counts(self) -> dict[str, int]:
+        """Return the estimated number of distinct neighbors of each word, rounded."""
+        estimates: np.ndarray = np.rint(estimate_cardinalities(self.registers[:len(self.word_ids)]))
+        return dict(zip(self.word_ids, estimates.astype(np.int64).tolist()))
+
+    def nbytes(self) -> int:
+        """Return the size of the registers of the words."""
+        return len(self.word_ids) * self.registers.shape[1]
+
+# Random odd multipliers of the rows of a count-min sketch (multiply-shift hashing of the 64-bit hashes)
+_COUNT_MIN_MULTIPLIERS: np.ndarray = np.random.default_rng(0xC0FFEE).integers(1, 2 ** 63, 16, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+class CountMinSketch:
+    """
+    Estimate of the number of occurrences of values given by their 64-bit hashes, in depth rows of width counters.
+    A value increments one counter of each row, and its estimate is the minimum of its counters: it is never below
+    the true count, and above it only when the value shares its counter with other values in every row.
+    The counters saturate at the maximum of their type (np.uint8 is enough to compare the counts to a small
+    threshold, in a quarter of the memory of np.uint32).
+    """
+
+    def __init__(self, width: int, depth: int = 4, dtype: type = np.uint32) -> None:
+        """
+        Parameters:
+            width (int): Number of counters of each row, rounded up to a power of 2.
+            depth (int): Number of rows (at most 16).
+            dtype (type): Unsigned integer type of the counters.
+        """
+        if not 1 <= depth <= len(_COUNT_MIN_MULTIPLIERS):
+            raise ValueError(f"depth must be between 1 and {len(_COUNT_MIN_MULTIPLIERS)}, not {depth}")
+        self.bits: int = max(1, (max(width, 2) - 1).bit_length())
+        self.counters: np.ndarray = np.zeros((depth, 1 << self.bits), dtype=dtype)
+
+    @property
+    def width(self) -> int:
+        return self.counters.shape[1]
+
+    @property
+    def depth(self) -> int:
+        return self.counters.shape[0]
+
+    def nbytes(self) -> int:
+        """Return the size of the counters."""
+        return self.counters.nbytes
+
+    def _columns(self, hashes: np.ndarray, row: int) -> np.ndarray:
+        with np.errstate(over="ignore"):
+            return ((np.asarray(hashes, dtype=np.uint64) * _COUNT_MIN_MULTIPLIERS[row]) >> np.uint64(64 - self.bits)).astype(np.int64)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Add one occurrence of each hash (a hash repeated n times is added n times)."""
+        maximum: int = np.iinfo(self.counters.dtype).max
+        for row in range(self.depth):
+            # Only the counters of the hashes are read and written (no array of the width of the sketch)
+            columns, counts = np.unique(self._columns(hashes, row), return_counts=True)
+            self.counters[row, columns] = np.minimum(self.counters[row, columns] + counts, maximum)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """Return the estimated number of occurrences of each hash (never below the true number)."""
+        estimates: np.ndarray = self.counters[0][self._columns(hashes, 0)]
+        for row in range(1, self.depth):
+            estimates = np.minimum(estimates, self.counters[row][self._columns(hashes, row)])
+        return estimates
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """Add the occurrences counted by a sketch of the same shape."""
+        if other.counters.shape != self.counters.shape:
+            raise ValueError(f"cannot merge sketches of shapes {self.counters.shape} and {other.counters.shape}")
+        maximum: int = np.iinfo(self.counters.dtype).max
+        self.counters = np.minimum(self.counters.astype(np.int64) + other.counters, maximum).astype(self.counters.dtype)
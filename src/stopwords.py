@@ -1,5 +1,9 @@
+import hashlib
 import os
-import matplotlib.pyplot as plt
+import re
+import numpy as np
+from src.sketches import DEFAULT_PRECISION, NeighborSketch
+from src.text_processing import StopWordSet
 
 ##################################################################
 # Stop Words Our Algorithm
@@ -16,6 +20,9 @@ EXCEPTIONS = {
     # add more known exceptions here
 }
 
+# A true diphthong, any other vowel, or the placeholder "1", is one syllable
+SYLLABLE_PATTERN: re.Pattern = re.compile(r"ai|au|ae|oi|ou|ow|[1aeiouáéíóúãõâêô]")
+
 def count_syllables(word: str) -> int:
     """
     Estimate English syllable count by:
@@ -23,6 +30,8 @@ def count_syllables(word: str) -> int:
       1) collapsing true diphthongs into a placeholder '1'
       2) counting every vowel or placeholder as one syllable
       3) dropping a silent final 'e' (but not in words ending 'le' or exceptions)
+    Steps 1 and 2 are one pass of SYLLABLE_PATTERN: the diphthongs never overlap, so matching them from left
+    to right counts the same syllables as replacing them one after the other.
     """
     w = word.lower().strip()
 
@@ -30,17 +39,11 @@ def count_syllables(word: str) -> int:
     if w in EXCEPTIONS:
         return EXCEPTIONS[w]
 
-    # 1) collapse true diphthongs into placeholder '1'
-    for d in ("ai", "au", "ae", "oi", "ou", "ow"):
-        w = w.replace(d, "1")
-
-    # 2) count each remaining vowel or placeholder
-    accented = "áéíóúãõâêô"
-    vowels = set("aeiou") | set(accented)
-    count = sum(1 for ch in w if ch == "1" or ch in vowels)
+    # 1) and 2) count the diphthongs and the remaining vowels
+    count = len(SYLLABLE_PATTERN.findall(w))
 
-    # 3) drop silent final 'e' (but not for 'le' endings or exceptions)
-    if w.endswith("e") and not w.endswith("le") and word.lower() not in EXCEPTIONS and count > 1:
+    # 3) drop silent final 'e' (but not for 'le' endings, and not when the final 'e' is part of the diphthong 'ae')
+    if w.endswith("e") and not w.endswith(("le", "ae")) and count > 1:
         count -= 1
 
     return max(1, count)
@@ -61,28 +64,80 @@ def extract_bigram_neighbors(texts: list[str]) -> dict[str, int]:
                   or after the word in the bigrams).
   """
 
-  # Dictionary to store words and their unique neighbors
-  word_neighbors: dict[str, set[str]] = {}
+  words, neighbor_counts = count_neighbors(texts)
+  # Only the words that are part of a bigram have neighbors
+  return {word: count for word, count in zip(words, neighbor_counts.tolist()) if count > 0}
+
+# Function to map the words of the bigrams of the texts to ids
+def bigram_ids(texts: list[str]) -> tuple[list[str], np.ndarray, np.ndarray]:
+  """
+  Clean and split the texts once and return the directed pairs (word, neighbor) of their bigrams, in both
+  directions, as arrays of word ids.
+
+  Parameters:
+  texts (list[str]): List of text strings to analyze
 
+  Returns:
+  tuple[list[str], np.ndarray, np.ndarray]: The cleaned words (including the empty word of the tokens made only
+                                            of punctuation) in order of first occurrence, the id of the word of
+                                            each pair and the id of its neighbor.
+  """
+  vocabulary: dict[str, int] = {}
+  # Id of each raw token, so that each distinct token is only cleaned once
+  token_ids: dict[str, int] = {}
+  firsts: list[np.ndarray] = []
+  seconds: list[np.ndarray] = []
   for text in texts:
-      # Clean and split the phrases into words
-      words:list[str] = [w.lower().strip(".,!?;:\"'()[]") for w in text.split()]
-      # Iterate over the list of words to create bigrams (pairs of consecutive words)
-      for i in range(len(words) - 1):
-          w1, w2 = words[i], words[i + 1] # Two consecutive words
+      tokens: list[str] = text.split()
+      for w in dict.fromkeys(tokens):
+          if w not in token_ids:
+              token_ids[w] = vocabulary.setdefault(w.lower().strip(".,!?;:\"'()[]"), len(vocabulary))
+      ids = np.fromiter(map(token_ids.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+      firsts += [ids[:-1], ids[1:]]
+      seconds += [ids[1:], ids[:-1]]
+  empty = np.zeros(0, dtype=np.int64)
+  return list(vocabulary), np.concatenate(firsts or [empty]), np.concatenate(seconds or [empty])
+
+# Function to count the distinct neighbors of every word with arrays of word ids
+def count_neighbors(texts: list[str]) -> tuple[list[str], np.ndarray]:
+  """
+  Count the distinct neighbors (previous or next word) of every word of the texts, as extract_bigram_neighbors.
+  The distinct neighbors are the distinct (w1, w2) pairs of ids of bigram_ids, found with np.unique instead of
+  a set per word.
 
-          # Ensure each word is in the dictionary and initialize its neighbor set if not already present
-          if w1 not in word_neighbors:
-              word_neighbors[w1] = set()
-          if w2 not in word_neighbors:
-              word_neighbors[w2] = set()
+  Parameters:
+  texts (list[str]): List of text strings to analyze
 
-          # Add each word to the other's set of neighbors (bidirectional relationship)
-          word_neighbors[w1].add(w2)  # w1 precede w2
-          word_neighbors[w2].add(w1)  # w2 sucede w1
+  Returns:
+  tuple[list[str], np.ndarray]: The cleaned words of bigram_ids and their number of distinct neighbors.
+  """
+  words, firsts, seconds = bigram_ids(texts)
+  # Distinct directed pairs (word, neighbor), as one integer per pair
+  pairs = np.unique(firsts * len(words) + seconds)
+  return words, np.bincount(pairs // max(len(words), 1), minlength=len(words))
 
-  # Return a dictionary where each word is mapped to the number of unique neighbors (words that appear before or after it in the bigrams)
-  return {word: len(neighbors) for word, neighbors in word_neighbors.items()}
+# Function to estimate the distinct neighbors of every word with a sketch per word
+def sketch_neighbors(texts: list[str], precision: int = DEFAULT_PRECISION, sketch: NeighborSketch = None) -> NeighborSketch:
+  """
+  Estimate the distinct neighbors of every word of the texts with a HyperLogLog per word (NeighborSketch),
+  whose memory does not grow with the number of distinct bigrams but with the vocabulary (2^precision bytes
+  per word, more than the exact pairs on small corpora). The texts can be added in several calls, or sketched
+  by shard and merged with NeighborSketch.merge.
+
+  Parameters:
+  texts (list[str]): List of text strings to analyze
+  precision (int): Precision of the sketches (2^precision bytes per word)
+  sketch (NeighborSketch): A sketch to add the texts to (a new one if None)
+
+  Returns:
+  NeighborSketch: The sketch of the neighbors of the words.
+  """
+  if sketch is None:
+      sketch = NeighborSketch(precision)
+  # One text at a time, so that the pairs of only one text are in memory
+  for text in texts:
+      sketch.add_pairs(*bigram_ids([text]))
+  return sketch
 
 # Calculate NeigSyl(w)
 def compute_neigsyl(words: set[str], bigram_freqs: dict[str, int]) -> dict[str, float]:
@@ -124,19 +179,24 @@ def find_elbow(neigsyl_dict: dict[str, float], delta_k=4, target_slope=-1.0, tol
     Returns:
     list[str]: List of identified stopwords.
     """
-    sorted_items = sorted(neigsyl_dict.items(), key=lambda x: -x[1])
-    values = [val for _, val in sorted_items]
+    # Scores from the highest to the lowest (ties ordered by word), and slope over delta_k points at every rank
+    words: list[str] = list(neigsyl_dict)
+    scores = np.fromiter(neigsyl_dict.values(), dtype=np.float64, count=len(words))
+    word_ranks = np.empty(len(words), dtype=np.int64)
+    word_ranks[np.argsort(np.array(words, dtype=str), kind="stable")] = np.arange(len(words))
+    order = np.lexsort((word_ranks, -scores))
+    values = scores[order]
+    slopes = (values[delta_k:] - values[:max(len(values) - delta_k, 0)]) / delta_k
+    elbows = np.flatnonzero(np.abs(slopes - target_slope) < tolerance)
+    end = int(elbows[0]) + delta_k if len(elbows) else len(words)
 
-    for r in range(len(values) - delta_k):
-        slope = (values[r + delta_k] - values[r]) / delta_k
-        if abs(slope - target_slope) < tolerance:
-            return [word for word, _ in sorted_items[:r + delta_k]]
-
-    return [word for word, _ in sorted_items]
+    return [words[i] for i in order[:end].tolist()]
 
 
 # Plot the neigsyl_curve
 def plot_neigsyl_curve(neigsyl_dict: dict[str, float],plot_name:str):
+    # matplotlib is only imported when a plot is drawn (it is slow to import)
+    import matplotlib.pyplot as plt
     sorted_scores = sorted(neigsyl_dict.values(), reverse=True)
     plt.figure(figsize=(10, 5))
     plt.plot(sorted_scores, marker='o')
@@ -156,7 +216,7 @@ def plot_neigsyl_curve(neigsyl_dict: dict[str, float],plot_name:str):
 
 
 # Stop Words
-def get_stop_words(corpus:dict) -> list[str]:
+def get_stop_words(corpus:dict, approximate: bool = False, precision: int = DEFAULT_PRECISION) -> StopWordSet:
   """
   Identify and return a list of stopwords from a given corpus using the NeigSyl elbow method.
 
@@ -167,57 +227,73 @@ def get_stop_words(corpus:dict) -> list[str]:
 
   Parameters:
   corpus (dict): A dictionary where keys are document identifiers and values are the text content.
+  approximate (bool): Whether the neighbors are estimated with sketch_neighbors (memory independent of the
+                      number of distinct bigrams, 2^precision bytes per word) instead of being counted exactly.
+  precision (int): Precision of the sketches of the approximate mode. The default (12) gives the same stop
+                   words as the exact count on tests/corpus_test; a lower precision can change the list.
 
   Returns:
-  list[str]: A list of identified stopwords based on the NeigSyl elbow method.
+  StopWordSet: The identified stopwords based on the NeigSyl elbow method.
   """
 
-  all_words:set[str] = set() # Set to hold all unique words in the corpus
-  for text in corpus.values():
-      for word in text.split():
-          clean:str = word.lower().strip(".,!?;:\"'()[]")
-          if clean:
-              all_words.add(clean)
-  # Extract bigram frequencies from the corpus
-  bigram_freqs: dict[str, int] = extract_bigram_neighbors(corpus.values())
-  # Compute NeigSyl scores for all words
-  neigsyl_scores: dict[str, float] = compute_neigsyl(all_words, bigram_freqs)
+  # Words of the corpus and their number of distinct neighbors, the corpus being cleaned and split once
+  if approximate:
+      estimates = sketch_neighbors(corpus.values(), precision).counts()
+      words, neighbor_counts = list(estimates), np.fromiter(estimates.values(), dtype=np.int64, count=len(estimates))
+  else:
+      words, neighbor_counts = count_neighbors(list(corpus.values()))
+  # NeigSyl scores of all the (non-empty) words, the syllables being counted once per word of the vocabulary
+  syllables = np.array([count_syllables(word) for word in words], dtype=np.int64)
+  scores = (neighbor_counts / np.maximum(syllables, 1)).tolist()
+  neigsyl_scores: dict[str, float] = {word: score for word, score in zip(words, scores) if word}
   # Identify stopwords using the elbow method
   stop_words: list[str] = find_elbow(neigsyl_scores, delta_k=5,target_slope=-0.8,tolerance=0.05)
 
-  return stop_words
+  return StopWordSet(stop_words)
 
 
 ##################################################################
 # Stop Words Python Library Algorithm
 ###################################################################
-import nltk
-from nltk.corpus import stopwords
+# English stopwords list of NLTK (nltk.corpus.stopwords.words('english')), bundled with the project in src/data:
+# the nltk package is not a dependency, no download is attempted
+NLTK_STOP_WORDS_FILE: str = os.path.join(os.path.dirname(__file__), "data", "nltk_english_stopwords.txt")
 
-# Download stopwords if needed
-nltk.download('stopwords')
+# Function to read a list of stop words, one per line
+def load_stop_words_file(path: str) -> set[str]:
+  """
+  Parameters: path (str): Path to a UTF-8 file with one stop word per line.
+  Returns: set[str]: The stop words of the file.
+  """
+  with open(path, "r", encoding="utf-8") as file:
+      return {line.strip() for line in file if line.strip()}
 
 # Get stopwords in English
-nltk_stop_words = set(stopwords.words('english'))
+nltk_stop_words = load_stop_words_file(NLTK_STOP_WORDS_FILE)
+# Version of the list (hash of its words): a change of the list invalidates the counts cached with it
+NLTK_STOP_WORDS_VERSION: str = hashlib.sha256("\n".join(sorted(nltk_stop_words)).encode("utf-8")).hexdigest()[:16]
 
 # Function to count and return the stopwords found in the corpus
-def get_nltk_stopwords_in_corpus(corpus: dict) -> list:
+def get_nltk_stopwords_in_corpus(corpus: dict) -> StopWordSet:
   """
-  Identify and return a list of stopwords present in a given corpus using the NLTK stopwords list.
+  Identify and return a list of stopwords present in a given corpus using the NLTK stopwords list
+  (the English list of NLTK, bundled in src/data/nltk_english_stopwords.txt: NLTK itself is not needed).
 
   This function processes the corpus to extract all unique words, cleans and normalizes them,
   then finds the intersection between the words in the corpus and the NLTK stopwords list. 
   The function returns the stopwords from the corpus that are also found in the NLTK stopwords list.
 
   Parameters:
-  corpus (dict): A dictionary where keys are document identifiers and values are the text content.
+  corpus (dict): A dictionary where keys are document identifiers and values are the text content,
+                 or an iterable of texts (for example the blocks of iter_text_blocks, to stream the corpus).
 
   Returns:
-  list: A list of stopwords found in the corpus that are also present in the NLTK stopwords list.
+  StopWordSet: The stopwords found in the corpus that are also present in the NLTK stopwords list.
   """
   words_in_corpus = set()
+  texts = corpus.values() if isinstance(corpus, dict) else corpus
   
-  for text in corpus.values():
+  for text in texts:
       for word in text.split():
           clean = word.lower().strip(".,!?;:\"'()[]")
           if clean.isalpha():  # Consider only alphabetic words
@@ -226,4 +302,6 @@ def get_nltk_stopwords_in_corpus(corpus: dict) -> list:
   # Find the stopwords present in the corpus
   found_stopwords = words_in_corpus.intersection(nltk_stop_words)
   
-  return list(found_stopwords)
\ No newline at end of file
+  return StopWordSet(found_stopwords)
+
+get_nltk_stopwords_in_corpus.version = NLTK_STOP_WORDS_VERSION
\ No newline at end of file
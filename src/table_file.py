@@ -0,0 +1,236 @@
+import mmap
+import os
+from bisect import bisect_left
+from typing import Iterator
+import numpy as np
+from src.ngram_table import NGramTable, NO_ID, row_hashes
+
+##################################################################
+# Binary file of an n-gram table, read through a memory map
+###################################################################
+
+# First bytes of a table file and version of its format
+MAGIC: bytes = b"NGRAMTBL"
+FORMAT_VERSION: int = 1
+
+# Sections of a table file, in the order they are written, with their types (little-endian)
+SECTIONS: list[tuple[str, str]] = [
+    ("word_data", "u1"),        # UTF-8 bytes of the words, one after the other
+    ("word_offsets", "<i8"),    # Start of each word in word_data, and the end of the last word
+    ("word_order", "<i4"),      # Ids of the words sorted by their UTF-8 bytes
+    ("is_stop", "u1"),
+    ("ids", "<i4"),             # width ids per n-gram, padded with NO_ID
+    ("lengths", "i1"),
+    ("sizes", "i1"),
+    ("frequencies", "<i8"),
+    ("glues", "<f8"),
+    ("max_glues_minus_1", "<f8"),
+    ("max_glues_plus_1", "<f8"),
+    ("relevant", "u1"),
+    ("row_hashes", "<u8"),      # Sorted hashes of the ids of the n-grams (see row_hashes)
+    ("row_order", "<i4"),       # Row of each sorted hash
+]
+
+# Header: magic, format version, width, number of words, number of n-grams, then (offset, size) of each section
+_HEADER_FIELDS: int = 4 + 2 * len(SECTIONS)
+_HEADER_SIZE: int = len(MAGIC) + 8 * _HEADER_FIELDS
+# Every section starts at a multiple of this alignment
+_ALIGNMENT: int = 8
+
+# Function to write a table in a binary file
+def save_table(table: NGramTable, path: str) -> None:
+    """
+    Write the vocabulary, the n-grams, their frequencies, glues, max glues and relevance flags of a table in a binary
+    file that MappedTable opens without building any Python object per word or per n-gram.
+    The glues set by hand through the n_gram setters (glue overrides) are not saved. The file is replaced atomically.
+    Parameters:
+        table (NGramTable): The table (for example extractor(...).table).
+        path (str): Path of the file.
+    """
+    num_rows: int = len(table)
+    encoded: list[bytes] = [word.encode("utf-8") for word in table.words]
+    word_offsets: np.ndarray = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(word) for word in encoded], out=word_offsets[1:])
+    word_order: list[int] = sorted(range(len(encoded)), key=encoded.__getitem__)
+    ids: np.ndarray = np.frombuffer(table.ids, dtype=np.int32).reshape(num_rows, table.width)
+    hashes: np.ndarray = row_hashes(ids)
+    row_order: np.ndarray = np.argsort(hashes, kind="stable")
+
+    columns: dict[str, object] = {
+        "word_data": b"".join(encoded),
+        "word_offsets": word_offsets,
+        "word_order": word_order,
+        "is_stop": bytes(table.is_stop),
+        "ids": ids,
+        "lengths": table.lengths,
+        "sizes": table.sizes,
+        "frequencies": table.frequencies,
+        "glues": table.glues,
+        "max_glues_minus_1": table.max_glues_minus_1,
+        "max_glues_plus_1": table.max_glues_plus_1,
+        "relevant": bytes(table.relevant),
+        "row_hashes": hashes[row_order],
+        "row_order": row_order,
+    }
+    data: list[bytes] = []
+    header: list[int] = [FORMAT_VERSION, table.width, len(encoded), num_rows]
+    position: int = _align(_HEADER_SIZE)
+    for name, dtype in SECTIONS:
+        column = columns[name]
+        values: bytes = column if isinstance(column, bytes) else np.asarray(column).astype(dtype).tobytes()
+        header += [position, len(values)]
+        data.append(values)
+        position = _align(position + len(values))
+
+    temporary_path: str = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(MAGIC + np.array(header, dtype="<u8").tobytes())
+        for values in data:
+            file.write(bytes(_align(file.tell()) - file.tell()))
+            file.write(values)
+    os.replace(temporary_path, path)
+
+def _align(position: int) -> int:
+    return -(-position // _ALIGNMENT) * _ALIGNMENT
+
+class MappedTable:
+    """
+    Read-only n-gram table of a file written by save_table. The file is memory-mapped and every column is a NumPy
+    array over the map, so opening a table takes the same time whatever its size, and the processes that open the
+    same file share its pages. A MappedTable is pickled as its path, so it can be sent to worker processes.
+
+    The words are found by a binary search over the words sorted by their bytes, and the n-grams by a binary search
+    over the sorted hashes of their ids.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters: path (str): Path of a file written by save_table.
+        """
+        self.path: str = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an n-gram table file.")
+        header: list[int] = np.frombuffer(self._map, dtype="<u8", count=_HEADER_FIELDS, offset=len(MAGIC)).tolist()
+        version, self.width, self.num_words, num_rows = header[:4]
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} has version {version} of the format, expected {FORMAT_VERSION}.")
+        self._num_rows: int = num_rows
+        for i, (name, dtype) in enumerate(SECTIONS):
+            offset, size = header[4 + 2 * i:6 + 2 * i]
+            count: int = size // np.dtype(dtype).itemsize
+            column = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset) if count else np.zeros(0, dtype=dtype)
+            setattr(self, name, column)
+        self.ids = self.ids.reshape(num_rows, self.width)
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    def __reduce__(self):
+        return MappedTable, (self.path,)
+
+    def close(self) -> None:
+        """Close the memory map (the arrays of the table can no longer be used)."""
+        for name, _ in SECTIONS:
+            self.__dict__.pop(name, None)
+        self._map.close()
+
+    def __enter__(self) -> "MappedTable":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    # Vocabulary
+    def word(self, word_id: int) -> str:
+        """Return the word of an id."""
+        return self._word_bytes(word_id).decode("utf-8")
+
+    def _word_bytes(self, word_id: int) -> bytes:
+        return self.word_data[self.word_offsets[word_id]:self.word_offsets[word_id + 1]].tobytes()
+
+    def word_id(self, word: str) -> int:
+        """Return the id of a word, or NO_ID if it is not in the vocabulary."""
+        encoded: bytes = word.encode("utf-8")
+        order = self.word_order
+        position: int = bisect_left(range(self.num_words), encoded, key=lambda i: self._word_bytes(order[i]))
+        if position < self.num_words and self._word_bytes(order[position]) == encoded:
+            return int(order[position])
+        return NO_ID
+
+    # Rows
+    def find_tokens(self, tokens: list[str]) -> int:
+        """Return the row of the n-gram with the given tokens, or NO_ID if it is not in the table."""
+        if not 0 < len(tokens) <= self.width:
+            return NO_ID
+        ids: np.ndarray = np.full((1, self.width), NO_ID, dtype=np.int32)
+        for i, token in enumerate(tokens):
+            ids[0, i] = self.word_id(token)
+            if ids[0, i] == NO_ID:
+                return NO_ID
+        hashes = self.row_hashes
+        key: np.uint64 = row_hashes(ids)[0]
+        for position in range(np.searchsorted(hashes, key, "left"), np.searchsorted(hashes, key, "right")):
+            row: int = int(self.row_order[position])
+            if np.array_equal(self.ids[row], ids[0]):
+                return row
+        return NO_ID
+
+    def row_tokens(self, row: int) -> list[str]:
+        """Return the tokens of a row."""
+        return [self.word(word_id) for word_id in self.ids[row, :self.lengths[row]].tolist()]
+
+    def row_key(self, row: int) -> str:
+        """Return the string of a row, as used for the keys of the n-gram dictionary."""
+        return " ".join(self.row_tokens(row))
+
+    def lookup(self, expression: str) -> "MappedNGram":
+        """Return the n-gram of an expression (tokens separated by spaces), or None if it is not in the table."""
+        row: int = self.find_tokens(expression.split(" "))
+        return None if row == NO_ID else MappedNGram(self, row)
+
+    def __contains__(self, expression) -> bool:
+        return isinstance(expression, str) and self.find_tokens(expression.split(" ")) != NO_ID
+
+    def relevant_expressions(self) -> Iterator[str]:
+        """Iterate over the relevant expressions, in the order of the rows; only their strings are built."""
+        for row in np.flatnonzero(self.relevant).tolist():
+            yield self.row_key(row)
+
+    def __repr__(self) -> str:
+        return f"MappedTable({self.path!r}, {len(self)} n-grams)"
+
+class MappedNGram:
+    """Read-only view over one row of a MappedTable, with the getters of n_gram."""
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: MappedTable, row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __repr__(self) -> str:
+        return f"MappedNGram({self.get_size()}, {self.get_frequency()}, {self.get_tokens()})"
+
+    def get_size(self) -> int:
+        return int(self._table.sizes[self._row])
+
+    def get_frequency(self) -> int:
+        return int(self._table.frequencies[self._row])
+
+    def get_tokens(self) -> list[str]:
+        return self._table.row_tokens(self._row)
+
+    def get_glue(self) -> float:
+        return float(self._table.glues[self._row])
+
+    def get_max_glue_n_grams_minus_1(self) -> float:
+        return float(self._table.max_glues_minus_1[self._row])
+
+    def get_max_glue_n_grams_plus_1(self) -> float:
+        return float(self._table.max_glues_plus_1[self._row])
+
+    def is_relevant_expression(self) -> bool:
+        return bool(self._table.relevant[self._row])
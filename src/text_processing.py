@@ -1,5 +1,30 @@
 import os
 import re
+from typing import Iterator
+
+##################################################################
+# Set of stop words
+###################################################################
+
+class StopWordSet(frozenset):
+    """
+    Immutable set of stop words. Every stage of the pipeline takes a StopWordSet, so that checking if a token
+    is a stop word is a hash lookup instead of a scan of a list.
+    """
+
+    def flags(self, words: list[str]) -> bytearray:
+        """Return for each word of a vocabulary 1 if it is a stop word and 0 otherwise."""
+        return bytearray(word in self for word in words)
+
+# Function to convert any collection of stop words to a StopWordSet
+def as_stop_word_set(stop_words) -> StopWordSet:
+    """
+    Parameters: stop_words: A list, set or StopWordSet of stop words (None for no stop words).
+    Returns: StopWordSet: The stop words as a StopWordSet (the same object if it already is one).
+    """
+    if isinstance(stop_words, StopWordSet):
+        return stop_words
+    return StopWordSet(stop_words or ())
 
 ##################################################################
 # These functions are used to read text files from a directory and tokenize the text.
@@ -22,6 +47,54 @@ def read_text_files(directory_path: str) -> dict:
                 text_files_content[filename] = file.read()
     return text_files_content
 
+# Number of characters read at once from a file by the streaming functions
+BLOCK_SIZE: int = 1 << 20
+
+# Function to list the text files of a corpus directory
+def list_text_files(directory_path: str) -> list[str]:
+    """
+    Parameters: directory_path (str): Path to the corpus containing the text files.
+    Returns: list[str]: The names of the files of the directory (not the folders), sorted by name.
+    """
+    return sorted(filename for filename in os.listdir(directory_path) if os.path.isfile(os.path.join(directory_path, filename)))
+
+# The last whitespace of a text (the search reads the text once)
+LAST_WHITESPACE_PATTERN: re.Pattern = re.compile(r"\s(?=\S*\Z)")
+
+# Function to read the text files of a corpus directory one block at a time
+def iter_text_blocks(directory_path: str, block_size: int = BLOCK_SIZE, filenames: list[str] = None) -> Iterator[tuple[str, str]]:
+    """
+    Read the files of a corpus lazily, in the order of their names, without loading a whole file in memory.
+    A block is cut just after a whitespace (or at the end of its file): no token is split between two blocks,
+    and tokenize gives the same tokens on the blocks as on the whole text.
+    Parameters:
+        directory_path (str): Path to the corpus containing the text files.
+        block_size (int): Number of characters read at once.
+        filenames (list[str]): The files to read, in this order (all the files of the directory if None).
+    Returns: Iterator[tuple[str, str]]: The name of the file and the text of each block.
+    """
+    if filenames is None:
+        filenames = list_text_files(directory_path)
+    for filename in filenames:
+        with open(os.path.join(directory_path, filename), "r", encoding="utf-8") as file:
+            # Text read after the last whitespace, in parts: a long token is not copied again at every read
+            rest: list[str] = []
+            while True:
+                data: str = file.read(block_size)
+                if not data:
+                    break
+                # Cut after the last whitespace, the last (maybe incomplete) token goes to the next block
+                last_space: re.Match = LAST_WHITESPACE_PATTERN.search(data)
+                if last_space is None:
+                    rest.append(data)
+                    continue
+                cut: int = last_space.end()
+                yield filename, "".join(rest) + data[:cut]
+                rest = [data[cut:]]
+            last_token: str = "".join(rest)
+            if last_token:
+                yield filename, last_token
+
 # Function to add spaces around punctation mark: ";", ":", "!", "?", "<", ">", "&", ")", "(", "]", "[", "."
 def add_spaces(text : str) -> str:
     """
@@ -50,6 +123,39 @@ def add_spaces(text : str) -> str:
     spaced_text = re.sub(r"\s+", " ", spaced_text)
     return spaced_text.strip()
 
+# Single-pass tokenizer, giving the same tokens as tokenize_text(add_spaces(text)).
+# A punctuation mark is always a token. A dot stays inside its word when it is not followed by a space and is
+# part of a decimal number or of an acronym (the cases where add_spaces does not add spaces around it),
+# any other dot is a token. The words are the runs of the other non-whitespace characters.
+PUNCTUATION_MARKS: str = r";:!?,<>&\)\(\]\["
+KEPT_DOT: str = r"\.(?!\x20)(?:(?<=\d\.)|(?<=\b[A-Za-z]\.)|(?=\d)|(?=[A-Za-z]\b))"
+WORD_CHARS: str = rf"[^\s{PUNCTUATION_MARKS}.]"
+TOKEN_PATTERN: re.Pattern = re.compile(
+    rf"""
+    {WORD_CHARS}+ (?:{KEPT_DOT} {WORD_CHARS}*)*       # a word, with the dots of its decimals and acronyms
+    | {KEPT_DOT} {WORD_CHARS}* (?:{KEPT_DOT} {WORD_CHARS}*)*   # a word starting with such a dot (".5")
+    | [{PUNCTUATION_MARKS}.]                         # a punctuation mark or any other dot
+    """,
+    re.VERBOSE,
+)
+
+# Function to tokenize a text in one pass
+def tokenize(text: str) -> list[str]:
+    """
+    Tokenize a text with one precompiled regular expression, without building the spaced text.
+    Parameters: text (str): the text to tokenize.
+    Returns: tokens (list): the same list of tokens as tokenize_text(add_spaces(text)).
+    """
+    return TOKEN_PATTERN.findall(text)
+
+# Function to check if a token is only made of punctuation marks
+def is_punctuation(token: str) -> bool:
+    """
+    Parameters: token (str): a token.
+    Returns: bool: True if the token has no letter and no digit (for example "." or ");").
+    """
+    return not any(char.isalnum() for char in token)
+
 # Function to tokenize the text
 def tokenize_text(text: str) -> list[str]:
     """
@@ -69,18 +175,30 @@ def text_processing(corpus_path: str) -> list[str]:
     Returns:
         list[str]: A list of tokens from all files, in reading order.
     """
-    # Read the text files
-    text_files: dict = read_text_files(corpus_path)
-
-    # Sort the files by key (file name)
-    sorted_text_files = dict(sorted(text_files.items()))
-
     # Initialize a list for the tokens
     tokenized_text: list[str] = []
 
-    # Process each file in sorted order
-    for text in sorted_text_files.values():
-        spaced_text: str = add_spaces(text)  # Add spaces around punctuation marks
-        tokenized_text.extend(tokenize_text(spaced_text))  # Tokenize and add to the list
+    # Process each file in sorted order, one block at a time
+    for tokens in iter_token_chunks(corpus_path):
+        tokenized_text.extend(tokens)
 
-    return tokenized_text
\ No newline at end of file
+    return tokenized_text
+
+# Function to tokenize all text files in a given corpus path lazily
+def iter_token_chunks(corpus_path: str, block_size: int = BLOCK_SIZE, lowercase: bool = False,
+                      filenames: list[str] = None) -> Iterator[list[str]]:
+    """
+    Streaming version of text_processing: yield the tokens of the corpus one block at a time, in reading order.
+    Only one block of text is in memory at a time.
+    Parameters:
+        corpus_path (str): Path to the folder containing text files.
+        block_size (int): Number of characters read at once.
+        lowercase (bool): Whether the text is lowercased before tokenization.
+        filenames (list[str]): The files to read, in this order (all the files, sorted by name, if None).
+    Returns:
+        Iterator[list[str]]: The tokens of each block.
+    """
+    for _, block in iter_text_blocks(corpus_path, block_size, filenames):
+        if lowercase:
+            block = block.lower()
+        yield tokenize(block)
\ No newline at end of file
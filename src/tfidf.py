@@ -0,0 +1,110 @@
+import numpy as np
+from scipy import sparse
+from src.corpus_index import CorpusIndex
+from src.ranking import top_k_indices
+from src.text_processing import is_punctuation, StopWordSet, as_stop_word_set
+
+##################################################################
+# TF-IDF of the unigrams and relevant expressions of a corpus, as one sparse matrix
+###################################################################
+
+class TfidfMatrix:
+    """
+    TF-IDF scores of every term of every document in a sparse document x term matrix (CSR).
+
+    The columns are the unigrams (stop words and punctuation marks excluded) followed by the relevant expressions,
+    so a one-word expression has a column of each kind. A stored entry is a term occurring in a document: its score
+    is tf * idf with tf = occurrences / number of tokens of the document and idf = log(D / df), the same as
+    get_explicit_keywords computed term by term. Terms occurring in every document keep an entry of score 0.
+    """
+
+    def __init__(self, documents: list[str], terms: list[str], num_unigrams: int, counts: sparse.csr_matrix,
+                 doc_lengths: np.ndarray) -> None:
+        """
+        Parameters:
+            documents (list[str]): The names of the documents (rows).
+            terms (list[str]): The unigrams then the relevant expressions (columns).
+            num_unigrams (int): The number of unigram columns.
+            counts (sparse.csr_matrix): The number of occurrences of each term in each document.
+            doc_lengths (np.ndarray): The number of tokens of each document.
+        """
+        self.documents: list[str] = documents
+        self.terms: list[str] = terms
+        self.num_unigrams: int = num_unigrams
+        self.counts: sparse.csr_matrix = counts
+        # Inverse document frequency of each term, computed once
+        df: np.ndarray = np.bincount(counts.indices, minlength=len(terms))
+        with np.errstate(divide="ignore"):
+            self.idf: np.ndarray = np.where(df > 0, np.log(len(documents) / np.maximum(df, 1)), 0.0)
+        # Same structure as counts (no entry is dropped), scores computed for all the entries at once
+        rows: np.ndarray = np.repeat(np.arange(len(documents)), np.diff(counts.indptr))
+        self.scores: sparse.csr_matrix = sparse.csr_matrix(
+            (counts.data / doc_lengths[rows] * self.idf[counts.indices], counts.indices.copy(), counts.indptr.copy()),
+            shape=counts.shape,
+        )
+
+    @classmethod
+    def from_index(cls, index: CorpusIndex, relevant_expressions: list[str], stop_words: StopWordSet) -> "TfidfMatrix":
+        """
+        Build the matrix from the postings of an index (the relevant expressions must be indexed).
+        Parameters:
+            index (CorpusIndex): The index of the corpus.
+            relevant_expressions (list[str]): The relevant expressions (REs).
+            stop_words (StopWordSet): The stop words, never used as unigram keywords.
+        """
+        stop_words = as_stop_word_set(stop_words)
+        documents: list[str] = index.documents()
+        doc_ids: dict[str, int] = {doc: i for i, doc in enumerate(documents)}
+        unigrams: list[str] = [
+            term for term in index.unigrams if term.lower() not in stop_words and not is_punctuation(term)
+        ]
+        terms: list[str] = unigrams + list(dict.fromkeys(relevant_expressions))
+
+        rows: list[int] = []
+        cols: list[int] = []
+        counts: list[int] = []
+        for column, term in enumerate(terms):
+            for doc, positions in index.postings.get(term, {}).items():
+                rows.append(doc_ids[doc])
+                cols.append(column)
+                counts.append(len(positions))
+        matrix = sparse.csr_matrix(
+            (np.array(counts, dtype=np.float64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(len(documents), len(terms)),
+        )
+        matrix.sort_indices()
+        doc_lengths: np.ndarray = np.array([index.num_tokens(doc) for doc in documents], dtype=np.float64)
+        return cls(documents, terms, len(unigrams), matrix, doc_lengths)
+
+    def top_k(self, k: int, columns: slice = slice(None)) -> list[list[str]]:
+        """
+        Return the k terms with the highest scores of each document, ties broken by term, among a range of columns.
+        The best k entries of each row are selected with top_k_indices (a partial selection, then a sort of the k
+        entries only), so a document costs O(nnz of its row + k log k) instead of sorting the whole matrix.
+        Parameters:
+            k (int): The number of terms per document.
+            columns (slice): The columns to select from (for example the unigrams or the relevant expressions).
+        Returns: list[list[str]]: The best terms of each document, in the order of the documents.
+        """
+        scores: sparse.csr_matrix = self.scores[:, columns]
+        terms: list[str] = self.terms[columns]
+        if k <= 0 or scores.nnz == 0:
+            return [[] for _ in self.documents]
+        term_ranks: np.ndarray = np.empty(len(terms), dtype=np.int64)
+        term_ranks[sorted(range(len(terms)), key=terms.__getitem__)] = np.arange(len(terms))
+        selected: list[list[str]] = []
+        for row in range(scores.shape[0]):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            indices: np.ndarray = scores.indices[start:end]
+            best: np.ndarray = top_k_indices(scores.data[start:end], term_ranks[indices], k)
+            selected.append([terms[t] for t in indices[best].tolist()])
+        return selected
+
+    def keywords(self, num_unigrams: int, num_res: int) -> dict[str, list[str]]:
+        """
+        Return the keywords of each document: its best num_res relevant expressions, then its best num_unigrams
+        unigrams, as {filename: [keyword1, ..., keywordN]}.
+        """
+        top_unigrams: list[list[str]] = self.top_k(num_unigrams, slice(0, self.num_unigrams))
+        top_res: list[list[str]] = self.top_k(num_res, slice(self.num_unigrams, None))
+        return {doc: top_res[i] + top_unigrams[i] for i, doc in enumerate(self.documents)}
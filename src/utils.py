@@ -1,45 +1,50 @@
 import random
-from src.ngram import n_gram  # Classe n_gram
-import tkinter as tk
-from tkinter import messagebox
+import numpy as np
+from src.ngram import n_gram, NGramDict, get_element, build_n_gram_index  # Classe n_gram
+from src.text_processing import StopWordSet, as_stop_word_set
 
 #############################################################
 # These functions are used to compute metrics on the tokens to use in the LocalMaxs extractor.
 #############################################################
 
-# Function to return the n-gram given a list of tokens.
-def get_element(tokens: list[str], all_n_grams: dict[str,n_gram])-> n_gram:
-    """
-    Get the ngram object corresponding to the tokens in my dictionary of n-grams.
-    Parameters:
-        tokens (list): A list of tokens.
-        all_n_grams (dict): A dictionary containing all n-grams
-    Returns: n_gram (n_gram): The n-gram object corresponding to the tokens."""
-    for key, ngram in all_n_grams.items():
-        if ngram.get_tokens() == tokens:
-            return ngram
-    return None
-
 ##################################################################
 # Why do we need to store the dict of every single glue value instead of just saving the max of that?
 #############################################################
-def calculate_and_store_glue(all_n_grams: dict[str, n_gram], glue_function: str, stop_words: list[str]) -> dict:
+def calculate_and_store_glue(all_n_grams: dict[str, n_gram], glue_function: str, stop_words: StopWordSet,
+                             min_frequency: int = None) -> dict:
     """
     Compute the glue of n-grams and store them in a dictionary.
     Parameters:
         all_n_grams (dict): A dictionary containing all n-grams.
         glue_function (str): The glue function to use ("scp", "dice", "mi").
-        stop_words (list[str]): List of stop words that n-grams cannot start or end with.
+        stop_words (StopWordSet): Stop words that n-grams cannot start or end with.
+        min_frequency (int): Prune the n-grams less frequent than this, which cannot be relevant expressions
+            (see NGramTable.calculate_and_store_glue; only for the n-grams of create_n_grams).
     """
+    stop_words = as_stop_word_set(stop_words)
+
+    # The n-grams created by create_n_grams are stored in a table: the glues are computed on its columns
+    if isinstance(all_n_grams, NGramDict):
+        all_n_grams.table.calculate_and_store_glue(glue_function, stop_words, min_frequency)
+        return all_n_grams
+    if min_frequency is not None:
+        raise ValueError("min_frequency prunes the n-grams of a table: build the n-grams with create_n_grams.")
+
     ngrams = list(all_n_grams.keys())
     total_count = len(ngrams)
 
-    # Compute the glue for each n-gram
+    # Index the n-grams by their tokens once, so that finding the (n-1)-grams is O(1) instead of a scan of the dictionary
+    index: dict[tuple[str,...], n_gram] = build_n_gram_index(all_n_grams)
+
+    # Compute the glue of each n-gram once
     for ngram in ngrams:
         w = all_n_grams[ngram]
+        w.set_glue(w.calculate_glue(glue_function, all_n_grams, total_count))
 
-        g = w.calculate_glue(glue_function, all_n_grams, total_count)
-        w.set_glue(g)
+    # Store the glues of the (n-1)-grams and (n+1)-grams of each n-gram
+    for ngram in ngrams:
+        w = all_n_grams[ngram]
+        g = w.get_glue()
 
         n = w.get_size()
         #print(n)
@@ -52,20 +57,20 @@ def calculate_and_store_glue(all_n_grams: dict[str, n_gram], glue_function: str,
                 #print(f"Skipping sub-n_gram '{' '.join(to_update1)}' due to stop word restriction.")
                 ngram1 = None
             else:
-                ngram1 = get_element(to_update1, all_n_grams)
+                ngram1 = get_element(to_update1, all_n_grams, index)
 
             if to_update2[0] in stop_words or to_update2[-1] in stop_words:
                 #print(f"Skipping sub-n_gram '{' '.join(to_update2)}' due to stop word restriction.")
                 ngram2 = None
             else:
-                ngram2 = get_element(to_update2, all_n_grams)
+                ngram2 = get_element(to_update2, all_n_grams, index)
 
             # Process only valid sub-n_grams
             if ngram1 is not None:
                 # Get the key of the ngram1
                 ngram_key1 = " ".join(to_update1)
                 #print(ngram_key1)
-                g1 = all_n_grams[ngram_key1].calculate_glue(glue_function, all_n_grams, total_count)
+                g1 = ngram1.get_glue()
                 w.add_glue_n_grams_minus_1(ngram_key1, g1)
                 #print("glue ngram1")
                 if w.get_size() >= 3 and all_n_grams[ngram].get_size() <= 7:
@@ -75,7 +80,7 @@ def calculate_and_store_glue(all_n_grams: dict[str, n_gram], glue_function: str,
                 # Get the key of the ngram2
                 ngram_key2 = " ".join(to_update2)
                 #print(ngram_key2)
-                g2 = all_n_grams[ngram_key2].calculate_glue(glue_function, all_n_grams, total_count)
+                g2 = ngram2.get_glue()
                 w.add_glue_n_grams_minus_1(ngram_key2, g2)
                 #print("glue ngram2")
                 if w.get_size() >= 3 and all_n_grams[ngram].get_size() <= 7:
@@ -98,6 +103,27 @@ def calculate_and_store_glue(all_n_grams: dict[str, n_gram], glue_function: str,
 
     return all_n_grams
 
+#############################################################################
+# LocalMaxs: find the relevant expressions of the all_n_grams dictionary
+#############################################################################
+def local_maxs(all_n_grams: dict[str, n_gram], p: float = 2) -> tuple[np.ndarray, list[str]]:
+    """
+    Apply the LocalMaxs rule (n_gram.localMax) to every n-gram, after calculate_and_store_glue.
+    The n-grams created by create_n_grams are processed all at once on the columns of their table.
+    Args:
+        all_n_grams: A dictionary mapping strings to n_gram objects.
+        p: The exponent of the power mean of the max glues.
+    Returns:
+        The boolean mask of the relevant n-grams (in the order of the dictionary) and the list of relevant expressions.
+    """
+    if isinstance(all_n_grams, NGramDict):
+        return all_n_grams.table.local_maxs(p)
+
+    for ng in all_n_grams.values():
+        ng.localMax(p)
+    mask: np.ndarray = np.array([ng.is_relevant_expression() for ng in all_n_grams.values()], dtype=bool)
+    return mask, [key for key, ng in all_n_grams.items() if ng.is_relevant_expression()]
+
 #############################################################################
 # Extract all the relevant expressions from the all_n_grams dictionary
 #############################################################################
@@ -135,6 +161,9 @@ def ask_is_RE(expression: str) -> bool:
     Returns:
         True if the user confirms the expression is relevant, False otherwise.
     """
+    # tkinter is only imported when the dialog is shown (it is slow to import and needs a display)
+    import tkinter as tk
+    from tkinter import messagebox
     root: tk.Tk = tk.Tk()
     root.withdraw()  # Hide the main window
 
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+
+from src.cache import CorpusCache, FileRecord
+from src.ngram import create_n_grams, NGramDict
+from src.stopwords import NLTK_STOP_WORDS_VERSION, get_nltk_stopwords_in_corpus
+from src.text_processing import StopWordSet, text_processing
+
+###################################### Test Cases ###################################
+
+STOP_WORDS = StopWordSet(["the", "of", "and", "a", "in", "to", "is"])
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus_test")
+
+def stop_words_in_text(corpus: dict) -> StopWordSet:
+    # Stop words of a corpus for the tests: the words of STOP_WORDS found in the texts
+    return StopWordSet(word for text in corpus.values() for word in text.split() if word in STOP_WORDS)
+
+
+def frequencies(table) -> dict:
+    return {tuple(table.row_tokens(row)): table.frequencies[row] for row in range(len(table))}
+
+
+def same_n_grams(table, expected) -> bool:
+    # Same n-grams in the same order, with the same frequencies
+    return list(NGramDict(table).keys()) == list(NGramDict(expected).keys()) and frequencies(table) == frequencies(expected)
+
+
+def test_record_save_and_load():
+    print("Testing FileRecord.save and load...")
+    directory = tempfile.mkdtemp()
+    try:
+        record = FileRecord.from_text("Data mining. Data mining is fun; data mining!", ["is"])
+        path = os.path.join(directory, "record.npz")
+        record.save(path)
+        loaded = FileRecord.load(path)
+        assert loaded.words == record.words and loaded.stop_words == ["is"]
+        assert loaded.tokens() == record.tokens()
+        assert (loaded.counts.frequencies == record.counts.frequencies).all()
+        print("FileRecord.save and load: OK")
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_key_follows_stop_word_version():
+    print("Testing that the keys depend on the version of the stop-word list...")
+    directory = tempfile.mkdtemp()
+    try:
+        def versioned(corpus: dict) -> StopWordSet:
+            return stop_words_in_text(corpus)
+        versioned.version = "1"
+        key: str = CorpusCache(directory, versioned).key(b"data mining")
+        assert CorpusCache(directory, versioned).key(b"data mining") == key
+        versioned.version = "2"
+        assert CorpusCache(directory, versioned).key(b"data mining") != key
+        assert get_nltk_stopwords_in_corpus.version == NLTK_STOP_WORDS_VERSION
+        print("Stop-word version in the keys: OK")
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_cached_counts_match_serial():
+    print("Testing CorpusCache.count_n_grams against create_n_grams...")
+    cache_dir = tempfile.mkdtemp()
+    corpus_dir = tempfile.mkdtemp()
+    try:
+        # Copy of the test corpus, with a file shorter than an n-gram so that n-grams cross several files
+        for name in os.listdir(CORPUS_PATH):
+            shutil.copy(os.path.join(CORPUS_PATH, name), corpus_dir)
+        with open(os.path.join(corpus_dir, "fil_1a"), "w", encoding="utf-8") as f:
+            f.write("of the data")
+        with open(os.path.join(corpus_dir, "fil_1b"), "w", encoding="utf-8") as f:
+            f.write("mining")
+        expected = create_n_grams(text_processing(corpus_dir), STOP_WORDS).table
+
+        cold_cache = CorpusCache(cache_dir, stop_words_in_text)
+        cold = cold_cache.count_n_grams(corpus_dir)
+        assert cold.stop_words == STOP_WORDS
+        assert same_n_grams(cold, expected)
+        assert cold_cache.hits == 0 and cold_cache.misses == len(os.listdir(corpus_dir))
+
+        # Second run: everything comes from the cache
+        warm_cache = CorpusCache(cache_dir, stop_words_in_text)
+        assert same_n_grams(warm_cache.count_n_grams(corpus_dir), expected)
+        assert warm_cache.misses == 0
+
+        # Only the changed file is processed again
+        with open(os.path.join(corpus_dir, "fil_1a"), "a", encoding="utf-8") as f:
+            f.write(" and the data mining")
+        changed_cache = CorpusCache(cache_dir, stop_words_in_text)
+        changed = changed_cache.count_n_grams(corpus_dir)
+        assert changed_cache.misses == 1
+        assert same_n_grams(changed, create_n_grams(text_processing(corpus_dir), STOP_WORDS).table)
+        print("CorpusCache.count_n_grams: OK")
+    finally:
+        shutil.rmtree(cache_dir)
+        shutil.rmtree(corpus_dir)
+
+
+if __name__ == "__main__":
+    test_record_save_and_load()
+    test_key_follows_stop_word_version()
+    test_cached_counts_match_serial()
@@ -1,4 +1,4 @@
-from src.cohesion_metrics import scp_glue, dice_glue, mi_glue
+from src.cohesion_metrics import scp_glue, dice_glue, mi_glue, batch_glues
 from src.ngram import n_gram
 
 # --------------------------- Helper to create test n-grams ---------------------------
@@ -42,7 +42,31 @@ def run_tests():
         print(f"Dice: {dice:.5f}")
         print(f"MI: {mi:.5f}")
 
+# --------------------------- Batch engine ---------------------------
+
+def test_batch_glue_matches_scalar():
+    all_n_grams = create_manual_n_grams()
+    total_count = sum(ng.get_frequency() for ng in all_n_grams.values())
+    phrases = [key for key, ng in all_n_grams.items() if ng.get_size() > 1]
+
+    def frequency(tokens):
+        key = " ".join(tokens)
+        return all_n_grams[key].get_frequency() if key in all_n_grams else 1
+
+    freq_full = [all_n_grams[p].get_frequency() for p in phrases]
+    freq_left = [frequency(all_n_grams[p].get_tokens()[:-1]) for p in phrases]
+    freq_right = [frequency(all_n_grams[p].get_tokens()[1:]) for p in phrases]
+    glues = batch_glues(freq_full, freq_left, freq_right, total_count)
+
+    for i, phrase in enumerate(phrases):
+        ngram = all_n_grams[phrase]
+        assert glues["scp"][i] == scp_glue(ngram, all_n_grams, total_count), f"SCP differs for {phrase}"
+        assert glues["dice"][i] == dice_glue(ngram, all_n_grams), f"Dice differs for {phrase}"
+        assert glues["mi"][i] == mi_glue(ngram, all_n_grams, total_count), f"MI differs for {phrase}"
+    print("batch glue engine: OK")
+
 # --------------------------- Execute ---------------------------
 
 if __name__ == "__main__":
-    run_tests()
\ No newline at end of file
+    run_tests()
+    test_batch_glue_matches_scalar()
\ No newline at end of file
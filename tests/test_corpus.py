@@ -0,0 +1,44 @@
+import os
+
+from src.corpus import Corpus
+from src.corpus_index import CorpusIndex
+from src.keywords import get_explicit_keywords, calculate_implicit_keywords
+from src.text_processing import StopWordSet, text_processing
+
+###################################### Test Cases ###################################
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus_test")
+STOP_WORDS = StopWordSet(["the", "of", "and", "a", "in", "to", "is"])
+RELEVANT_EXPRESSIONS = ["United States", "the world", "New York"]
+
+def test_corpus_matches_files():
+    print("Testing Corpus against the functions reading the files...")
+    calls = []
+    def stop_words_in(texts):
+        calls.append(len(texts))
+        return StopWordSet(word for text in texts.values() for word in text.split() if word in STOP_WORDS)
+
+    corpus = Corpus.from_path(CORPUS_PATH, stop_words_in)
+    assert corpus.tokens() == text_processing(CORPUS_PATH)
+    for lowercase in (False, True):
+        expected = CorpusIndex.from_corpus(CORPUS_PATH, RELEVANT_EXPRESSIONS, lowercase)
+        index = corpus.index(RELEVANT_EXPRESSIONS, lowercase)
+        assert index.doc_tokens == expected.doc_tokens and index.postings == expected.postings
+    # The stop words are only computed once
+    assert corpus.stop_words == STOP_WORDS and corpus.stop_words == STOP_WORDS and len(calls) == 1
+    print("Corpus: OK")
+
+
+def test_keywords_from_corpus():
+    print("Testing the keyword stages on a Corpus...")
+    corpus = Corpus.from_path(CORPUS_PATH)
+    explicit = get_explicit_keywords(CORPUS_PATH, RELEVANT_EXPRESSIONS, 6, STOP_WORDS)
+    assert get_explicit_keywords(corpus, RELEVANT_EXPRESSIONS, 6, STOP_WORDS) == explicit
+    implicit = calculate_implicit_keywords(CORPUS_PATH, explicit, RELEVANT_EXPRESSIONS, 4, STOP_WORDS)
+    assert calculate_implicit_keywords(corpus, explicit, RELEVANT_EXPRESSIONS, 4, STOP_WORDS) == implicit
+    print("Keyword stages on a Corpus: OK")
+
+
+if __name__ == "__main__":
+    test_corpus_matches_files()
+    test_keywords_from_corpus()
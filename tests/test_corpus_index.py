@@ -0,0 +1,52 @@
+import os
+
+from src.corpus_index import CorpusIndex
+from src.text_processing import read_text_files
+
+###################################### Test Cases ###################################
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus_test")
+
+def create_index() -> CorpusIndex:
+    texts = {
+        "doc1": "The party started. Art lovers came to the party, art was everywhere.",
+        "doc2": "Modern art and data mining.",
+    }
+    return CorpusIndex.from_texts(texts, ["data mining", "art lovers", "party started"], lowercase=True)
+
+
+def test_whole_token_matches():
+    print("Testing whole-token matching...")
+    index = create_index()
+    assert index.tf("art", "doc1") == 2, f"tf failed: 'art' must not match 'party', got {index.tf('art', 'doc1')}"
+    assert index.tf("party", "doc1") == 2, "tf failed: 'party,' must be counted as 'party'"
+    assert index.tf("art lovers", "doc1") == 1 and index.tf("art lovers", "doc2") == 0
+    assert index.positions("party started", "doc1") == [1], f"positions failed: got {index.positions('party started', 'doc1')}"
+    print("whole-token matching: OK")
+
+
+def test_document_frequencies():
+    print("Testing document frequencies and co-occurrence...")
+    index = create_index()
+    assert index.df("art") == 2 and index.df("party") == 1 and index.df("data mining") == 1
+    assert index.df("missing") == 0 and index.tf("missing", "doc1") == 0
+    assert index.co_occurrence("art", "data mining") == ["doc2"]
+    assert index.co_occurrence("party", "data mining") == []
+    print("document frequencies and co-occurrence: OK")
+
+
+def test_from_corpus_matches_from_texts():
+    print("Testing CorpusIndex.from_corpus...")
+    expressions = ["data mining", "Natural Language"]
+    expected = CorpusIndex.from_texts(read_text_files(CORPUS_PATH), expressions, lowercase=True)
+    index = CorpusIndex.from_corpus(CORPUS_PATH, expressions, lowercase=True, block_size=101)
+    assert sorted(index.documents()) == sorted(expected.documents())
+    assert index.doc_tokens == expected.doc_tokens
+    assert index.postings == expected.postings
+    print("CorpusIndex.from_corpus: OK")
+
+
+if __name__ == "__main__":
+    test_whole_token_matches()
+    test_document_frequencies()
+    test_from_corpus_matches_from_texts()
@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+
+from src.corpus_index import CorpusIndex
+from src.implicit_scoring import ProximityScorer, score_implicit_keywords
+from src.keywords import semantic_proximity
+from src.text_processing import StopWordSet
+
+###################################### Test Cases ###################################
+
+STOP_WORDS = StopWordSet(["the", "of", "is", "and"])
+TEXTS = {
+    "doc1": "data mining is the mining of data and text mining",
+    "doc2": "the art of data science and data analysis",
+    "doc3": "neural network models and data analysis of text",
+    "doc4": "art history and the science of art",
+}
+EXPRESSIONS = ["data mining", "data analysis", "Neural Network"]
+EXPLICIT = {"doc1": ["data mining", "text"], "doc2": ["data", "science"], "doc3": ["neural", "Data"], "doc4": ["art"]}
+
+def reference_keywords(index, all_terms, sem_prox, fname, explicit, num_implicit):
+    # Step 3 of calculate_implicit_keywords with dictionaries, as it was written before the scorer
+    explicit_lower = [e.lower() for e in explicit]
+    scores = {}
+    for term in all_terms:
+        lower = term.lower()
+        if lower in explicit_lower or lower in STOP_WORDS or len(lower) <= 2 or index.tf(lower, fname) > 0:
+            continue
+        scores[term] = sum(sem_prox.get(tuple(sorted((term, exp))), 0.0) / i for i, exp in enumerate(explicit, 1))
+    return [term for term, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:num_implicit]]
+
+
+def build_scorer():
+    index = CorpusIndex.from_texts(TEXTS, EXPRESSIONS, lowercase=True)
+    all_terms = sorted(index.unigrams.union(EXPRESSIONS))
+    targets = {term for keywords in EXPLICIT.values() for term in keywords}
+    sem_prox = semantic_proximity(index, all_terms, targets)
+    return index, all_terms, sem_prox, ProximityScorer.from_index(index, all_terms, sem_prox, STOP_WORDS)
+
+
+def test_scorer_matches_dictionaries():
+    print("Testing ProximityScorer against the dictionary version...")
+    index, all_terms, sem_prox, scorer = build_scorer()
+    for num_implicit in (0, 3, 100):
+        for fname, explicit in EXPLICIT.items():
+            expected = reference_keywords(index, all_terms, sem_prox, fname, explicit, num_implicit)
+            assert scorer.implicit_keywords(fname, explicit, num_implicit) == expected
+    print("ProximityScorer: OK")
+
+
+def test_saved_scorer_and_parallel_scoring():
+    print("Testing ProximityScorer.save/load and parallel scoring...")
+    _, _, _, scorer = build_scorer()
+    directory = tempfile.mkdtemp()
+    try:
+        scorer.save(directory)
+        loaded = ProximityScorer.load(directory)
+        assert loaded.terms == scorer.terms and loaded.documents == scorer.documents
+        serial = score_implicit_keywords(scorer, EXPLICIT, 3)
+        assert score_implicit_keywords(loaded, EXPLICIT, 3) == serial
+    finally:
+        shutil.rmtree(directory)
+    assert score_implicit_keywords(scorer, EXPLICIT, 3, workers=2, chunk_size=1) == serial
+    print("ProximityScorer.save/load and parallel scoring: OK")
+
+
+if __name__ == "__main__":
+    test_scorer_matches_dictionaries()
+    test_saved_scorer_and_parallel_scoring()
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_import_time import LAZY_MODULES
+
+###################################### Test Cases ###################################
+
+def test_heavy_modules_are_lazy():
+    print("Testing that importing the pipeline does not import the heavy modules...")
+    code = (
+        "import sys, main\n"
+        "from src.stopwords import get_nltk_stopwords_in_corpus\n"
+        "found = get_nltk_stopwords_in_corpus({'doc': 'The cat and THE dog, of course.'})\n"
+        "assert found == {'the', 'and', 'of'}, found\n"
+        f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))\n"
+    )
+    # Run from the root of the repository, where main and src are importable
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=root)
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.strip() == "", f"Imported at start-up: {process.stdout.strip()}"
+    # No download is attempted: nltk is not even imported
+    assert "nltk_data" not in process.stderr
+    print("Lazy imports: OK")
+
+
+if __name__ == "__main__":
+    test_heavy_modules_are_lazy()
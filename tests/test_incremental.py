@@ -0,0 +1,72 @@
+import random
+
+from src.incremental import IncrementalExtractor
+from src.ngram import create_n_grams
+from src.text_processing import StopWordSet, tokenize
+from src.utils import calculate_and_store_glue, local_maxs
+
+###################################### Test Cases ###################################
+
+STOP_WORDS = StopWordSet(["the", "of", "a"])
+WORDS = ["data", "mining", "text", "the", "of", "a", "model", "keyword", ".", "big"]
+
+def full_rebuild(documents: dict, glue_function: str) -> tuple[set, dict]:
+    # The relevant expressions and frequencies computed from scratch on the documents in the order of their names
+    tokens = [token for name in sorted(documents) for token in tokenize(documents[name])]
+    ngrams = create_n_grams(tokens, STOP_WORDS)
+    calculate_and_store_glue(ngrams, glue_function, STOP_WORDS)
+    _, relevant = local_maxs(ngrams)
+    return set(relevant), {key: ngram.get_frequency() for key, ngram in ngrams.items()}
+
+
+def random_document(rng: random.Random) -> str:
+    # Small vocabulary and some repeated phrases, so that there are relevant expressions
+    phrases = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 6))) for _ in range(3)]
+    return " ".join(rng.choice(phrases + ["data mining model", "big data mining"]) for _ in range(rng.randint(0, 12)))
+
+
+def check(extractor: IncrementalExtractor, documents: dict, glue_function: str) -> None:
+    expected_relevant, expected_frequencies = full_rebuild(documents, glue_function)
+    assert set(extractor.relevant_expressions()) == expected_relevant
+    table = extractor.table
+    frequencies = {table.row_key(row): table.frequencies[row] for row in range(len(table)) if table.frequencies[row] > 0}
+    assert frequencies == expected_frequencies
+
+
+def test_incremental_matches_full_rebuild():
+    print("Testing IncrementalExtractor against a full rebuild after random updates...")
+    for glue_function, seed in [("dice", 0), ("dice", 1), ("dice", 2), ("scp", 3), ("mi", 4)]:
+        rng = random.Random(seed)
+        extractor = IncrementalExtractor(STOP_WORDS, glue_function)
+        documents = {}
+        for step in range(40):
+            action = rng.random()
+            if action < 0.55 or not documents:
+                new = {f"doc_{rng.randint(0, 60):02d}": random_document(rng) for _ in range(rng.randint(1, 3))}
+                documents.update(new)
+                extractor.add_documents(new)
+            else:
+                removed = rng.sample(sorted(documents), rng.randint(1, min(3, len(documents))))
+                for name in removed:
+                    del documents[name]
+                extractor.remove_documents(removed)
+            check(extractor, documents, glue_function)
+    print("IncrementalExtractor: OK")
+
+
+def test_incremental_updates_locally():
+    print("Testing that a small update only computes a few glues again...")
+    rng = random.Random(5)
+    documents = {f"doc_{i:03d}": random_document(rng) + " keyword extraction rocks" for i in range(200)}
+    extractor = IncrementalExtractor(STOP_WORDS)
+    extractor.add_documents(documents)
+    extractor.add_documents({"doc_500": "keyword extraction rocks"})
+    assert 0 < extractor.updated_rows < len(extractor.table) // 4
+    documents["doc_500"] = "keyword extraction rocks"
+    check(extractor, documents, "dice")
+    print("IncrementalExtractor local update: OK")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_rebuild()
+    test_incremental_updates_locally()
@@ -2,7 +2,10 @@ import os
 import tempfile
 import shutil
 
-from src.keywords import get_explicit_keywords, calculate_implicit_keywords
+import math
+
+from src.corpus_index import CorpusIndex
+from src.keywords import get_explicit_keywords, calculate_implicit_keywords, semantic_proximity, min_max_distance
 
 def test_get_explicit_keywords_simple():
     # Create a minimal temporary corpus
@@ -62,6 +65,59 @@ def test_calculate_implicit_keywords_simple():
         shutil.rmtree(tmp_dir)
 
 
+def reference_semantic_proximity(index, term_a, term_b):
+    # Direct formulas of the inter-document correlation and intra-document proximity
+    docs = index.documents()
+    p_a = [index.tf(term_a, d) / index.num_tokens(d) for d in docs]
+    p_b = [index.tf(term_b, d) / index.num_tokens(d) for d in docs]
+    mean_a, mean_b = sum(p_a) / len(docs), sum(p_b) / len(docs)
+    cov = sum((a - mean_a) * (b - mean_b) for a, b in zip(p_a, p_b))
+    std_a = math.sqrt(sum((a - mean_a) ** 2 for a in p_a) / len(docs))
+    std_b = math.sqrt(sum((b - mean_b) ** 2 for b in p_b) / len(docs))
+    corr = cov / (std_a * std_b) if std_a > 0 and std_b > 0 else 0.0
+    co_docs = index.co_occurrence(term_a, term_b)
+    if not co_docs:
+        return 0.0
+    ip = 0.0
+    for d in co_docs:
+        dists = [abs(i - j) for i in index.positions(term_a, d) for j in index.positions(term_b, d)]
+        ip += 1 - min(dists) / max(dists) if max(dists) > 0 else 0.0
+    ip /= len(co_docs)
+    return corr * math.sqrt(ip) if ip > 0 else 0.0
+
+
+def test_min_max_distance():
+    assert min_max_distance([0, 10, 20], [4, 13]) == (3, 16)
+    assert min_max_distance([5], [5]) == (0, 0)
+    assert min_max_distance([1, 2], [30]) == (28, 29)
+    print("test_min_max_distance: OK")
+
+
+def test_semantic_proximity_matches_all_pairs():
+    texts = {
+        "d1": "cat dog bird cat river stone",
+        "d2": "dog bird cat dog tree",
+        "d3": "stone river tree cat house dog bird",
+        "d4": "house tree house fish",
+    }
+    index = CorpusIndex.from_texts(texts, ["dog bird"])
+    all_terms = sorted(index.unigrams | {"dog bird"})
+    targets = {"cat", "dog bird"}
+    sem_prox = semantic_proximity(index, all_terms, targets)
+
+    for a in all_terms:
+        for b in all_terms:
+            if a == b or (a not in targets and b not in targets):
+                continue
+            expected = reference_semantic_proximity(index, a, b)
+            assert math.isclose(sem_prox.get(tuple(sorted((a, b))), 0.0), expected, abs_tol=1e-12)
+    # Only the pairs involving a target are computed
+    assert all(a in targets or b in targets for a, b in sem_prox)
+    print("test_semantic_proximity_matches_all_pairs: OK")
+
+
 if __name__ == "__main__":
     test_get_explicit_keywords_simple()
-    test_calculate_implicit_keywords_simple()
\ No newline at end of file
+    test_calculate_implicit_keywords_simple()
+    test_min_max_distance()
+    test_semantic_proximity_matches_all_pairs()
@@ -1,3 +1,4 @@
+import os
 from src.ngram import create_n_grams
 
 ######################################### Test1 ########################################
@@ -10,3 +11,53 @@ print(returned_dict)
 print()
 print( len(returned_dict)>len(tokens))
 
+
+
+######################################### Test2 ########################################
+# create_n_grams must give the same dictionary as the string based algorithm on the corpus test
+from src.text_processing import text_processing
+
+def reference_n_grams(tokens:list, stop_words:list) -> dict:
+  n_grams:dict = {}
+  for index in range(len(tokens)+1):
+    for size in range(2,9):
+      if index+size > len(tokens):
+        break
+      if(tokens[index] in stop_words):
+        break
+      if(tokens[index+size-1] in stop_words):
+        continue
+      key:str = " ".join(tokens[index:index+size])
+      if key in n_grams:
+        n_grams[key][1] += 1
+      else:
+        n_grams[key] = [size,1,tokens[index:index+size]]
+  return n_grams
+
+def test_create_n_grams_golden():
+  tokens:list = text_processing(os.path.join(os.path.dirname(__file__), "corpus_test"))
+  stop_words:list = ["the","a","of","and","to","in","is","that","for","it","on","with","as","by","this"]
+  expected:dict = reference_n_grams(tokens, stop_words)
+  result = create_n_grams(tokens, stop_words)
+  assert list(result.keys()) == list(expected.keys()), "create_n_grams failed: the n-grams differ from the reference."
+  for key, ngram in result.items():
+    assert [ngram.get_size(), ngram.get_frequency(), ngram.get_tokens()] == expected[key], f"create_n_grams failed for {key}"
+  print("create_n_grams golden test: OK")
+
+def test_standalone_n_gram():
+  from src.ngram import n_gram, NGramView
+  # An n-gram built by hand is a small record, not a table of one row
+  ngram = n_gram(2, 3, ["bem-vindo", "ao"])
+  assert not hasattr(ngram, "__dict__") and not hasattr(ngram, "_table")
+  assert ngram.get_glue_n_grams_minus_1() == {} and ngram.get_max_glue_n_grams_plus_1() == 0.0
+  ngram.add_glue_n_grams_plus_1("bem-vindo ao mundo", 0.5)
+  assert ngram.get_glue_n_grams_plus_1() == {"bem-vindo ao mundo": 0.5}
+  # The n-grams of create_n_grams are views over the rows of their table, with the same methods
+  view = create_n_grams(tokens, stop_words)["bem-vindo ao"]
+  assert isinstance(view, NGramView) and isinstance(view, n_gram)
+  assert [view.get_size(), view.get_frequency(), view.get_tokens()] == [2, 1, ["bem-vindo", "ao"]]
+  print("standalone n_gram test: OK")
+
+if __name__ == "__main__":
+  test_create_n_grams_golden()
+  test_standalone_n_gram()
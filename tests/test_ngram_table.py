@@ -0,0 +1,255 @@
+import os
+import random
+
+import numpy as np
+
+from src import ngram_table
+from src.ngram_table import NGramTable, NGramCounts, NO_ID, count_n_gram_keys, count_frequent_n_grams
+from src.ngram import n_gram, NGramDict, create_n_grams, create_n_grams_streaming, create_n_grams_parallel, create_n_grams_prefiltered
+from src.utils import calculate_and_store_glue, local_maxs
+from src.text_processing import StopWordSet, as_stop_word_set, text_processing, iter_token_chunks
+
+###################################### Test Cases ###################################
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus_test")
+
+def test_table_add_and_find():
+    print("Testing NGramTable.add and find...")
+    table = NGramTable()
+    ids = tuple(table.encode(["a", "b"]))
+    row = table.add(ids)
+    assert table.add(ids) == row, "add failed: Expected the same row for the same n-gram."
+    assert table.frequencies[row] == 2, f"add failed: Expected frequency 2, got {table.frequencies[row]}."
+    assert table.find_tokens(["a", "b"]) == row, "find_tokens failed: Expected the row of the n-gram."
+    assert table.find_tokens(["b", "a"]) == NO_ID, "find_tokens failed: Expected NO_ID for a missing n-gram."
+    assert table.row_key(row) == "a b", f"row_key failed: got {table.row_key(row)}."
+    print("NGramTable.add and find: OK")
+
+
+def test_n_gram_view():
+    print("Testing n_gram views...")
+    ngram = n_gram(3, 4, ["x", "y", "z"])
+    ngram.set_glue(0.5)
+    ngram.add_glue_n_grams_minus_1("x y", 0.25)
+    assert ngram.get_tokens() == ["x", "y", "z"] and ngram.get_size() == 3 and ngram.get_frequency() == 4
+    assert ngram.get_glue() == 0.5
+    assert ngram.get_glue_n_grams_minus_1() == {"x y": 0.25}
+    assert not hasattr(ngram, "__dict__"), "n_gram failed: Expected no per-instance __dict__."
+    print("n_gram views: OK")
+
+
+def test_create_n_grams_dict():
+    print("Testing the dictionary returned by create_n_grams...")
+    tokens = ["a", "b", "c", "the", "a", "b", "c"]
+    ngrams = create_n_grams(tokens, ["the"])
+    assert isinstance(ngrams, NGramDict)
+    assert ngrams["a b"].get_frequency() == 2 and ngrams["a b c"].get_frequency() == 2
+    assert "c the" not in ngrams and "the a" not in ngrams
+    assert list(ngrams.keys()) == [key for key, _ in ngrams.items()]
+    print("create_n_grams dictionary: OK")
+
+
+def test_streaming_matches_serial():
+    print("Testing create_n_grams_streaming against create_n_grams...")
+    stop_words = StopWordSet(["the", "of", "and", "a", "in", "to", "is"])
+    serial = create_n_grams(text_processing(CORPUS_PATH), stop_words)
+    # Tiny blocks, so that many n-grams cross the boundaries of the chunks
+    streamed = create_n_grams_streaming(iter_token_chunks(CORPUS_PATH, block_size=97), stop_words)
+    assert list(streamed.keys()) == list(serial.keys())
+    assert streamed.table.frequencies == serial.table.frequencies
+    assert streamed.table.words == serial.table.words
+    print("create_n_grams_streaming: OK")
+
+
+def test_counts_merge():
+    print("Testing NGramCounts.merge...")
+    first, second = NGramTable(), NGramTable()
+    first.add(tuple(first.encode(["a", "b"])), 2)
+    second.add(tuple(second.encode(["c", "a", "b"])), 1)
+    second.add(tuple(second.encode(["a", "b"])), 3)
+    merged = NGramCounts.from_table(first).merge(NGramCounts.from_table(second)).to_table()
+    assert merged.words == ["a", "b", "c"]
+    assert merged.frequencies[merged.find_tokens(["a", "b"])] == 5
+    assert merged.frequencies[merged.find_tokens(["c", "a", "b"])] == 1
+    print("NGramCounts.merge: OK")
+
+
+def test_counts_from_keys():
+    print("Testing NGramCounts.from_keys...")
+    table = NGramTable(stop_words=["the"])
+    ids = table.encode("a b the c a b the c d a".split())
+    table.count_n_grams(ids)
+    expected = NGramCounts.from_table(table)
+    counts = NGramCounts.from_keys(table.words, count_n_gram_keys(ids, table.is_stop))
+    assert (counts.ids == expected.ids).all() and (counts.lengths == expected.lengths).all()
+    assert (counts.frequencies == expected.frequencies).all()
+    print("NGramCounts.from_keys: OK")
+
+
+def test_counts_merge_with_hash_collisions():
+    print("Testing NGramCounts.merge_all when every row has the same hash...")
+    tables = [NGramTable(), NGramTable(), NGramTable()]
+    for table, text in zip(tables, ["a b c a b", "b c d", "c a b c"]):
+        table.count_n_grams(table.encode(text.split()))
+    counts = [NGramCounts.from_table(table) for table in tables]
+    expected = NGramCounts.merge_all(counts)
+    multipliers = ngram_table._ROW_HASH_MULTIPLIERS
+    ngram_table._ROW_HASH_MULTIPLIERS = np.zeros_like(multipliers)
+    try:
+        merged = NGramCounts.merge_all(counts)
+    finally:
+        ngram_table._ROW_HASH_MULTIPLIERS = multipliers
+    assert merged.words == expected.words and (merged.ids == expected.ids).all()
+    assert (merged.frequencies == expected.frequencies).all()
+    print("NGramCounts.merge_all with hash collisions: OK")
+
+
+def test_parallel_matches_serial():
+    print("Testing create_n_grams_parallel against create_n_grams...")
+    stop_words = StopWordSet(["the", "of", "and", "a", "in", "to", "is"])
+    serial = create_n_grams(text_processing(CORPUS_PATH), stop_words)
+    parallel = create_n_grams_parallel(CORPUS_PATH, stop_words, workers=3)
+    assert parallel.table.words == serial.table.words
+    assert parallel.table.ids == serial.table.ids
+    assert parallel.table.frequencies == serial.table.frequencies
+    assert parallel.table.index == serial.table.index
+    print("create_n_grams_parallel: OK")
+
+
+def test_table_glue_matches_dict_glue():
+    print("Testing calculate_and_store_glue on the table against plain n-grams...")
+    tokens = "a b c d a b c e a b c d b c d".split()
+    stop_words = ["e"]
+    for glue_function in ["scp", "dice", "mi"]:
+        table_ngrams = calculate_and_store_glue(create_n_grams(tokens, stop_words), glue_function, stop_words)
+        plain_ngrams = {key: n_gram(ng.get_size(), ng.get_frequency(), ng.get_tokens()) for key, ng in table_ngrams.items()}
+        calculate_and_store_glue(plain_ngrams, glue_function, stop_words)
+        for key, ng in table_ngrams.items():
+            plain = plain_ngrams[key]
+            assert ng.get_glue() == plain.get_glue(), f"{glue_function} glue differs for {key}"
+            assert ng.get_max_glue_n_grams_minus_1() == plain.get_max_glue_n_grams_minus_1(), f"{glue_function} max(n-1) differs for {key}"
+            assert ng.get_max_glue_n_grams_plus_1() == plain.get_max_glue_n_grams_plus_1(), f"{glue_function} max(n+1) differs for {key}"
+            assert ng.get_glue_n_grams_minus_1() == plain.get_glue_n_grams_minus_1(), f"{glue_function} (n-1) glues differ for {key}"
+            assert ng.get_glue_n_grams_plus_1() == plain.get_glue_n_grams_plus_1(), f"{glue_function} (n+1) glues differ for {key}"
+    print("calculate_and_store_glue on the table: OK")
+
+
+
+def test_local_maxs_matches_local_max():
+    print("Testing local_maxs against n_gram.localMax...")
+    tokens = "a b c d a b c e a b c d b c d a b c d".split()
+    for glue_function in ["scp", "dice", "mi"]:
+        ngrams = calculate_and_store_glue(create_n_grams(tokens, ["e"]), glue_function, ["e"])
+        mask, relevant = local_maxs(ngrams)
+        for ng in ngrams.values():
+            ng.localMax()
+        assert mask.tolist() == [ng.is_relevant_expression() for ng in ngrams.values()], f"{glue_function}: masks differ"
+        assert relevant == [key for key, ng in ngrams.items() if ng.is_relevant_expression()], f"{glue_function}: expressions differ"
+    print("local_maxs: OK")
+
+
+def test_stop_word_flags():
+    print("Testing the stop word flags of the vocabulary...")
+    stop_words = as_stop_word_set(["the", "of"])
+    assert isinstance(stop_words, StopWordSet) and as_stop_word_set(stop_words) is stop_words
+    table = NGramTable(stop_words=stop_words)
+    ids = table.encode(["the", "end", "of", "the", "story"])
+    assert [table.is_stop[word_id] for word_id in ids] == [1, 0, 1, 1, 0], "is_stop failed: wrong stop word flags."
+    print("stop word flags: OK")
+
+
+def test_prefiltered_matches_full():
+    print("Testing create_n_grams_prefiltered against create_n_grams...")
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(30)]
+    for _ in range(100):
+        stop_words = StopWordSet(rng.sample(words, rng.randint(0, 10)))
+        # Zipf-like tokens, so that some n-grams are frequent
+        tokens = [words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(rng.randint(0, 500))]
+        full = calculate_and_store_glue(create_n_grams(tokens, stop_words), "dice", stop_words)
+        prefiltered = calculate_and_store_glue(create_n_grams_prefiltered(tokens, stop_words), "dice", stop_words)
+        assert local_maxs(prefiltered)[1] == local_maxs(full)[1]
+        for key, ng in prefiltered.items():
+            assert ng.get_frequency() == full[key].get_frequency(), f"frequency differs for {key}"
+    tokens = text_processing(CORPUS_PATH)
+    stop_words = StopWordSet(["the", "of", "and", "a", "in", "to", "is"])
+    prefiltered = create_n_grams_prefiltered(tokens, stop_words)
+    assert len(prefiltered) < len(create_n_grams(tokens, stop_words)) / 10
+    # The glues that depend on the number of n-grams cannot be computed on a prefiltered table
+    for glue_function in ["scp", "mi"]:
+        try:
+            calculate_and_store_glue(prefiltered, glue_function, stop_words)
+            assert False, f"{glue_function} must raise a ValueError on a prefiltered table"
+        except ValueError:
+            pass
+    print("create_n_grams_prefiltered: OK")
+
+def test_prefilter_sketch_collisions():
+    print("Testing count_frequent_n_grams when the count-min estimates collide...")
+    rng = random.Random(3)
+    words = [f"w{i}" for i in range(60)]
+    for _ in range(10):
+        stop_words = StopWordSet(rng.sample(words, 5))
+        tokens = [words[min(int(rng.paretovariate(1.1)) - 1, len(words) - 1)] for _ in range(3000)]
+        full = calculate_and_store_glue(create_n_grams(tokens, stop_words), "dice", stop_words)
+        # A narrow sketch overestimates many n-grams: the n-grams whose true frequency is below 3 are not candidates
+        table = NGramTable(stop_words=stop_words)
+        ids = [table.intern(token) for token in tokens]
+        table = count_frequent_n_grams(table.words, ids, table.is_stop, 3, width=4096).to_table(stop_words)
+        table.prefilter_frequency = 3
+        prefiltered = calculate_and_store_glue(NGramDict(table), "dice", stop_words)
+        assert local_maxs(prefiltered)[1] == local_maxs(full)[1]
+        for key, ng in prefiltered.items():
+            assert ng.get_frequency() == full[key].get_frequency(), f"frequency differs for {key}"
+            if ng.get_frequency() >= 3:
+                assert np.isclose(ng.get_max_glue_n_grams_plus_1(), full[key].get_max_glue_n_grams_plus_1()), key
+                assert np.isclose(ng.get_max_glue_n_grams_minus_1(), full[key].get_max_glue_n_grams_minus_1()), key
+    print("Prefilter with collisions: OK")
+
+
+def test_pruned_glue_matches_full():
+    print("Testing calculate_and_store_glue with a minimum frequency...")
+    rng = random.Random(1)
+    words = [f"w{i}" for i in range(30)]
+    for trial in range(60):
+        stop_words = StopWordSet(rng.sample(words, rng.randint(0, 10)))
+        tokens = [words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(rng.randint(0, 500))]
+        glue_function = ["dice", "scp", "mi"][trial % 3]
+        full = calculate_and_store_glue(create_n_grams(tokens, stop_words), glue_function, stop_words)
+        full_mask, expected = local_maxs(full)
+        for min_frequency in (3, 5):
+            pruned = calculate_and_store_glue(create_n_grams(tokens, stop_words), glue_function, stop_words, min_frequency)
+            mask, found = local_maxs(pruned)
+            candidates = np.frombuffer(full.table.frequencies, dtype=np.int64) >= min_frequency
+            # The glue and the max glues of the candidates are exact
+            for column in ["glues", "max_glues_minus_1", "max_glues_plus_1"]:
+                assert np.array_equal(np.frombuffer(getattr(pruned.table, column))[candidates],
+                                      np.frombuffer(getattr(full.table, column))[candidates]), f"{column} differs"
+            assert mask.tolist() == (full_mask & candidates).tolist()
+            if min_frequency == 3:
+                assert found == expected
+            report = pruned.table.pruning_report
+            assert report.num_candidates == int(candidates.sum()) and report.pruned_glue == len(pruned) - report.num_linked
+    try:
+        calculate_and_store_glue({}, "dice", [], min_frequency=3)
+        assert False, "min_frequency must raise a ValueError on a plain dictionary"
+    except ValueError:
+        pass
+    print("calculate_and_store_glue with a minimum frequency: OK")
+
+
+if __name__ == "__main__":
+    test_table_add_and_find()
+    test_n_gram_view()
+    test_create_n_grams_dict()
+    test_streaming_matches_serial()
+    test_counts_merge()
+    test_counts_from_keys()
+    test_counts_merge_with_hash_collisions()
+    test_parallel_matches_serial()
+    test_table_glue_matches_dict_glue()
+    test_local_maxs_matches_local_max()
+    test_stop_word_flags()
+    test_prefiltered_matches_full()
+    test_prefilter_sketch_collisions()
+    test_pruned_glue_matches_full()
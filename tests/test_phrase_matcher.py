@@ -0,0 +1,45 @@
+import random
+
+from src.phrase_matcher import PhraseMatcher
+
+###################################### Test Cases ###################################
+
+def naive_matches(expressions, tokens):
+    # Every (start, expression) found by comparing each expression at each position
+    found = set()
+    for expression_id, expression in enumerate(expressions):
+        words = expression.split()
+        for start in range(len(tokens) - len(words) + 1):
+            if words and tokens[start:start + len(words)] == words:
+                found.add((start, expression_id))
+    return found
+
+
+def test_phrase_matcher_overlaps():
+    print("Testing PhraseMatcher on overlapping expressions...")
+    matcher = PhraseMatcher(["a a", "a a a", "b a a", "a b", "a b"])
+    assert matcher.expressions == ["a a", "a a a", "b a a", "a b"]
+    tokens = "b a a a b".split()
+    assert set(matcher.find_all(tokens)) == {(1, 0), (2, 0), (1, 1), (0, 2), (3, 3)}
+    # The occurrences come in the order of their end
+    ends = [start + matcher.lengths[expression_id] for start, expression_id in matcher.find_all(tokens)]
+    assert ends == sorted(ends)
+    print("PhraseMatcher overlaps: OK")
+
+
+def test_phrase_matcher_random():
+    print("Testing PhraseMatcher against a naive search...")
+    rng = random.Random(0)
+    for _ in range(300):
+        vocabulary = ["a", "b", "c", "."][:rng.randint(1, 4)]
+        expressions = list(dict.fromkeys(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(0, 12))))
+        tokens = [rng.choice(vocabulary) for _ in range(rng.randint(0, 40))]
+        matches = list(PhraseMatcher(expressions).find_all(tokens))
+        assert len(matches) == len(set(matches))
+        assert set(matches) == naive_matches(expressions, tokens)
+    print("PhraseMatcher: OK")
+
+
+if __name__ == "__main__":
+    test_phrase_matcher_overlaps()
+    test_phrase_matcher_random()
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+
+from main import extractor
+from src.profiling import NULL_PROFILER, Profiler
+
+###################################### Test Cases ###################################
+
+def test_profiler_stages():
+    print("Testing the measures and the report of the stages...")
+    profiler = Profiler()
+    with profiler.stage("outer") as stage:
+        stage.count(tokens=3)
+        with profiler.stage("inner"):
+            profiler.count(pairs=2)
+            profiler.count(pairs=5)
+        data = [list(range(1000)) for _ in range(100)]
+        stage.count(tokens=len(data))
+    profiler.count(ignored=1)
+
+    outer, inner = profiler.stages
+    assert (outer.name, outer.depth, inner.name, inner.depth) == ("outer", 0, "inner", 1)
+    assert outer.counts == {"tokens": 103} and inner.counts == {"pairs": 7}
+    assert outer.wall_seconds >= inner.wall_seconds >= 0 and outer.cpu_seconds >= 0
+    assert outer.tracemalloc_peak is None and outer.cprofile is None
+
+    # The JSON report gives back the measures; the table has one line per stage and the total
+    report = json.loads(profiler.to_json())
+    assert [stats["stage"] for stats in report["stages"]] == ["outer", "inner"]
+    assert report["stages"][1]["counts"] == {"pairs": 7}
+    assert report["total"]["wall_seconds"] == outer.wall_seconds
+    lines = profiler.format_table().splitlines()
+    assert len(lines) == 4 and lines[1].startswith("outer") and lines[2].startswith("  inner") and lines[3].startswith("total")
+    print("Profiler stages: OK")
+
+def test_profiler_hooks():
+    print("Testing the cProfile and tracemalloc hooks...")
+    profiler = Profiler(cprofile=True, tracemalloc=True)
+    with profiler.stage("allocate"):
+        data = [bytes(1000) for _ in range(1000)]
+        with profiler.stage("nested"):
+            sorted(range(100))
+    allocate, nested = profiler.stages
+    assert allocate.tracemalloc_peak >= 1_000_000
+    assert "function calls" in allocate.cprofile
+    # Only the top-level stages are hooked
+    assert nested.tracemalloc_peak is None and nested.cprofile is None
+    assert "tracemalloc_peak_bytes" in profiler.report()["stages"][0]
+    print("Profiler hooks: OK")
+
+def test_null_profiler():
+    print("Testing that the default profiler records nothing...")
+    with NULL_PROFILER.stage("stage") as stage:
+        stage.count(tokens=10)
+        NULL_PROFILER.count(tokens=10)
+    assert not NULL_PROFILER.enabled and NULL_PROFILER.stages == []
+    print("Null profiler: OK")
+
+def test_extractor_stages():
+    print("Testing the stages recorded by the extractor...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for i in range(3):
+            with open(os.path.join(tmp_dir, f"doc{i}.txt"), "w", encoding="utf-8") as f:
+                f.write("the keyword extraction of the text and the keyword extraction of the corpus. " * 5)
+        profiler = Profiler()
+        profiled = extractor(tmp_dir, profiler=profiler)
+        assert [stats.name for stats in profiler.stages] == [
+            "tokenization", "stop words", "create_n_grams", "calculate_and_store_glue", "localMax"]
+        tokenization, _, create_n_grams, _, local_max = profiler.stages
+        assert tokenization.counts == {"documents": 3, "tokens": create_n_grams.counts["tokens"]}
+        assert create_n_grams.counts["n_grams"] == len(profiled)
+        assert "keyword extraction" in profiled and local_max.counts["relevant_expressions"] >= 1
+        # Same n-grams without the profiler
+        assert list(extractor(tmp_dir)) == list(profiled)
+        # The n-grams pruned by min_frequency are counted in the glue stage
+        profiler = Profiler()
+        pruned = extractor(tmp_dir, min_frequency=3, profiler=profiler)
+        glue = profiler.stages[3]
+        assert glue.counts["candidates"] == pruned.table.pruning_report.num_candidates
+        assert glue.counts["pruned_glue"] == pruned.table.pruning_report.pruned_glue
+    finally:
+        shutil.rmtree(tmp_dir)
+    print("Extractor stages: OK")
+
+
+if __name__ == "__main__":
+    test_profiler_stages()
+    test_profiler_hooks()
+    test_null_profiler()
+    test_extractor_stages()
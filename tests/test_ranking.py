@@ -0,0 +1,24 @@
+import random
+
+import numpy as np
+
+from src.ranking import top_k_indices
+
+###################################### Test Cases ###################################
+
+def test_top_k_indices():
+    print("Testing top_k_indices against a full sort...")
+    rng = random.Random(0)
+    for _ in range(200):
+        num_entries = rng.randint(0, 60)
+        # Few distinct scores, so that there are many ties at the cut-off
+        scores = np.array([rng.randint(0, 5) / 4 for _ in range(num_entries)])
+        ranks = np.array(rng.sample(range(1000), num_entries), dtype=np.int64)
+        expected = np.lexsort((ranks, -scores)).tolist()
+        for k in (0, 1, 5, num_entries, num_entries + 3):
+            assert top_k_indices(scores, ranks, k).tolist() == expected[:max(k, 0)]
+    print("top_k_indices: OK")
+
+
+if __name__ == "__main__":
+    test_top_k_indices()
@@ -0,0 +1,90 @@
+import os
+import random
+
+import numpy as np
+
+from src.sketches import CountMinSketch, HyperLogLog, NeighborSketch, hash_strings
+from src.stopwords import count_neighbors, get_stop_words, sketch_neighbors
+from src.text_processing import read_text_files
+
+###################################### Test Cases ###################################
+
+def test_hyperloglog():
+    print("Testing HyperLogLog estimates and merge...")
+    for n in (0, 10, 1000, 50_000):
+        sketch = HyperLogLog(12)
+        sketch.update(f"v{i}" for i in range(n))
+        # Duplicates do not change the estimate
+        sketch.update(f"v{i}" for i in range(n // 2))
+        assert abs(sketch.count() - n) <= max(1, 0.05 * n), (n, sketch.count())
+
+    left, right, union = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+    left.update(f"v{i}" for i in range(0, 6000))
+    right.update(f"v{i}" for i in range(4000, 10000))
+    union.update(f"v{i}" for i in range(10000))
+    left.merge(right)
+    assert np.array_equal(left.registers, union.registers)
+    try:
+        left.merge(HyperLogLog(8))
+        assert False, "sketches of different precisions must not be merged"
+    except ValueError:
+        pass
+    print("HyperLogLog: OK")
+
+def test_neighbor_sketch():
+    print("Testing NeighborSketch against the exact neighbor counts...")
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(300)] + ["the", "of", "and"]
+    texts = [
+        " ".join(rng.choice(vocabulary[-3:]) if rng.random() < 0.3 else rng.choice(vocabulary) for _ in range(400))
+        for _ in range(20)
+    ]
+    words, counts = count_neighbors(texts)
+    exact = dict(zip(words, counts.tolist()))
+
+    sketch = sketch_neighbors(texts, precision=12)
+    estimates = sketch.counts()
+    assert estimates.keys() == exact.keys()
+    for word, count in exact.items():
+        assert abs(estimates[word] - count) <= max(2, 0.1 * count), (word, count, estimates[word])
+
+    # Shards sketched separately and merged give the same sketch as the whole corpus
+    merged = NeighborSketch(12)
+    for shard in range(3):
+        merged.merge(sketch_neighbors(texts[shard::3], precision=12))
+    assert merged.counts() == sketch_neighbors([text for shard in range(3) for text in texts[shard::3]], 12).counts()
+    print("NeighborSketch: OK")
+
+def test_default_precision_stop_words():
+    print("Testing the stop words of the approximate mode with the default precision...")
+    corpus = read_text_files(os.path.join(os.path.dirname(__file__), "corpus_test"))
+    assert get_stop_words(corpus, approximate=True) == get_stop_words(corpus)
+    print("Default precision stop words: OK")
+
+def test_count_min_sketch():
+    print("Testing CountMinSketch estimates...")
+    rng = random.Random(0)
+    counts = {f"v{i}": rng.randint(1, 20) for i in range(2000)}
+    values = [value for value, count in counts.items() for _ in range(count)]
+    rng.shuffle(values)
+    for dtype in (np.uint32, np.uint8):
+        sketch = CountMinSketch(4096, 4, dtype)
+        half = CountMinSketch(4096, 4, dtype)
+        sketch.add_hashes(hash_strings(values[:len(values) // 2]))
+        half.add_hashes(hash_strings(values[len(values) // 2:]))
+        sketch.merge(half)
+        estimates = sketch.estimate_hashes(hash_strings(list(counts))).tolist()
+        # Never below the true count, and exact for most values
+        assert all(estimate >= count for estimate, count in zip(estimates, counts.values()))
+        assert sum(estimate == count for estimate, count in zip(estimates, counts.values())) > 0.9 * len(counts)
+    saturated = CountMinSketch(16, 2, np.uint8)
+    saturated.add_hashes(hash_strings(["a"] * 300))
+    assert saturated.estimate_hashes(hash_strings(["a"])).tolist() == [255]
+    print("CountMinSketch: OK")
+
+
+if __name__ == "__main__":
+    test_hyperloglog()
+    test_neighbor_sketch()
+    test_default_precision_stop_words()
+    test_count_min_sketch()
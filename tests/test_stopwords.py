@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # tests/test_stopwords.py
 
+import os
+
 from src.stopwords import (
     count_syllables,
+    count_neighbors,
     EXCEPTIONS,
     extract_bigram_neighbors,
     compute_neigsyl,
@@ -40,6 +43,26 @@ def test_count_syllables():
 
     print("count_syllables tests passed.")
 
+def test_count_neighbors():
+    texts = ["The cat saw the dog.", "A dog saw THE cat"]
+    words, counts = count_neighbors(texts)
+    neighbors = dict(zip(words, counts.tolist()))
+    # the: cat, saw, dog -- dog: the, a, saw -- saw: cat, the, dog
+    assert neighbors == {"the": 3, "cat": 2, "saw": 3, "dog": 3, "a": 1}, f"count_neighbors -> {neighbors}"
+    assert extract_bigram_neighbors(texts) == neighbors
+    assert extract_bigram_neighbors(["single"]) == {}
+
+    print("count_neighbors tests passed.")
+
+def test_find_elbow_ties():
+    scores = {"b": 5.0, "a": 5.0, "c": 4.0, "d": 1.0, "e": 0.5}
+    # Ties are ranked by word, and the words before the first elbow are kept
+    assert find_elbow(scores, delta_k=1, target_slope=-3.0, tolerance=0.1) == ["a", "b", "c"]
+    # No elbow: every word is kept
+    assert find_elbow(scores, delta_k=1, target_slope=-10.0, tolerance=0.1) == ["a", "b", "c", "d", "e"]
+
+    print("find_elbow tests passed.")
+
 from src.text_processing import read_text_files
 from src.stopwords import (
     get_nltk_stopwords_in_corpus,
@@ -61,7 +84,7 @@ PARAMS = [
 
 # Define test corpora
 TEST_CORPORA = [
-    ("Test1", read_text_files("./corpus_test")),
+    ("Test1", read_text_files(os.path.join(os.path.dirname(__file__), "corpus_test"))),
     ("Test2", {"text": (
         "Although the weather was cold and the wind was strong, the children decided to go outside "
         "and play in the snow until they became tired and returned home."
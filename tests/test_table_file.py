@@ -0,0 +1,67 @@
+import os
+import pickle
+import shutil
+import tempfile
+
+from src.ngram import create_n_grams
+from src.ngram_table import NGramTable
+from src.table_file import MappedTable, save_table
+from src.text_processing import StopWordSet, text_processing
+from src.utils import calculate_and_store_glue, local_maxs
+
+###################################### Test Cases ###################################
+
+STOP_WORDS = StopWordSet(["the", "of", "and", "a", "in", "to", "is"])
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus_test")
+
+def test_save_and_map_table():
+    print("Testing save_table and MappedTable...")
+    directory = tempfile.mkdtemp()
+    try:
+        ngrams = create_n_grams(text_processing(CORPUS_PATH), STOP_WORDS)
+        calculate_and_store_glue(ngrams, "dice", STOP_WORDS)
+        _, relevant = local_maxs(ngrams)
+        path = os.path.join(directory, "table.bin")
+        save_table(ngrams.table, path)
+
+        with MappedTable(path) as table:
+            assert len(table) == len(ngrams)
+            for key, ngram in ngrams.items():
+                mapped = table.lookup(key)
+                assert mapped.get_tokens() == ngram.get_tokens() and mapped.get_size() == ngram.get_size()
+                assert mapped.get_frequency() == ngram.get_frequency() and mapped.get_glue() == ngram.get_glue()
+                assert mapped.get_max_glue_n_grams_minus_1() == ngram.get_max_glue_n_grams_minus_1()
+                assert mapped.get_max_glue_n_grams_plus_1() == ngram.get_max_glue_n_grams_plus_1()
+                assert mapped.is_relevant_expression() == ngram.is_relevant_expression()
+            assert list(table.relevant_expressions()) == relevant
+            assert table.lookup("unknown words") is None and "the" not in table and relevant[0] in table
+            # Worker processes receive the path and map the same file
+            assert list(pickle.loads(pickle.dumps(table)).relevant_expressions()) == relevant
+        print("save_table and MappedTable: OK")
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_map_empty_table_and_other_file():
+    print("Testing MappedTable on an empty table and on another file...")
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "empty.bin")
+        save_table(NGramTable(), path)
+        with MappedTable(path) as table:
+            assert len(table) == 0 and table.lookup("data") is None and list(table.relevant_expressions()) == []
+        with open(path, "wb") as f:
+            f.write(b"not a table")
+        try:
+            MappedTable(path)
+            assert False, "A file that is not a table must be refused."
+        except ValueError:
+            pass
+        print("MappedTable on an empty table and on another file: OK")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_save_and_map_table()
+    test_map_empty_table_and_other_file()
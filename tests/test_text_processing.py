@@ -1,5 +1,8 @@
 import os
-from src.text_processing import read_text_files, add_spaces, tokenize_text, text_processing  
+import random
+import shutil
+import tempfile
+from src.text_processing import read_text_files, add_spaces, tokenize_text, tokenize, text_processing, iter_text_blocks, iter_token_chunks
 
 ################################### Test Cases ###################################
 
@@ -36,6 +39,17 @@ try:
     assert result == expected, f"tokenize_text failed: expected {expected}, got {result}"
     print("tokenize_text: OK")
 
+    # Test the tokenize function: golden test on the test corpus, then random texts full of dots and punctuation
+    print("Testing tokenize...")
+    for name, content in read_text_files(os.path.join(os.path.dirname(__file__), "corpus_test")).items():
+        assert tokenize(content) == tokenize_text(add_spaces(content)), f"tokenize failed on {name}"
+    rng = random.Random(0)
+    alphabet = list("aAzZ09 5..\n\t;:!?,<>&()[]_-'é٣")
+    for _ in range(20000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert tokenize(text) == tokenize_text(add_spaces(text)), f"tokenize failed on {text!r}"
+    print("tokenize: OK")
+
     # Test the text_processing function
     print("Testing text_processing...")
     result = text_processing(test_dir)
@@ -46,6 +60,31 @@ try:
     assert result == expected_tokens, f"text_processing failed: expected {expected_tokens}, got {result}"
     print("text_processing: OK")
 
+    # Test the streaming functions: tiny blocks must give the same tokens as the whole files
+    print("Testing iter_token_chunks...")
+    for block_size in (1, 3, 7, 64):
+        blocks = list(iter_text_blocks(test_dir, block_size))
+        assert "".join(block for name, block in blocks if name == "file1.txt") == text_files["file1.txt"]
+        streamed = [token for tokens in iter_token_chunks(test_dir, block_size) for token in tokens]
+        assert streamed == expected_tokens, f"iter_token_chunks failed with blocks of {block_size}: got {streamed}"
+    print("iter_token_chunks: OK")
+
+    # A token longer than several blocks stays whole, and the text is read in linear time
+    print("Testing iter_text_blocks with long tokens...")
+    long_dir = tempfile.mkdtemp()
+    try:
+        content = "start " + "x" * 5000 + "\tmiddle " + "y" * 100_000
+        with open(os.path.join(long_dir, "long.txt"), "w", encoding="utf-8") as f:
+            f.write(content)
+        for block_size in (1, 64, 4096):
+            blocks = [block for _, block in iter_text_blocks(long_dir, block_size)]
+            assert "".join(blocks) == content
+            assert all(block[-1].isspace() for block in blocks[:-1])
+            assert content.split() == [token for block in blocks for token in block.split()]
+    finally:
+        shutil.rmtree(long_dir)
+    print("iter_text_blocks with long tokens: OK")
+
 finally:
     # Clean up temporary files
     for file in os.listdir(test_dir):
@@ -0,0 +1,50 @@
+import math
+
+from src.corpus_index import CorpusIndex
+from src.tfidf import TfidfMatrix
+from src.text_processing import StopWordSet
+
+###################################### Test Cases ###################################
+
+STOP_WORDS = StopWordSet(["the", "of", "is"])
+TEXTS = {
+    "doc1": "Data mining is the mining of data. Data mining!",
+    "doc2": "The art of data science.",
+    "doc3": "Mining the art of data mining",
+}
+
+def test_tfidf_scores():
+    print("Testing TfidfMatrix scores...")
+    index = CorpusIndex.from_texts(TEXTS, ["data mining", "the art"])
+    tfidf = TfidfMatrix.from_index(index, ["data mining", "the art", "data mining"], STOP_WORDS)
+    assert tfidf.terms[tfidf.num_unigrams:] == ["data mining", "the art"]
+    assert not {"the", "of", "is", ".", "!"} & set(tfidf.terms[:tfidf.num_unigrams])
+    for row, doc in enumerate(tfidf.documents):
+        for column, term in enumerate(tfidf.terms):
+            tf = index.tf(term, doc)
+            expected = tf / index.num_tokens(doc) * math.log(3 / index.df(term)) if tf else 0.0
+            assert math.isclose(tfidf.scores[row, column], expected, abs_tol=1e-15)
+    # "data" occurs in every document: its entries are kept with a score of 0
+    assert tfidf.scores.nnz == tfidf.counts.nnz
+    print("TfidfMatrix scores: OK")
+
+
+def test_tfidf_keywords():
+    print("Testing TfidfMatrix.keywords...")
+    index = CorpusIndex.from_texts(TEXTS, ["data mining", "the art"])
+    tfidf = TfidfMatrix.from_index(index, ["data mining", "the art"], STOP_WORDS)
+    keywords = tfidf.keywords(3, 1)
+    for row, doc in enumerate(tfidf.documents):
+        unigram_scores = {term: tfidf.scores[row, c] for c, term in enumerate(tfidf.terms[:tfidf.num_unigrams]) if index.tf(term, doc)}
+        re_scores = {term: tfidf.scores[row, tfidf.num_unigrams + c] for c, term in enumerate(tfidf.terms[tfidf.num_unigrams:]) if index.tf(term, doc)}
+        best = lambda scores, k: [term for term, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]]
+        assert keywords[doc] == best(re_scores, 1) + best(unigram_scores, 3)
+    # Matching is case sensitive: "Data mining" is not the RE "data mining"
+    assert keywords["doc1"] == ["Data", "mining", "data"]
+    assert tfidf.keywords(0, 0) == {doc: [] for doc in TEXTS}
+    print("TfidfMatrix.keywords: OK")
+
+
+if __name__ == "__main__":
+    test_tfidf_scores()
+    test_tfidf_keywords()
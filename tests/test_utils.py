@@ -1,4 +1,4 @@
-from src.ngram import n_gram
+from src.ngram import n_gram, build_n_gram_index
 from src.utils import get_element, calculate_and_store_glue
 
 ###################################### Test Cases ###################################
@@ -22,6 +22,20 @@ def test_get_element():
     print("get_element: OK")
 
 
+def test_get_element_with_index():
+    print("Testing get_element with an index...")
+    ngrams = {
+        "a b": n_gram(size=2, frequency=1, tokens=["a", "b"]),
+        "a b c": n_gram(size=3, frequency=1, tokens=["a", "b", "c"]),
+    }
+    index = build_n_gram_index(ngrams)
+
+    assert get_element(["a", "b", "c"], ngrams, index) is ngrams["a b c"], "get_element failed: Expected the indexed n_gram."
+    assert get_element(["b", "c"], ngrams, index) is None, "get_element failed: Expected None for non-existing tokens."
+
+    print("get_element with an index: OK")
+
+
 def test_calculate_and_store_glue():
     print("Testing calculate_and_store_glue...")
     tokens1 = ["a", "b", "c"]
@@ -58,4 +72,5 @@ def test_calculate_and_store_glue():
 
 if __name__ == "__main__":
     test_get_element()
+    test_get_element_with_index()
     test_calculate_and_store_glue()
\ No newline at end of file